@@ -1,7 +1,59 @@
+from typing import Any, Iterator, Sequence, Union
+
 import pandas as pd
 
+from .operations.dataframe.functions import pd_iter_select_batches, pd_select
+
+DATASOURCE_BATCH_SIZE = 100000
+
 
 class DatasourceWrapper:
 
     def to_df(self) -> pd.DataFrame:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def to_batches(self, batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields the datasource as consecutive dataframes of at most batch_size rows.
+
+        Sources that can be read incrementally should override this, the default
+        just slices the output of to_df().
+        """
+        df = self.to_df()
+
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size]
+
+    def cache_key(self) -> Union[None, str]:
+        """
+        Identifies the current contents of the datasource, for caches of what is
+        computed from them, like column statistics. None when changes can't be
+        told cheaply, which is the default.
+        """
+        return None
+
+    def select(self, columns: Union[None, Sequence[str]] = None, filters: Union[None, Sequence[Sequence[Any]]] = None,
+               limit: Union[None, int] = None) -> pd.DataFrame:
+        """
+        Reads the given columns (all when None) of the first 'limit' rows that pass
+        every filter. Filters are [column, operator, value] triples, see
+        pd_filter_mask for the operators.
+
+        Sources that can push the projection, the filters or the limit down to
+        where the data is read should override this, the default reads the whole
+        source with to_df() and selects afterwards.
+        """
+        return pd_select(self.to_df(), columns, filters, limit)
+
+    def select_batches(self, columns: Union[None, Sequence[str]] = None,
+                       filters: Union[None, Sequence[Sequence[Any]]] = None, limit: Union[None, int] = None,
+                       batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields what select() returns as consecutive dataframes, for consumers that
+        go through the selection once without holding all of it, like reservoir
+        sampling.
+
+        The default selects on every batch of to_batches(), sources that override
+        select() should override this as well.
+        """
+        return pd_iter_select_batches(self.to_batches(batch_size or DATASOURCE_BATCH_SIZE), columns, filters, limit)
@@ -0,0 +1,89 @@
+"""
+Benchmarks for montante operations.
+
+Every benchmark module can be run as a script, i.e.:
+
+    python3 -m montante.benchmarks.r_conversion
+"""
+
+import time
+import resource
+import multiprocessing
+from typing import Any, Callable, Dict, List, Union
+
+
+def time_call(func: Callable, *args, repeat: int = 3, **kwargs) -> Dict[str, float]:
+    """
+    Calls func(*args, **kwargs) 'repeat' times and returns the best and median
+    wall times in seconds.
+    """
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+
+    return {
+        'best': timings[0],
+        'median': timings[len(timings) // 2],
+        'repeat': repeat
+    }
+
+
+def _measure_child(func: Callable, args: tuple, queue: multiprocessing.Queue):
+    start = time.perf_counter()
+    result = func(*args)
+    queue.put({
+        'result': result,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    })
+
+
+def measure_in_subprocess(func: Callable, *args) -> Dict[str, Any]:
+    """
+    Runs func(*args) in a fresh process and returns its result together with the
+    wall time and the peak RSS of that process, so measurements don't share a peak.
+
+    func must be a module level function and its result must be picklable.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure_child, args=(func, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def print_table(headers: List[str], rows: List[List]):
+    """
+    Prints benchmark results as a plain text table.
+    """
+    cells = [[str(item) for item in row] for row in [headers] + rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+
+    for row in cells:
+        print('  '.join(item.rjust(width) for item, width in zip(row, widths)))
+
+
+def caret_training_payload(predictors: List[str], target: str = 'target', method: str = 'C5.0',
+                           training_control: Union[None, Dict] = None) -> Dict:
+    """
+    Builds a caret training payload, by default with the same training control as
+    the test suite's iris payload.
+    """
+    return {
+        'engine': 'caret',
+        'target': target,
+        'predictors': predictors,
+        'engine-parameters': {
+            'method': method,
+            'preprocess': [],
+            'metric': 'Accuracy',
+            'training-control': training_control or {'method': 'boot', 'number': 5, 'repeats': 1}
+        }
+    }
@@ -0,0 +1,57 @@
+"""
+Seconds to load the same dataset repeatedly by parsing its CSV file against
+reading it from an ArrowDatasetCache, for every column and for the columns of a
+training payload.
+
+    python3 -m montante.benchmarks.arrow_cache --size-mb 500
+"""
+
+import os
+import shutil
+import argparse
+import tempfile
+
+from . import time_call, print_table
+from .csv_ingest import generate_csv, PAYLOAD_COLUMNS
+from ..operations.files.datasource import CSVDatasourceWrapper
+from ..operations.files.arrow_cache import ArrowDatasetCache, ArrowCacheDatasourceWrapper
+
+
+def _map_table(cache: ArrowDatasetCache, columns) -> int:
+    with cache.table('dataset', columns) as table:
+        return table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, default=500.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    results = []
+
+    try:
+        path = os.path.join(directory, 'dataset.csv')
+        generate_csv(path, int(args.size_mb * 1024 ** 2))
+        cache = ArrowDatasetCache(directory)
+        conversion = time_call(cache.put, 'dataset', CSVDatasourceWrapper(path), repeat=1)
+        results.append(['arrow_put', '', '%.3f' % conversion['best']])
+
+        for columns in [None, PAYLOAD_COLUMNS]:
+            label = 'all' if columns is None else 'payload'
+            csv_timing = time_call(CSVDatasourceWrapper(path, usecols=columns).to_df, repeat=args.repeat)
+            arrow_timing = time_call(ArrowCacheDatasourceWrapper(cache, 'dataset', columns=columns).to_df,
+                                     repeat=args.repeat)
+            table_timing = time_call(_map_table, cache, columns, repeat=args.repeat)
+            results.append(['csv_to_df', label, '%.3f' % csv_timing['median']])
+            results.append(['arrow_to_df', label, '%.3f' % arrow_timing['median']])
+            results.append(['arrow_table', label, '%.4f' % table_timing['median']])
+    finally:
+        shutil.rmtree(directory)
+
+    print_table(['implementation', 'columns', 'seconds'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Caret training wall time against the number of parallel resampling workers,
+on the sklearn iris and wine examples enlarged by replication.
+
+    python3 -m montante.benchmarks.caret_parallel --workers 1 2 4 8 --replicate 20
+"""
+
+import re
+import argparse
+
+import pandas as pd
+
+from . import time_call, print_table, caret_training_payload
+from ..examples import data_example_loader
+from ..operations.R.caret_wrappers import caret_model_train
+
+
+def replicated_example(name: str, replicate: int) -> pd.DataFrame:
+    df = data_example_loader(name)[0]
+    df = df.rename(columns=lambda column: re.sub(r'[^0-9A-Za-z_.]', '_', column))
+    return pd.concat([df] * replicate, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='caret parallel resampling benchmark')
+    parser.add_argument('--datasets', nargs='+', default=['sklearn_iris', 'sklearn_wine'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='1 runs without a parallel backend')
+    parser.add_argument('--replicate', type=int, default=20)
+    parser.add_argument('--number', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--cluster-type', default='FORK')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+
+    for name in args.datasets:
+        df = replicated_example(name, args.replicate)
+        predictors = [column for column in list(df) if column != 'target']
+        serial = None
+
+        for workers in args.workers:
+            training_control = {'method': 'repeatedcv', 'number': args.number, 'repeats': args.repeats}
+
+            if workers > 1:
+                training_control['parallel'] = {'workers': workers, 'type': args.cluster_type}
+
+            payload = caret_training_payload(predictors, training_control=training_control)
+            timing = time_call(caret_model_train, df, payload, repeat=args.repeat)
+            serial = serial or timing['median']
+            results.append([name, len(df), workers, '%.2f' % timing['median'], '%.2fx' % (serial / timing['median'])])
+
+    print_table(['dataset', 'rows', 'workers', 'seconds', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
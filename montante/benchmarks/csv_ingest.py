@@ -0,0 +1,79 @@
+"""
+Seconds and peak RSS of reading a generated CSV file with a plain pd.read_csv
+against CSVDatasourceWrapper, both reading every column and only the columns of
+a training payload.
+
+Every measurement runs in a fresh process so that peak RSS values are not
+shared between runs. The file is generated once and reused if it exists.
+
+    python3 -m montante.benchmarks.csv_ingest --size-gb 5 --path /tmp/ingest.csv
+"""
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from . import print_table, measure_in_subprocess
+from ..operations.files.datasource import CSVDatasourceWrapper
+
+GENERATE_CHUNK_ROWS = 500000
+PAYLOAD_COLUMNS = ['amount', 'quantity', 'country']
+
+
+def _generate_chunk(rows: int, offset: int) -> pd.DataFrame:
+    rng = np.random.RandomState(offset)
+    countries = np.array(['AR', 'BR', 'CL', 'CO', 'MX', 'PE', 'UY', 'VE'])
+    return pd.DataFrame({
+        'id': np.arange(offset, offset + rows),
+        'amount': rng.normal(100, 25, rows).round(2),
+        'quantity': rng.randint(1, 50, rows),
+        'discount': rng.uniform(0, 1, rows).round(4),
+        'country': countries[rng.randint(0, len(countries), rows)],
+        'date': pd.Timestamp('2017-01-01') + pd.to_timedelta(rng.randint(0, 365, rows), unit='D'),
+        'comment': np.char.add('comment ', rng.randint(0, 10 ** 6, rows).astype(str))
+    }, columns=['id', 'amount', 'quantity', 'discount', 'country', 'date', 'comment'])
+
+
+def generate_csv(path: str, size_bytes: int):
+    offset = 0
+
+    with open(path, 'w') as f:
+        while offset == 0 or f.tell() < size_bytes:
+            _generate_chunk(GENERATE_CHUNK_ROWS, offset).to_csv(
+                f, header=offset == 0, index=False, date_format='%m/%d/%Y %H:%M')
+            offset += GENERATE_CHUNK_ROWS
+
+
+def read_rows(name: str, path: str) -> int:
+    if name == 'read_csv':
+        return len(pd.read_csv(path))
+    elif name == 'read_csv_usecols':
+        return len(pd.read_csv(path, usecols=PAYLOAD_COLUMNS))
+    elif name == 'wrapper':
+        return len(CSVDatasourceWrapper(path).to_df())
+    elif name == 'wrapper_usecols':
+        return len(CSVDatasourceWrapper(path, usecols=PAYLOAD_COLUMNS).to_df())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-gb', type=float, default=5.0)
+    parser.add_argument('--path', default='/tmp/montante-ingest.csv')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        generate_csv(args.path, int(args.size_gb * 1024 ** 3))
+
+    results = []
+
+    for name in ['read_csv', 'wrapper', 'read_csv_usecols', 'wrapper_usecols']:
+        result = measure_in_subprocess(read_rows, name, args.path)
+        results.append([name, result['result'], '%.1f' % result['seconds'], '%.1f' % result['peak_rss_mb']])
+
+    print_table(['implementation', 'rows', 'seconds', 'peak_rss_mb'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Synthetic datasets for the benchmarks, with any number of rows and of numeric
+and categorical predictors, a controllable cardinality and a fraction of
+missing values.
+
+The 'target' column is a class label derived from the predictors plus noise,
+so models trained on it learn something and build realistic trees.
+
+    python3 -m montante.benchmarks.datasets --rows 100000 --numeric 8 --categorical 4 --na-fraction 0.01
+"""
+
+import argparse
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from . import caret_training_payload
+
+
+def synthetic_dataframe(rows: int, numeric: int = 4, categorical: int = 2, cardinality: int = 5,
+                        na_fraction: float = 0.0, classes: int = 3, seed: int = 0) -> pd.DataFrame:
+    """
+    Creates a dataframe with 'numeric' float64 columns named num_<i>, 'categorical'
+    object columns named cat_<i> holding 'cardinality' levels each, and a 'target'
+    column with 'classes' levels.
+
+    A 'na_fraction' of the predictor values is missing: NaN in numeric columns
+    and None in categorical ones. The target never is.
+    """
+    if numeric + categorical < 1:
+        raise ValueError('At least one predictor column is needed')
+
+    rng = np.random.RandomState(seed)
+    columns = {}
+    score = np.zeros(rows)
+
+    for i in range(numeric):
+        values = rng.normal(size=rows)
+        score += rng.uniform(-1, 1) * values
+        columns[''.join(['num_', str(i)])] = values
+
+    for i in range(categorical):
+        levels = np.array([''.join(['l', str(level)]) for level in range(cardinality)], dtype=object)
+        codes = rng.randint(0, cardinality, size=rows)
+        score += rng.normal(size=cardinality)[codes]
+        columns[''.join(['cat_', str(i)])] = levels[codes]
+
+    score += rng.normal(scale=0.5, size=rows)
+    # equally populated classes from the quantiles of the score
+    edges = np.percentile(score, np.linspace(0, 100, classes + 1)[1:-1])
+    target_levels = np.array([''.join(['class', str(level)]) for level in range(classes)], dtype=object)
+
+    if na_fraction > 0:
+        for name, values in columns.items():
+            missing = rng.uniform(size=rows) < na_fraction
+
+            if values.dtype == object:
+                values[missing] = None
+            else:
+                values[missing] = np.nan
+
+    df = pd.DataFrame(columns, columns=list(columns))
+    df['target'] = target_levels[np.searchsorted(edges, score)]
+    return df
+
+
+def synthetic_predictors(df: pd.DataFrame) -> List[str]:
+    return [name for name in list(df) if name != 'target']
+
+
+def synthetic_training_payload(df: pd.DataFrame, method: str = 'C5.0') -> Dict:
+    """
+    caret training payload for a synthetic dataframe, with a cheap 2-fold cross
+    validation so that benchmarks time the fit rather than the resampling.
+    """
+    return caret_training_payload(synthetic_predictors(df), method=method,
+                                  training_control={'method': 'cv', 'number': 2, 'repeats': 1})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='synthetic dataset generator')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--numeric', type=int, default=4)
+    parser.add_argument('--categorical', type=int, default=2)
+    parser.add_argument('--cardinality', type=int, default=5)
+    parser.add_argument('--na-fraction', type=float, default=0.0)
+    parser.add_argument('--classes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--path', default=None, help='write the dataset as CSV instead of describing it')
+    args = parser.parse_args()
+
+    df = synthetic_dataframe(args.rows, args.numeric, args.categorical, args.cardinality, args.na_fraction,
+                             args.classes, args.seed)
+
+    if args.path is not None:
+        df.to_csv(args.path, index=False)
+    else:
+        print(df.describe(include='all').transpose())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+File size, save time and load time of caret models stored as base64 strings
+inside RDS files (the previous caret_model_save_to_tmp format) against artifact
+files with each body compression, plus the time to read an artifact header alone.
+
+    python3 -m montante.benchmarks.model_artifact --replicate 20 --method C5.0 rf
+"""
+
+import os
+import shutil
+import argparse
+import tempfile
+
+from . import time_call, print_table, caret_training_payload
+from .caret_parallel import replicated_example
+from ..operations.R.functions import (r_save_rds, r_read_rds, r_serialize, r_unserialize,
+                                      r_base64encode, r_base64decode)
+from ..operations.R.caret_wrappers import caret_model_train, caret_model_save_artifact, caret_model_load_artifact
+from ..operations.files.artifact import artifact_read_header
+
+ARTIFACT_COMPRESSIONS = ['none', 'zlib', 'bz2', 'lzma']
+
+
+def base64_rds_save(model, path: str):
+    r_save_rds(r_base64encode(r_serialize(model)), path)
+
+
+def base64_rds_load(path: str):
+    return r_unserialize(r_base64decode(r_read_rds(path)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dataset', default='sklearn_wine')
+    parser.add_argument('--replicate', type=int, default=20)
+    parser.add_argument('--method', nargs='+', default=['C5.0'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = replicated_example(args.dataset, args.replicate)
+    predictors = [column for column in list(df) if column != 'target']
+    directory = tempfile.mkdtemp()
+    results = []
+
+    try:
+        for method in args.method:
+            model = caret_model_train(df, caret_training_payload(predictors, method=method))
+            path = os.path.join(directory, 'base64.rds')
+            save = time_call(base64_rds_save, model, path, repeat=args.repeat)
+            load = time_call(base64_rds_load, path, repeat=args.repeat)
+            results.append([method, 'base64_rds', os.path.getsize(path),
+                            '%.4f' % save['median'], '%.4f' % load['median'], ''])
+
+            for compression in ARTIFACT_COMPRESSIONS:
+                path = os.path.join(directory, ''.join([compression, '.model']))
+                save = time_call(caret_model_save_artifact, model, path, compression, repeat=args.repeat)
+                load = time_call(caret_model_load_artifact, path, repeat=args.repeat)
+                header = time_call(artifact_read_header, path, repeat=args.repeat)
+                results.append([method, ''.join(['artifact_', compression]), os.path.getsize(path),
+                                '%.4f' % save['median'], '%.4f' % load['median'], '%.6f' % header['median']])
+    finally:
+        shutil.rmtree(directory)
+
+    print_table(['method', 'format', 'bytes', 'save_s', 'load_s', 'header_s'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Rows per second of predicting with a caret tree model through R against its
+exported NativeTree, on the sklearn iris example enlarged by replication.
+
+    python3 -m montante.benchmarks.native_tree --rows 1000 100000 --method C5.0Tree rpart
+"""
+
+import argparse
+
+import pandas as pd
+
+from . import time_call, print_table, caret_training_payload
+from ..examples import data_example_loader
+from ..operations.R.functions import r_predict, r_convert_pandas_dataframe
+from ..operations.R.caret_wrappers import caret_model_train
+from ..operations.R.tree_export import r_tree_export, native_tree_parity
+
+
+def r_tree_predict(model, df: pd.DataFrame):
+    return r_predict(model, r_convert_pandas_dataframe(df), type='raw')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--method', nargs='+', default=['C5.0Tree', 'rpart'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = data_example_loader('sklearn_iris')[0]
+    predictors = [column for column in list(df) if column != 'target']
+    results = []
+
+    for method in args.method:
+        model = caret_model_train(df, caret_training_payload(predictors, method=method))
+        tree = r_tree_export(model)
+
+        for rows in args.rows:
+            data = pd.concat([df[predictors]] * (rows // len(df) + 1), ignore_index=True).iloc[:rows]
+            parity = native_tree_parity(model, tree, data)['parity']
+            r_timing = time_call(r_tree_predict, model, data, repeat=args.repeat)
+            native_timing = time_call(tree.predict, data, repeat=args.repeat)
+            results.append([method, rows, '%.0f' % (rows / r_timing['median']),
+                            '%.0f' % (rows / native_timing['median']), '%.4f' % parity])
+
+    print_table(['method', 'rows', 'r_rows_per_s', 'native_rows_per_s', 'parity'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark suite for every stage of the train and predict pipeline, on synthetic
+datasets of growing size (see benchmarks.datasets):
+
+    r_conversion    r_convert_pandas_dataframe
+    sqlite_load     sqlite_from_dataframe into a new file
+    sql_query       raw_sqlalchemy_query_to_pandas_dataframe of the whole table
+    validation      training payload validation plus validate_column_batch
+    caret_train     caret_model_train
+    predict         prediction_operation
+    model_save      ModelStore.save
+    model_load      ModelStore.get from disk
+
+Results can be written as JSON, and compared against a JSON baseline from a
+previous run: benchmarks whose median time grew by more than --threshold are
+flagged, and the exit status is 1 if any was.
+
+    python3 -m montante.benchmarks.pipeline --rows 10000 100000 --output current.json
+    python3 -m montante.benchmarks.pipeline --rows 10000 100000 --baseline current.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import itertools
+import platform
+import tempfile
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
+import sqlalchemy
+
+from . import time_call, print_table
+from .datasets import synthetic_dataframe, synthetic_predictors, synthetic_training_payload
+from ..util import use_validator
+from ..schemas.columnar import validate_column_batch
+from ..schemas.registry import training_schema_validator
+from ..operations.dataframe.functions import pd_column_info_dict
+from ..operations.sql.engine import raw_sqlalchemy_query_to_pandas_dataframe
+from ..operations.sql.sqlite import sqlite_from_dataframe
+from ..operations.R.functions import r_convert_pandas_dataframe
+from ..operations.R.caret_wrappers import caret_model_train
+from ..operations.R.model_store import ModelStore
+from ..operations.predict import prediction_operation
+
+PIPELINE_STAGES = ['r_conversion', 'sqlite_load', 'sql_query', 'validation', 'caret_train', 'predict',
+                   'model_save', 'model_load']
+
+"""
+Relative growth of the median time over the baseline that counts as a regression.
+"""
+PIPELINE_REGRESSION_THRESHOLD = 0.2
+
+
+def _sqlite_engine(directory: str, name: str) -> sqlalchemy.engine.Engine:
+    return sqlalchemy.create_engine(''.join(['sqlite:///', os.path.join(directory, name), '.db']))
+
+
+def pipeline_stages(df: pd.DataFrame, directory: str, train_max_rows: int) -> Iterator[Tuple[str, Callable]]:
+    """
+    Yields (stage, callable) pairs for the stages of PIPELINE_STAGES. Setup, like
+    training the model the predict stage uses, is done between yields and is not
+    part of the timed callables. Training stages are skipped above
+    'train_max_rows' rows.
+    """
+    predictors = synthetic_predictors(df)
+    payload = synthetic_training_payload(df)
+    loads = itertools.count()
+
+    yield 'r_conversion', lambda: r_convert_pandas_dataframe(df)
+
+    def sqlite_load():
+        e = _sqlite_engine(directory, ''.join(['load', str(next(loads))]))
+        sqlite_from_dataframe(df, e, 'benchmark')
+        e.dispose()
+
+    yield 'sqlite_load', sqlite_load
+
+    e = _sqlite_engine(directory, 'query')
+    sqlite_from_dataframe(df, e, 'benchmark')
+    yield 'sql_query', lambda: raw_sqlalchemy_query_to_pandas_dataframe(e, 'SELECT * FROM dataset')
+
+    data = dict((name, df[name].values) for name in predictors)
+    column_info = pd_column_info_dict(df[predictors])
+    factor_levels = dict((name, sorted(df[name].dropna().unique())) for name in predictors
+                         if column_info[name] == 'object')
+
+    def validation():
+        use_validator(training_schema_validator('caret', payload['engine-parameters']['method']), payload)
+        validate_column_batch(data, column_info, factor_levels, allow_missing=True)
+
+    yield 'validation', validation
+
+    if len(df) > train_max_rows:
+        return
+
+    # caret's formula interface fails on missing values
+    complete = df.dropna()
+    yield 'caret_train', lambda: caret_model_train(complete, payload)
+
+    model = caret_model_train(complete, payload)
+    prediction_data = complete[predictors].to_dict('list')
+    yield 'predict', lambda: prediction_operation(model, prediction_data)
+
+    store = ModelStore(os.path.join(directory, 'models'))
+    yield 'model_save', lambda: store.save(model)
+
+    model_uuid = store.save(model)
+    yield 'model_load', lambda: ModelStore(store.directory).get(model_uuid)
+
+
+def run_pipeline_benchmarks(rows: List[int], stages: List[str], repeat: int = 3, train_max_rows: int = 100000,
+                            dataset: Union[None, Dict] = None) -> Dict:
+    """
+    Runs the pipeline stages on a synthetic dataframe for each number of rows and
+    returns the results in the JSON format read by compare_pipeline_results.
+    'dataset' holds extra synthetic_dataframe arguments.
+    """
+    dataset = dataset or {}
+    results = {}
+
+    for n in rows:
+        df = synthetic_dataframe(n, **dataset)
+        directory = tempfile.mkdtemp()
+
+        remaining = set(stages)
+
+        try:
+            for stage, func in pipeline_stages(df, directory, train_max_rows):
+                if stage not in remaining:
+                    continue
+
+                remaining.discard(stage)
+
+                timing = time_call(func, repeat=repeat)
+                results[''.join([stage, '@', str(n)])] = {
+                    'stage': stage,
+                    'rows': n,
+                    'columns': len(df.columns),
+                    'best': timing['best'],
+                    'median': timing['median'],
+                    'repeat': repeat
+                }
+
+                # leave before the setup of stages that were not asked for, i.e. training
+                if not remaining:
+                    break
+        finally:
+            shutil.rmtree(directory)
+
+    return {
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'dataset': dataset,
+        'results': results
+    }
+
+
+def compare_pipeline_results(baseline: Dict, current: Dict,
+                             threshold: float = PIPELINE_REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    Compares the median times of the benchmarks found in both result sets.
+    Returns one entry per benchmark with the ratio current / baseline, flagged
+    as a regression when the ratio exceeds 1 + threshold.
+    """
+    comparison = []
+
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]['median']
+        after = current['results'][name]['median']
+        ratio = after / before if before > 0 else float('inf')
+
+        comparison.append({
+            'benchmark': name,
+            'baseline': before,
+            'current': after,
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold
+        })
+
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description='train and predict pipeline benchmarks')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--stages', nargs='+', default=PIPELINE_STAGES, choices=PIPELINE_STAGES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--train-max-rows', type=int, default=100000,
+                        help='skip the training, prediction and model storage stages above this many rows')
+    parser.add_argument('--numeric', type=int, default=4)
+    parser.add_argument('--categorical', type=int, default=2)
+    parser.add_argument('--cardinality', type=int, default=5)
+    parser.add_argument('--na-fraction', type=float, default=0.01)
+    parser.add_argument('--output', default=None, help='write the results as JSON to this path')
+    parser.add_argument('--baseline', default=None, help='compare against the JSON results at this path')
+    parser.add_argument('--threshold', type=float, default=PIPELINE_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    dataset = {
+        'numeric': args.numeric,
+        'categorical': args.categorical,
+        'cardinality': args.cardinality,
+        'na_fraction': args.na_fraction
+    }
+    current = run_pipeline_benchmarks(args.rows, args.stages, args.repeat, args.train_max_rows, dataset)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline is None:
+        print_table(['benchmark', 'columns', 'best_s', 'median_s'],
+                    [[name, result['columns'], '%.4f' % result['best'], '%.4f' % result['median']]
+                     for name, result in sorted(current['results'].items())])
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    comparison = compare_pipeline_results(baseline, current, args.threshold)
+    print_table(['benchmark', 'baseline_s', 'current_s', 'ratio', 'status'],
+                [[entry['benchmark'], '%.4f' % entry['baseline'], '%.4f' % entry['current'], '%.2f' % entry['ratio'],
+                  'REGRESSION' if entry['regression'] else 'ok'] for entry in comparison])
+
+    if any(entry['regression'] for entry in comparison):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Decoding of a factor returned by predict: the previous per-element extraction,
+one rpy2 access and level lookup per row, against the bulk NumPy decoding of
+r_extract_prediction_columns and the pairs and Arrow outputs built on it.
+
+    python3 -m montante.benchmarks.prediction_decoding --rows 10000 1000000
+"""
+
+import argparse
+from typing import List, Tuple
+
+import numpy as np
+
+from . import time_call, print_table
+from ..operations.predict.output import prediction_output
+from ..operations.R.functions import r_factor_vector_from_codes, r_extract_prediction_columns, RFactorVector
+
+
+def r_extract_prediction_pairs_by_element(p: RFactorVector) -> List[Tuple[int, str]]:
+    """
+    The per-element decoding r_extract_prediction_pairs used to do, kept as the baseline.
+    """
+    return [(val, p.levels[val-1]) for index, val in enumerate(list(p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='prediction decoding benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000])
+    parser.add_argument('--levels', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    levels = [''.join(['class', str(i)]) for i in range(args.levels)]
+    results = []
+
+    for rows in args.rows:
+        p = r_factor_vector_from_codes(np.random.RandomState(0).randint(0, args.levels, size=rows), levels)
+        baseline = time_call(r_extract_prediction_pairs_by_element, p, repeat=args.repeat)['median']
+        columns = time_call(r_extract_prediction_columns, p, repeat=args.repeat)['median']
+        pairs = time_call(lambda: prediction_output(r_extract_prediction_columns(p), 'pairs'),
+                          repeat=args.repeat)['median']
+        arrow = time_call(lambda: prediction_output(r_extract_prediction_columns(p), 'arrow'),
+                          repeat=args.repeat)['median']
+        results.append([rows, '%.4f' % baseline, '%.4f' % columns, '%.4f' % pairs, '%.4f' % arrow,
+                        '%.1fx' % (baseline / pairs)])
+
+    print_table(['rows', 'by_element_s', 'columns_s', 'pairs_s', 'arrow_s', 'pairs_speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Load generator for the prediction path. Client threads send small prediction
+payloads for one model, either straight through prediction_operation (serialized
+with a lock, since R is not thread-safe) or through a PredictionBatcher.
+
+Reports p50/p99 latency and throughput for each concurrency level.
+
+    python3 -m montante.benchmarks.prediction_load --clients 1 4 16 64
+"""
+
+import time
+import argparse
+import tempfile
+import threading
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from . import print_table, caret_training_payload
+from ..examples import data_example_loader
+from ..operations.train import training_operation
+from ..operations.predict import prediction_operation
+from ..operations.predict.batching import PredictionBatcher
+from ..operations.R.model_store import ModelStore
+
+
+def iris_payload(rows: int, rng: np.random.RandomState) -> Dict:
+    return {
+        'sepal_length_cm': list(rng.uniform(4, 8, size=rows)),
+        'sepal_width_cm': list(rng.uniform(2, 4.5, size=rows)),
+        'petal_length_cm': list(rng.uniform(1, 7, size=rows)),
+        'petal_width_cm': list(rng.uniform(0.1, 2.5, size=rows))
+    }
+
+
+def run_load(predict: Callable[[Dict], List], clients: int, requests_per_client: int, rows: int) -> Dict:
+    """
+    Runs 'clients' threads that each send 'requests_per_client' sequential
+    requests. Returns latency percentiles in milliseconds and requests/s.
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = np.random.RandomState(seed)
+        local = []
+
+        for _ in range(requests_per_client):
+            payload = iris_payload(rows, rng)
+            start = time.perf_counter()
+            predict(payload)
+            local.append(time.perf_counter() - start)
+
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+
+    return {
+        'p50_ms': np.percentile(latencies, 50),
+        'p99_ms': np.percentile(latencies, 99),
+        'requests_per_s': len(latencies) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='prediction load generator')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=50, help='requests per client')
+    parser.add_argument('--rows', type=int, default=3, help='rows per request')
+    parser.add_argument('--max-batch-size', type=int, default=1024)
+    parser.add_argument('--max-wait', type=float, default=0.005)
+    args = parser.parse_args()
+
+    df = data_example_loader('sklearn_iris')[0]
+    model = training_operation(df, caret_training_payload([name for name in list(df) if name != 'target']))
+    store = ModelStore(tempfile.mkdtemp())
+    model_uuid = store.save(model)
+
+    r_lock = threading.Lock()
+
+    def direct(payload):
+        with r_lock:
+            return prediction_operation(model, payload)
+
+    batcher = PredictionBatcher(store, max_batch_size=args.max_batch_size, max_wait=args.max_wait)
+
+    def batched(payload):
+        return batcher.predict(model_uuid, payload)
+
+    results = []
+
+    for clients in args.clients:
+        for name, predict in (('direct', direct), ('batched', batched)):
+            result = run_load(predict, clients, args.requests, args.rows)
+            results.append([clients, name, '%.2f' % result['p50_ms'], '%.2f' % result['p99_ms'],
+                            '%.1f' % result['requests_per_s']])
+
+    batcher.close()
+    print_table(['clients', 'mode', 'p50_ms', 'p99_ms', 'requests_per_s'], results)
+    print(batcher.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the bulk pandas to R dataframe conversion against the previous path
+that built each column through the rpy2 vector constructors element by element.
+
+    python3 -m montante.benchmarks.r_conversion --rows 10000 1000000 10000000
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from rpy2.robjects.vectors import FactorVector as RFactorVector
+from rpy2.robjects.vectors import IntVector as RIntVector
+from rpy2.robjects.vectors import FloatVector as RFloatVector
+from rpy2.robjects.vectors import DataFrame as RDataFrame
+
+from . import time_call, print_table
+from ..operations.R.functions import r_convert_pandas_dataframe
+
+
+def r_convert_pandas_dataframe_by_element(df: pd.DataFrame) -> RDataFrame:
+    """
+    The per-element conversion that r_convert_pandas_dataframe used to do. Kept
+    here as the baseline.
+    """
+    elements = {}
+
+    for column_name, column_type in zip(list(df), [str(dtype) for dtype in df.dtypes]):
+        if column_type == 'int64':
+            elements[column_name] = RIntVector(df[column_name])
+        elif column_type == 'float64':
+            elements[column_name] = RFloatVector(df[column_name])
+        elif column_type == 'object':
+            elements[column_name] = RFactorVector(df[column_name])
+
+    return RDataFrame(elements)
+
+
+def conversion_dataframe(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A dataframe with one column of each type the baseline path supports.
+    """
+    rng = np.random.RandomState(seed)
+    levels = np.array(['alpha', 'beta', 'gamma', 'delta'], dtype=object)
+
+    return pd.DataFrame({
+        'integer': rng.randint(0, 1000, size=rows).astype(np.int64),
+        'numeric': rng.normal(size=rows),
+        'factor': levels[rng.randint(0, len(levels), size=rows)]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pandas to R dataframe conversion benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline-max-rows', type=int, default=10000000,
+                        help='skip the per-element baseline above this many rows')
+    args = parser.parse_args()
+
+    results = []
+
+    for rows in args.rows:
+        df = conversion_dataframe(rows)
+        bulk = time_call(r_convert_pandas_dataframe, df, repeat=args.repeat)
+
+        if rows <= args.baseline_max_rows:
+            baseline = time_call(r_convert_pandas_dataframe_by_element, df, repeat=args.repeat)
+            speedup = '%.1fx' % (baseline['median'] / bulk['median'])
+            baseline_time = '%.4f' % baseline['median']
+        else:
+            speedup = baseline_time = '-'
+
+        results.append([rows, baseline_time, '%.4f' % bulk['median'], speedup])
+
+    print_table(['rows', 'by_element_s', 'bulk_s', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
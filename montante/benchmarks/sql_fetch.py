@@ -0,0 +1,92 @@
+"""
+Rows per second and peak RSS of raw_sqlalchemy_query_to_pandas_dataframe against
+the previous row by row implementation, on a local SQLite fixture.
+
+Every measurement runs in a fresh process so that peak RSS values are not
+shared between runs.
+
+    python3 -m montante.benchmarks.sql_fetch --rows 100000 1000000
+"""
+
+import os
+import sqlite3
+import argparse
+import tempfile
+
+import pandas as pd
+import sqlalchemy
+
+from . import print_table, measure_in_subprocess
+from ..operations.sql.engine import raw_sqlalchemy_query_to_pandas_dataframe
+
+
+def raw_sqlalchemy_query_to_pandas_dataframe_by_row(e: sqlalchemy.engine.Engine, sql: str) -> pd.DataFrame:
+    """
+    The row by row fetch that raw_sqlalchemy_query_to_pandas_dataframe used to do.
+    Kept here as the baseline.
+    """
+    connection = e.connect()
+    rs = connection.execute(sql)
+    data = {}
+    keys = rs.keys()
+
+    for key in keys:
+        data[key] = []
+
+    for row in rs:
+        for key, value in zip(keys, row):
+            data[key].append(value)
+
+    return pd.DataFrame(data)
+
+
+def create_sqlite_fixture(path: str, rows: int, chunk: int = 100000):
+    """
+    Creates a retail-like 'invoice' table with the given number of rows.
+    """
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE invoice (id INTEGER PRIMARY KEY, quantity INTEGER, '
+                       'unit_price REAL, country TEXT, description TEXT)')
+    countries = ['United Kingdom', 'France', 'Germany', 'Spain', 'Netherlands']
+
+    for start in range(0, rows, chunk):
+        connection.executemany('INSERT INTO invoice VALUES (?, ?, ?, ?, ?)', (
+            (i, i % 50, (i % 1000) / 7.0, countries[i % len(countries)], 'ITEM %d' % (i % 4000))
+            for i in range(start, min(start + chunk, rows))
+        ))
+
+    connection.commit()
+    connection.close()
+
+
+def fetch_rows(name: str, path: str) -> int:
+    functions = {
+        'by_row': raw_sqlalchemy_query_to_pandas_dataframe_by_row,
+        'bulk': raw_sqlalchemy_query_to_pandas_dataframe
+    }
+    e = sqlalchemy.create_engine('sqlite:///' + path)
+    return len(functions[name](e, 'SELECT * FROM invoice'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQL to dataframe fetch benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, 'fixture_%d.sqlite' % rows)
+            create_sqlite_fixture(path, rows)
+
+            for name in ('by_row', 'bulk'):
+                result = measure_in_subprocess(fetch_rows, name, path)
+                results.append([rows, name, '%.0f' % (result['result'] / result['seconds']),
+                                '%.1f' % result['peak_rss_mb']])
+
+    print_table(['rows', 'implementation', 'rows_per_s', 'peak_rss_mb'], results)
+
+
+if __name__ == '__main__':
+    main()
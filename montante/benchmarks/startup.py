@@ -0,0 +1,50 @@
+"""
+Cold start time of a Python process that imports montante packages, with R
+started lazily (the default) and with every R package attached upfront by
+runtime.warm_up(), which is what importing the R functions module used to do.
+
+Every measurement is a fresh interpreter, so nothing is shared between runs.
+
+    python3 -m montante.benchmarks.startup --repeat 5
+"""
+
+import sys
+import time
+import argparse
+import subprocess
+
+from . import print_table
+
+STARTUP_STATEMENTS = [
+    ('schemas', 'import montante.schemas.registry'),
+    ('train', 'import montante.operations.train'),
+    ('predict', 'import montante.operations.predict'),
+    ('train_warm_up', 'import montante.operations.train; '
+                      'from montante.operations.R.runtime import warm_up; warm_up()')
+]
+
+
+def cold_start_seconds(statement: str) -> float:
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, '-c', statement])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = sorted(cold_start_seconds('pass') for _ in range(args.repeat))[args.repeat // 2]
+    results = [['python', '%.3f' % baseline, '']]
+
+    for name, statement in STARTUP_STATEMENTS:
+        timings = sorted(cold_start_seconds(statement) for _ in range(args.repeat))
+        median = timings[args.repeat // 2]
+        results.append([name, '%.3f' % median, '%.3f' % (median - baseline)])
+
+    print_table(['import', 'seconds', 'over_python'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Payload validation throughput: building the schema and validator on every
+request, as caret_model_train used to, against the validator registry.
+
+    python3 -m montante.benchmarks.validation --payloads 20000
+"""
+
+import time
+import argparse
+from typing import Callable, Dict
+
+from jsonschema import Draft4Validator
+
+from . import print_table, caret_training_payload
+from ..util import use_validator
+from ..schemas.train import create_specific_training_schema
+from ..schemas.predict import create_specific_prediction_schema_validator
+from ..schemas.registry import training_schema_validator, prediction_schema_validator
+
+IRIS_PREDICTORS = ['sepal_length_cm', 'sepal_width_cm', 'petal_length_cm', 'petal_width_cm']
+IRIS_COLUMN_INFO = [(name, 'float64') for name in IRIS_PREDICTORS]
+
+
+def throughput(validate: Callable[[Dict], object], payload: Dict, payloads: int) -> float:
+    start = time.perf_counter()
+
+    for _ in range(payloads):
+        validate(payload)
+
+    return payloads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='payload validation benchmark')
+    parser.add_argument('--payloads', type=int, default=20000)
+    args = parser.parse_args()
+
+    training_ok = caret_training_payload(IRIS_PREDICTORS)
+    training_bad = caret_training_payload(IRIS_PREDICTORS, method='UNEXISTENT')
+    prediction_ok = {'model_uuid': 'x', 'data': dict((name, 1.0) for name in IRIS_PREDICTORS)}
+
+    cases = [
+        ('training valid', training_ok,
+         lambda p: use_validator(Draft4Validator(create_specific_training_schema('caret', 'C5.0')), p),
+         lambda p: use_validator(training_schema_validator('caret', 'C5.0'), p)),
+        ('training invalid', training_bad,
+         lambda p: use_validator(Draft4Validator(create_specific_training_schema('caret', 'C5.0')), p),
+         lambda p: use_validator(training_schema_validator('caret', 'C5.0'), p)),
+        ('prediction valid', prediction_ok,
+         lambda p: use_validator(create_specific_prediction_schema_validator(IRIS_COLUMN_INFO), p),
+         lambda p: use_validator(prediction_schema_validator(IRIS_COLUMN_INFO), p)),
+    ]
+
+    results = []
+
+    for name, payload, rebuilt, registered in cases:
+        before = throughput(rebuilt, payload, args.payloads)
+        after = throughput(registered, payload, args.payloads)
+        results.append([name, '%.0f' % before, '%.0f' % after, '%.1f' % (1e6 / after), '%.1fx' % (after / before)])
+
+    print_table(['case', 'rebuilt_per_s', 'registry_per_s', 'registry_us', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,7 @@ from typing import Tuple, Union
 
 import pandas as pd
 from sklearn import datasets
-from rpy2.robjects import r
-from rpy2.robjects import pandas2ri
-from rpy2.robjects.vectors import DataFrame as RDataFrame
-
-
+from ..operations.R.functions import r, pandas2ri, RDataFrame
 from ..operations.dataframe.functions import pd_sanitize_column_names_for_r
 
 
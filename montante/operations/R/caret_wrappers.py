@@ -1,18 +1,27 @@
-from typing import Any, Union, List, Dict
-
-from jsonschema import Draft4Validator
-from rpy2.robjects.vectors import ListVector as RListVector
+import json
+import time
+from typing import Any, Union, List, Dict, Tuple
 
 from .functions import *
 from ...util import use_validator, new_uuid, local_tmp_fullpath
-from ...schemas.train import create_specific_training_schema
+from ...util.instrumentation import span, count, instrumentation_enabled
+from ...schemas.registry import training_schema_validator
+from ..files.artifact import artifact_write, artifact_read
+from .preprocess_export import caret_model_preprocess_export
+
+"""
+Name of the R attribute that holds the training metadata of models trained by
+caret_model_train, as a JSON string.
+"""
+CARET_METADATA_ATTRIBUTE = 'montante.metadata'
 
 
-def caret_model_train(df: pd.DataFrame, payload: Dict) -> Union[RListVector, List]:
+def caret_model_train(df: pd.DataFrame, payload: Dict, metadata: Union[None, Dict] = None) -> Union[RListVector, List]:
     """
     Trains a caret model.
 
-    On success returns the caret model instance object.
+    On success returns the caret model instance object, with the given
+    'metadata' added to the metadata it records (see caret_model_set_metadata).
     On error returns the error list produced by the validator.
 
     TODO: Mind this.
@@ -22,30 +31,116 @@ def caret_model_train(df: pd.DataFrame, payload: Dict) -> Union[RListVector, Lis
     """
     # do validation
     method = payload['engine-parameters']['method']
-    schema = create_specific_training_schema('caret', method)
-    errors = use_validator(Draft4Validator(schema), payload)
+
+    with span('train.validation'):
+        errors = use_validator(training_schema_validator('caret', method), payload)
 
     if len(errors) > 0:
         return errors
 
     # create model
-    rdf = r_convert_pandas_dataframe(df)
+    if instrumentation_enabled():
+        count('train.bytes_converted', int(df.memory_usage(index=False).sum()))
+
+    with span('train.conversion'):
+        rdf = r_convert_pandas_dataframe(df)
+
     target = payload['target']
     predictors = payload['predictors']
+
+    with span('train.formula'):
+        formula = r_formula(rdf, target, predictors)
+
     model_kwargs = caret_model_kwargs_from_payload(rdf, payload)
-    model = r_caret_train(r_formula(rdf, target, predictors), **model_kwargs)
+    parallel = payload['engine-parameters']['training-control'].get('parallel')
+    cluster = None
+
+    if parallel is not None:
+        cluster = r_parallel_cluster_start(parallel['workers'], parallel.get('type', 'FORK'))
+
+    if 'seed' in payload['engine-parameters']['training-control']:
+        r_set_seed(payload['engine-parameters']['training-control']['seed'])
+
+    try:
+        with span('train.r_caret_train'):
+            model = r_caret_train(formula, **model_kwargs)
+    finally:
+        if cluster is not None:
+            r_parallel_cluster_stop(cluster)
+
+    model_metadata = {
+        'target': target,
+        'predictors': predictors,
+        'engine-parameters': payload['engine-parameters'],
+        'rows': len(df),
+        'trained_at': time.time()
+    }
+    model_metadata.update(metadata or {})
+    caret_model_set_metadata(model, model_metadata)
 
     return model
 
 
+def caret_model_set_metadata(model: RListVector, metadata: Dict):
+    model.do_slot_assign(CARET_METADATA_ATTRIBUTE, RStrVector([json.dumps(metadata)]))
+
+
+def caret_model_metadata(model: RListVector) -> Dict:
+    """
+    Reads the training metadata set by caret_model_train, or an empty dict for
+    models trained elsewhere.
+    """
+    value = r('function(model, name) attr(model, name, exact = TRUE)')(model, CARET_METADATA_ATTRIBUTE)
+
+    if value is rinterface.NULL or len(value) == 0:
+        return {}
+
+    return json.loads(value[0])
+
+
+def caret_model_artifact_header(model: RListVector) -> Dict:
+    """
+    Describes a caret model for the header of its artifact file, so that requests
+    can be routed and validated without loading the model. Fitted preprocessing
+    is stored as NumPy parameters (see NativePreprocess.to_dict), so it can be
+    applied without loading the model either.
+    """
+    column_info, factor_levels = caret_model_predictor_info(model)
+    metadata = caret_model_metadata(model)
+    preprocess = caret_model_preprocess_export(model)
+
+    return {
+        'engine': 'caret',
+        'method': model.rx2('method')[0],
+        'target': metadata.get('target'),
+        'predictors': list(column_info),
+        'column_info': column_info,
+        'factor_levels': factor_levels,
+        'metadata': metadata,
+        'preprocess': None if preprocess is None else preprocess.to_dict()
+    }
+
+
+def caret_model_save_artifact(model: RListVector, path: str, compression: Union[bool, str] = 'zlib') -> Dict:
+    """
+    Writes a caret model as an artifact file (see files.artifact) and returns the
+    stored header.
+    """
+    return artifact_write(path, caret_model_artifact_header(model), r_serialize_to_bytes(model), compression)
+
+
+def caret_model_load_artifact(path: str) -> RListVector:
+    _, body = artifact_read(path)
+    return r_unserialize_from_bytes(body)
+
+
 def caret_model_save_to_tmp(model) -> str:
     """
-    Saves the passed caret model object to the filesystem.
+    Saves the passed caret model object to the filesystem, as an artifact file.
     """
     uuid = new_uuid()
     path = local_tmp_fullpath(uuid)
-    serialized_model = r_base64encode(r_serialize(model))
-    r_save_rds(serialized_model, path)
+    caret_model_save_artifact(model, path)
     return path
 
 
@@ -54,15 +149,68 @@ def caret_model_kwargs_from_payload(rdf: Any, payload: Dict) -> Dict:
     Creates the object that will be passed to the 'train' R function as configuration
     parameters.
 
-    # TODO: preProcess functionality.
+    The 'preprocess' methods are fitted by train within each resample, and the
+    fitted preProcess object is kept in the model, see caret_model_preprocess_export.
     """
-    return {
+    parameters = payload['engine-parameters']
+    control = parameters['training-control']
+    control_kwargs = {
+        'method': control['method'],
+        'number': control['number'],
+        'repeats': control['repeats']
+    }
+
+    if 'search' in control:
+        control_kwargs['search'] = control['search']
+
+    kwargs = {
         'data': rdf,
-        'trControl': r_caret_train_control(
-            method=payload['engine-parameters']['training-control']['method'],
-            number=payload['engine-parameters']['training-control']['number'],
-            repeats=payload['engine-parameters']['training-control']['repeats']
-        ),
-        'metric': payload['engine-parameters']['metric'],
-        'method': payload['engine-parameters']['method']
+        'trControl': r_caret_train_control(**control_kwargs),
+        'metric': parameters['metric'],
+        'method': parameters['method']
     }
+
+    if parameters.get('preprocess'):
+        kwargs['preProcess'] = RStrVector(parameters['preprocess'])
+
+    if 'tune-grid' in parameters:
+        kwargs['tuneGrid'] = r_convert_pandas_dataframe(pd.DataFrame(parameters['tune-grid']))
+    elif 'tune-length' in parameters:
+        kwargs['tuneLength'] = parameters['tune-length']
+
+    return kwargs
+
+
+"""
+Pandas dtypes used for the R classes found in a model's terms 'dataClasses'.
+"""
+_R_DATA_CLASS_DTYPES = {
+    'numeric': 'float64',
+    'logical': 'bool',
+    'factor': 'object',
+    'ordered': 'category',
+    'character': 'object'
+}
+
+
+def caret_model_predictor_info(model: RListVector) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """
+    Reads the predictor columns a caret model was trained on, from the terms and
+    xlevels of the train object. Returns the column info (column name to pandas
+    dtype, as in pd_column_info_dict) and the training levels of factor columns.
+
+    Note: Only models trained through the formula interface, like the ones from
+    caret_model_train, keep this information.
+    """
+    classes = r('function(model) { classes <- attr(model$terms, "dataClasses"); '
+                'classes[-attr(model$terms, "response")] }')(model)
+    column_info = dict((name, _R_DATA_CLASS_DTYPES.get(value, 'object'))
+                       for name, value in zip(list(classes.names), list(classes)))
+
+    xlevels = model.rx2('xlevels')
+    factor_levels = {}
+
+    if len(xlevels) > 0:
+        factor_levels = dict((name, list(levels)) for name, levels in zip(list(xlevels.names), list(xlevels)))
+
+    return column_info, factor_levels
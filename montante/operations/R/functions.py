@@ -11,37 +11,37 @@ import pandas
 import pandas as pd
 import numpy as np
 
-import rpy2.robjects
-import rpy2.rinterface
-from rpy2.robjects import r
-from rpy2.robjects import pandas2ri
-from rpy2.robjects.packages import importr
-from rpy2.robjects.packages import STAP
-
-from rpy2.rinterface import NA_Logical as RNA_Logical
-from rpy2.robjects import Formula as RFormula
-from rpy2.robjects.vectors import Vector as RVector
-from rpy2.robjects.vectors import FactorVector as RFactorVector
-from rpy2.robjects.vectors import ListVector as RListVector
-from rpy2.robjects.vectors import IntVector as RIntVector
-from rpy2.robjects.vectors import FloatVector as RFloatVector
-from rpy2.robjects.vectors import DataFrame as RDataFrame
-from rpy2.robjects.vectors import StrVector as RStrVector
-
-base = importr('base')
-rpart = importr('rpart')
-stats = importr('stats')
-base64enc = importr('base64enc')
-C50 = importr('C50')
-caret = importr('caret')
+from .runtime import LazyRObject, LazyRPackage, LazySTAP
+
+# R starts, and each package is attached, the first time it is used (see runtime)
+r = LazyRObject('rpy2.robjects', 'r')
+rinterface = LazyRObject('rpy2.rinterface')
+pandas2ri = LazyRObject('rpy2.robjects.pandas2ri')
+importr = LazyRObject('rpy2.robjects.packages', 'importr')
+
+RNA_Logical = LazyRObject('rpy2.rinterface', 'NA_Logical')
+RFormula = LazyRObject('rpy2.robjects', 'Formula')
+RVector = LazyRObject('rpy2.robjects.vectors', 'Vector')
+RFactorVector = LazyRObject('rpy2.robjects.vectors', 'FactorVector')
+RListVector = LazyRObject('rpy2.robjects.vectors', 'ListVector')
+RIntVector = LazyRObject('rpy2.robjects.vectors', 'IntVector')
+RFloatVector = LazyRObject('rpy2.robjects.vectors', 'FloatVector')
+RDataFrame = LazyRObject('rpy2.robjects.vectors', 'DataFrame')
+RStrVector = LazyRObject('rpy2.robjects.vectors', 'StrVector')
+
+base = LazyRPackage('base')
+rpart = LazyRPackage('rpart')
+stats = LazyRPackage('stats')
+base64enc = LazyRPackage('base64enc')
+C50 = LazyRPackage('C50')
+caret = LazyRPackage('caret')
 
 # pandas2ri.activate()
-path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts/graphvizC50.R')
+graphvizC50 = LazySTAP(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts/graphvizC50.R'),
+                       'graphvizC50')
 
-with open(path, 'r') as f:
-    graphvizC50_string = f.read()
-
-graphvizC50 = STAP(graphvizC50_string, 'graphvizC50')
+# R stores NA_integer_ (and NA for logicals) as the smallest 32 bit integer.
+R_NA_INTEGER = np.iinfo(np.int32).min
 
 
 def r_options(*args, **kwargs):
@@ -66,14 +66,14 @@ def r_dataframe_from_pandas(df: pd.DataFrame) -> RDataFrame:
     """
     Transforms a pandas dataframe into an R dataframe.
     """
-    return rpy2.robjects.pandas2ri.py2ri(df)
+    return pandas2ri.py2ri(df)
 
 
 def r_dataframe_from_dict(d: dict) -> RDataFrame:
     """
     Creates an R dataframe with the passed dict.
     """
-    return rpy2.robjects.vectors.DataFrame(d)
+    return RDataFrame(d)
 
 
 def r_dataframe_from_kwargs(**kwargs) -> RDataFrame:
@@ -129,6 +129,30 @@ def r_summary_to_pd(summary) -> pd.DataFrame:
     return pd.DataFrame(matrix.T, columns=labels)
 
 
+def r_dataframe_to_pandas(rdf: RDataFrame) -> pd.DataFrame:
+    """
+    Converts a small R data.frame, like the results table of a caret model, to
+    pandas column by column. Factors become their labels.
+    """
+    columns = {}
+
+    for name, column in zip(list(rdf.names), rdf):
+        if isinstance(column, RFactorVector):
+            columns[name] = r_codes_to_labels(r_factor_codes(column), r_factor_levels(column))
+        else:
+            columns[name] = list(column)
+
+    return pd.DataFrame(columns, columns=list(rdf.names))
+
+
+def r_set_seed(seed: int):
+    """
+    Seeds the R random number generator, which caret uses to draw resamples and
+    random tuning candidates.
+    """
+    r('set.seed')(seed)
+
+
 def r_dataframe_column_index_from_name(rdf: RDataFrame, name: str) -> Union[None, int]:
     """
     Gets the R index of the given column name if it exists, none otherwise.
@@ -161,26 +185,86 @@ def r_rpart(formula: RFormula, data: RDataFrame) -> RListVector:
     return fit
 
 
-def r_predict(fit: RListVector, data: RDataFrame, type: str) -> Union[RFactorVector]:
+def r_predict(fit: RListVector, data: RDataFrame, type: str) -> Union[RFactorVector, RFloatVector, RDataFrame]:
     """
     predict(fit, newdata=dataframe, type="class")
     TODO: Rename this function, this is a very specific use case of stats.predict.
     """
+    # caret's predict.train is only found once caret is attached
+    caret.load()
     return stats.predict(fit, newdata=data, type=type)
 
 
+def r_factor_codes(p: RFactorVector) -> np.ndarray:
+    """
+    Returns the 1-based integer codes of an R factor as one NumPy int32 array,
+    copied out of the R vector buffer in bulk. NA codes are R_NA_INTEGER.
+    """
+    return np.array(_r_vector_buffer(p), dtype=np.int32)
+
+
+def r_factor_levels(p: RFactorVector) -> np.ndarray:
+    return np.asarray(list(p.levels), dtype=object)
+
+
+def r_codes_to_labels(codes: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """
+    Maps 1-based R factor codes to their levels with a single array take. NA codes
+    map to None.
+    """
+    valid = codes > 0
+
+    if valid.all():
+        return levels.take(codes - 1)
+
+    labels = np.full(len(codes), None, dtype=object)
+    labels[valid] = levels.take(codes[valid] - 1)
+    return labels
+
+
+def r_extract_prediction_columns(p: Union[RFactorVector, RFloatVector, RDataFrame]) -> Dict[str, Any]:
+    """
+    Decodes the output of predict into NumPy arrays, without touching R elements
+    one at a time:
+
+    - classes (a factor) give 'index', the int32 R codes (1-based, so an R index
+      and NOT a python index), 'label', their levels as an object array, and
+      'levels', the factor levels.
+    - class probabilities (type='prob', a data.frame) give 'probabilities', a
+      float64 matrix with one row per prediction and one column per class, and
+      'classes', the column names.
+    - regression outputs (a numeric vector) give 'value', a float64 array.
+
+    See:
+        https://rpy2.github.io/doc/v2.9.x/html/numpy.html#from-rpy2-to-numpy
+    """
+    if isinstance(p, RFactorVector):
+        codes = r_factor_codes(p)
+        levels = r_factor_levels(p)
+        return {'index': codes, 'label': r_codes_to_labels(codes, levels), 'levels': levels}
+    elif isinstance(p, RDataFrame):
+        return {
+            'probabilities': np.column_stack([np.array(_r_vector_buffer(column), dtype=np.float64) for column in p]),
+            'classes': [str(name) for name in p.names]
+        }
+    else:
+        return {'value': np.array(_r_vector_buffer(p), dtype=np.float64)}
+
+
 def r_extract_prediction_pairs(p: RFactorVector) -> List[Tuple[int, str]]:
     """
     Extract the numerical value and it's corresponding factor from the predictions
     object. Keep in mind that R indexes start at 1, hence val-1. This means that
     the returned int is the R index of a R vector, NOT a python index.
 
-    TODO: Case when this is regression (Union on the received parameter, isinstance, etc)
+    Decoded in bulk by r_extract_prediction_columns, see it for regressions and
+    class probabilities.
 
     See:
         http://rpy.sourceforge.net/rpy2/doc-2.3/html/vector.html#factorvector
     """
-    return [(val, p.levels[val-1]) for index, val in enumerate(list(p))]
+    columns = r_extract_prediction_columns(p)
+    return list(zip(columns['index'].tolist(), columns['label'].tolist()))
 
 
 def r_predict_index_and_label(prediction) -> str:
@@ -196,10 +280,12 @@ def r_predict_index_and_label(prediction) -> str:
 
 
 def r_caret_preprocess(*args, **kwargs):
+    caret.load()
     return r('preProcess')(*args, **kwargs)
 
 
 def r_caret_train(*args, **kwargs):
+    caret.load()
     return r('train')(*args, **kwargs)
 
 
@@ -207,6 +293,38 @@ def r_caret_train_control(*args, **kwargs) -> RListVector:
     return caret.trainControl(*args, **kwargs)
 
 
+def r_parallel_cluster_start(workers: int, type: str = 'FORK') -> RVector:
+    """
+    Creates a cluster of R worker processes and registers it as the foreach
+    backend, which caret uses to run resampling iterations in parallel.
+
+    Pair every call with r_parallel_cluster_stop. The doParallel package is only
+    attached when a cluster is requested.
+
+    See:
+        https://topepo.github.io/caret/parallel-processing.html
+    """
+    parallel = importr('parallel')
+    cluster = parallel.makeCluster(workers, type=type)
+
+    # i.e. doParallel is not installed, the workers must not outlive the error
+    try:
+        importr('doParallel').registerDoParallel(cluster)
+    except Exception:
+        parallel.stopCluster(cluster)
+        raise
+
+    return cluster
+
+
+def r_parallel_cluster_stop(cluster: RVector):
+    """
+    Stops the cluster and registers the sequential foreach backend again.
+    """
+    importr('parallel').stopCluster(cluster)
+    importr('foreach').registerDoSEQ()
+
+
 def r_c50_model_to_dot(model) -> str:
     return base.suppressWarnings(graphvizC50.graphvizC50(model))
 
@@ -228,8 +346,12 @@ def r_read_rds(path: str):
     return base.readRDS(path)
 
 
-def r_save_rds(obj: Any, path: str):
-    return base.saveRDS(obj, path)
+def r_save_rds(obj: Any, path: str, **kwargs):
+    """
+    See:
+        https://stat.ethz.ch/R-manual/R-devel/library/base/html/readRDS.html
+    """
+    return base.saveRDS(obj, path, **kwargs)
 
 
 def r_serialize(obj) -> RVector:
@@ -237,7 +359,7 @@ def r_serialize(obj) -> RVector:
     See:
         https://github.com/openml/openml-r/issues/49
     """
-    return base.serialize(obj, rpy2.rinterface.NULL)
+    return base.serialize(obj, rinterface.NULL)
 
 
 def r_unserialize(something) -> Any:
@@ -248,7 +370,19 @@ def r_unserialize(something) -> Any:
     return base.unserialize(something)
 
 
-def r_base64encode(obj) -> rpy2.robjects.vectors.StrVector:
+def r_serialize_to_bytes(obj) -> bytes:
+    """
+    Serializes an R object into a Python bytes object, copying the raw vector
+    returned by serialize() in one go.
+    """
+    return np.asarray(r_serialize(obj), dtype=np.uint8).tobytes()
+
+
+def r_unserialize_from_bytes(data: bytes) -> Any:
+    return r_unserialize(rinterface.ByteSexpVector(data))
+
+
+def r_base64encode(obj) -> RStrVector:
     return base64enc.base64encode(obj)
 
 
@@ -301,31 +435,190 @@ def r_dataframe_column_to_factor_by_name(rdf: RDataFrame, name: str) -> RDataFra
     raise ValueError('Given name is not in R dataframe')
 
 
+def r_na_real() -> float:
+    """
+    Returns R's NA_real_ as a NumPy float64. R tells NA_real_ apart from a plain
+    NaN through its payload bits, so this is the value that must be written into
+    numeric vector buffers to get a proper NA.
+    """
+    return np.array([rinterface.NA_Real], dtype=np.float64)[0]
+
+
+def _r_vector_buffer(vector: RVector) -> np.ndarray:
+    """
+    Returns a writable NumPy view over the memory of an R numeric, integer or
+    logical vector. Assigning to the view writes straight into the R vector.
+
+    See:
+        https://rpy2.github.io/doc/v2.9.x/html/numpy.html#from-rpy2-to-numpy
+    """
+    return np.asarray(vector)
+
+
+def r_numeric_vector_from_array(values: np.ndarray, na_mask: Union[None, np.ndarray] = None) -> RFloatVector:
+    """
+    Creates an R numeric vector by copying the given array into a freshly
+    allocated R buffer in one bulk assignment. Positions set in na_mask become NA.
+    """
+    vector = base.numeric(len(values))
+    buffer = _r_vector_buffer(vector)
+    buffer[:] = values
+
+    if na_mask is not None and na_mask.any():
+        buffer[na_mask] = r_na_real()
+
+    return vector
+
+
+def r_integer_vector_from_array(values: np.ndarray, na_mask: Union[None, np.ndarray] = None) -> RIntVector:
+    """
+    Creates an R integer vector with a bulk copy of the given array. The values
+    must fit in 32 bits. Positions set in na_mask become NA.
+    """
+    vector = base.integer(len(values))
+    buffer = _r_vector_buffer(vector)
+    buffer[:] = values
+
+    if na_mask is not None and na_mask.any():
+        buffer[na_mask] = R_NA_INTEGER
+
+    return vector
+
+
+def r_logical_vector_from_array(values: np.ndarray, na_mask: Union[None, np.ndarray] = None) -> RVector:
+    """
+    Creates an R logical vector from a boolean array. R stores logicals as 32 bit
+    integers, so this is a bulk copy as well.
+    """
+    vector = base.logical(len(values))
+    buffer = _r_vector_buffer(vector)
+    buffer[:] = values.astype(np.int32)
+
+    if na_mask is not None and na_mask.any():
+        buffer[na_mask] = R_NA_INTEGER
+
+    return vector
+
+
+def r_factor_vector_from_codes(codes: np.ndarray, levels: List[str], ordered: bool = False) -> RFactorVector:
+    """
+    Creates an R factor from zero-based integer codes and their levels. Codes
+    equal to -1 become NA, following the pandas convention.
+
+    The factor is built by setting the 'levels' and 'class' attributes on an
+    integer vector, so R's factor() is never called. The vector is wrapped as a
+    FactorVector, as rpy2 would return it from R.
+    """
+    codes = np.asarray(codes)
+    vector = r_integer_vector_from_array(codes.astype(np.int32) + 1, na_mask=codes < 0)
+    vector.do_slot_assign('levels', RStrVector([str(level) for level in levels]))
+
+    if ordered:
+        vector.do_slot_assign('class', RStrVector(['ordered', 'factor']))
+    else:
+        vector.do_slot_assign('class', RStrVector(['factor']))
+
+    return RFactorVector(vector)
+
+
+def r_posixct_vector_from_series(series: pd.Series) -> RFloatVector:
+    """
+    Creates an R POSIXct vector, which is the count of seconds since the epoch
+    with a 'tzone' attribute. Naive datetimes are taken as UTC.
+    """
+    timezone = 'UTC'
+
+    if getattr(series.dt, 'tz', None) is not None:
+        timezone = str(series.dt.tz)
+        series = series.dt.tz_convert('UTC')
+
+    nanoseconds = series.values.astype('datetime64[ns]').view(np.int64)
+    na_mask = series.isnull().values
+    vector = r_numeric_vector_from_array(nanoseconds / 1e9, na_mask=na_mask)
+    vector.do_slot_assign('class', RStrVector(['POSIXct', 'POSIXt']))
+    vector.do_slot_assign('tzone', RStrVector([timezone]))
+    return vector
+
+
+def pd_factorize_for_r(series: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """
+    Factor-encodes an object column as zero-based codes plus sorted string levels,
+    with -1 marking missing values.
+
+    Levels are sorted by R, in the collation of the session locale like factor()
+    does, only the distinct values are sent to it.
+    """
+    labels = series.where(series.isnull(), series.astype(str))
+    codes, uniques = pd.factorize(labels)
+    levels = [str(level) for level in uniques]
+
+    if len(levels) < 2:
+        return codes, levels
+
+    order = np.asarray(base.order(RStrVector(levels)), dtype=np.intp) - 1
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    return np.where(codes < 0, -1, ranks[codes]), [levels[i] for i in order]
+
+
+def r_vector_from_pandas_series(series: pd.Series) -> RVector:
+    """
+    Converts a pandas column into an R vector with bulk buffer copies.
+
+    Mapping:
+        int*, uint*         -> integer (numeric when outside the 32 bit range)
+        float*              -> numeric, NaN becomes NA
+        bool                -> logical
+        object              -> factor, None/NaN become NA
+        category            -> factor (ordered factor if the categorical is ordered)
+        datetime64          -> POSIXct
+    """
+    dtype = series.dtype
+
+    if str(dtype) == 'category':
+        return r_factor_vector_from_codes(series.cat.codes.values,
+                                          list(series.cat.categories),
+                                          ordered=series.cat.ordered)
+    elif dtype.kind in ('i', 'u'):
+        values = series.values
+        int32 = np.iinfo(np.int32)
+
+        if len(values) == 0 or (values.min() > int32.min and values.max() <= int32.max):
+            return r_integer_vector_from_array(values)
+        else:
+            return r_numeric_vector_from_array(values.astype(np.float64))
+    elif dtype.kind == 'f':
+        values = series.values
+        return r_numeric_vector_from_array(values, na_mask=np.isnan(values))
+    elif dtype.kind == 'b':
+        return r_logical_vector_from_array(series.values)
+    elif dtype.kind == 'M':
+        return r_posixct_vector_from_series(series)
+    elif dtype.kind == 'O':
+        codes, levels = pd_factorize_for_r(series)
+        return r_factor_vector_from_codes(codes, levels)
+    elif dtype.kind == 'm':
+        raise NotImplementedError('Timedelta values are not currently implemented')
+    else:
+        msg = ' '.join(['Given column_type is not recognized', str(dtype)])
+        raise TypeError(msg)
+
+
 def r_convert_pandas_dataframe(df: pd.DataFrame) -> RDataFrame:
     """
     Pandas dataframe to R dataframe conversion.
 
+    Every column is copied into a preallocated R vector in bulk through its NumPy
+    buffer, see r_vector_from_pandas_series for the dtype mapping. Missing values
+    are converted to R's NA.
+
     See:
         http://chris.friedline.net/2015-12-15-rutgers/lessons/python2/03-data-types-and-format.html
-
-    TODO/FIXME: Error when a dataframe column has NA elements.
     """
-    pd_names = [str(header) for header in list(df)]
-    pd_types = [str(dtype) for dtype in df.dtypes]
     elements = {}
 
-    for column_name, column_type in zip(pd_names, pd_types):
-        if column_type == 'int64':
-            elements[column_name] = RIntVector(df[column_name])
-        elif column_type == 'float64':
-            elements[column_name] = RFloatVector(df[column_name])
-        elif column_type == 'object':
-            elements[column_name] = RFactorVector(df[column_name])
-        elif column_type == 'datetime64' or column_type == 'timedelta[ns]':
-            raise NotImplementedError('Date values are not currently implemented')
-        else:
-            msg = ' '.join(['Given column_type is not recognized', column_type])
-            raise TypeError(msg)
+    for column_name in list(df):
+        elements[str(column_name)] = r_vector_from_pandas_series(df[column_name])
 
     return RDataFrame(elements)
 
@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Union
+
+from .functions import r_read_rds, RListVector
+from .caret_wrappers import caret_model_save_artifact, caret_model_load_artifact
+from ...util import local_file_storage_fullpath, new_uuid
+from ..files.artifact import artifact_read_header, artifact_compression_name
+
+MODEL_UUID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+class ModelStore:
+    """
+    Persistent storage of trained models keyed by model_uuid, the identifier that
+    prediction payloads carry (see schemas.predict.generic_prediction_schema).
+
+    Models are written to 'directory' as artifact files (see files.artifact),
+    optionally compressed. Their headers can be read with header() without loading
+    the model. The 'max_models' most recently used models are kept deserialized in
+    memory, so predicting with a hot model costs no unserialize call at all.
+
+    'compress' is an artifact compression: 'none', 'zlib', 'bz2' or 'lzma', or one
+    of the saveRDS values False, True, 'gzip', 'bzip2' or 'xz'.
+
+    Plain RDS files written by previous versions are still read.
+
+    R is not thread-safe, so disk reads and writes happen under the store lock.
+    """
+
+    def __init__(self, directory: Union[None, str] = None, max_models: int = 16,
+                 compress: Union[bool, str] = False):
+        if max_models < 1:
+            raise ValueError('max_models must be at least 1')
+
+        self.directory = directory or local_file_storage_fullpath('models')
+        self.max_models = max_models
+        self.compress = artifact_compression_name(compress)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._models = OrderedDict()
+        self._listeners = []
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, model_uuid: str) -> str:
+        """
+        Retrieves the file path that holds the given model.
+        """
+        if not MODEL_UUID_PATTERN.match(model_uuid):
+            raise ValueError(' '.join(['Invalid model_uuid', model_uuid]))
+
+        return os.path.join(self.directory, ''.join([model_uuid, '.model']))
+
+    def legacy_path(self, model_uuid: str) -> str:
+        return ''.join([self.path(model_uuid)[:-len('.model')], '.rds'])
+
+    def save(self, model: RListVector, model_uuid: Union[None, str] = None) -> str:
+        """
+        Writes the model to disk and keeps it in memory. Returns its model_uuid,
+        which is newly created unless one is given. Saving under an existing
+        model_uuid replaces that model.
+        """
+        model_uuid = model_uuid or new_uuid()
+        path = self.path(model_uuid)
+
+        with self._lock:
+            replaced = model_uuid in self
+            caret_model_save_artifact(model, path, self.compress)
+            self._remember(model_uuid, model)
+
+        if replaced:
+            self._notify(model_uuid)
+
+        return model_uuid
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """
+        Registers a function that is called with the model_uuid of every model that
+        is replaced or deleted, i.e. to invalidate cached predictions.
+        """
+        self._listeners.append(listener)
+
+    def get(self, model_uuid: str) -> RListVector:
+        """
+        Returns the model with the given model_uuid, reading it from disk on a
+        cache miss. Raises KeyError if the model does not exist.
+        """
+        with self._lock:
+            if model_uuid in self._models:
+                self._models.move_to_end(model_uuid)
+                self.hits += 1
+                return self._models[model_uuid]
+
+            path = self.path(model_uuid)
+
+            if os.path.isfile(path):
+                model = caret_model_load_artifact(path)
+            elif os.path.isfile(self.legacy_path(model_uuid)):
+                model = r_read_rds(self.legacy_path(model_uuid))
+            else:
+                raise KeyError(model_uuid)
+
+            self.misses += 1
+            self._remember(model_uuid, model)
+            return model
+
+    def header(self, model_uuid: str) -> Dict:
+        """
+        Reads the artifact header of a stored model (engine, method, predictors,
+        column info, factor levels and training metadata) without loading it.
+        Raises KeyError if there is no artifact for the model.
+        """
+        path = self.path(model_uuid)
+
+        if not os.path.isfile(path):
+            raise KeyError(model_uuid)
+
+        return artifact_read_header(path)
+
+    def delete(self, model_uuid: str):
+        """
+        Removes the model from memory and disk.
+        """
+        with self._lock:
+            self._models.pop(model_uuid, None)
+
+            for path in [self.path(model_uuid), self.legacy_path(model_uuid)]:
+                if os.path.isfile(path):
+                    os.remove(path)
+
+        self._notify(model_uuid)
+
+    def __contains__(self, model_uuid: str) -> bool:
+        return (model_uuid in self._models or os.path.isfile(self.path(model_uuid)) or
+                os.path.isfile(self.legacy_path(model_uuid)))
+
+    def stats(self) -> Dict:
+        """
+        Cache counters as a JSONable dict.
+        """
+        with self._lock:
+            return {
+                'cached': len(self._models),
+                'max_models': self.max_models,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _notify(self, model_uuid: str):
+        for listener in list(self._listeners):
+            listener(model_uuid)
+
+    def _remember(self, model_uuid: str, model: RListVector):
+        self._models[model_uuid] = model
+        self._models.move_to_end(model_uuid)
+
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,69 @@
+from typing import Dict, Union
+
+import numpy as np
+
+from .functions import r, RListVector
+from ..native.preprocess import NativePreprocess, PREPROCESS_METHODS
+
+_R_PREPROCESS_PARTS = '''
+function(pp) {
+    numbers <- function(x) if (is.null(x)) numeric(0) else as.numeric(x)
+    strings <- function(x) if (is.null(x)) character(0) else as.character(x)
+    list(
+        # newer caret lists the columns of each transform, older releases only the transform names
+        method = if (is.list(pp$method)) strings(names(pp$method)) else strings(pp$method),
+        mean = numbers(pp$mean), mean_columns = strings(names(pp$mean)),
+        std = numbers(pp$std), std_columns = strings(names(pp$std)),
+        ranges = numbers(pp$ranges), ranges_columns = strings(colnames(pp$ranges)),
+        range_bounds = if (is.null(pp$rangeBounds)) c(0, 1) else as.numeric(pp$rangeBounds),
+        lambda = numbers(vapply(pp$yj, function(t) as.numeric(t$lambda)[1], numeric(1))),
+        lambda_columns = strings(names(pp$yj)),
+        rotation = numbers(t(pp$rotation)), rotation_columns = strings(rownames(pp$rotation)),
+        components = strings(colnames(pp$rotation)))
+}
+'''
+
+
+def _r_preprocess_parts(pp: RListVector) -> Dict:
+    parts = r(_R_PREPROCESS_PARTS)(pp)
+    return dict(zip(list(parts.names), [list(part) for part in parts]))
+
+
+def r_preprocess_export(pp: RListVector) -> NativePreprocess:
+    """
+    Exports a fitted caret preProcess object. Only the transforms in
+    PREPROCESS_METHODS can be exported.
+    """
+    parts = _r_preprocess_parts(pp)
+    method = [name for name in parts['method'] if name != 'ignore']
+    unknown = [name for name in method if name not in PREPROCESS_METHODS]
+
+    if unknown:
+        raise NotImplementedError(' '.join(['Preprocessing methods can not be exported:'] + unknown))
+
+    # ranges is a 2 row matrix, minimums first, stored column by column
+    ranges = np.asarray(parts['ranges'], dtype=np.float64).reshape(-1, 2)
+    parameters = {
+        'YeoJohnson': {'columns': parts['lambda_columns'], 'lambda': parts['lambda']},
+        'center': {'columns': parts['mean_columns'], 'mean': parts['mean']},
+        'scale': {'columns': parts['std_columns'], 'std': parts['std']},
+        'range': {'columns': parts['ranges_columns'], 'min': ranges[:, 0], 'max': ranges[:, 1],
+                  'bounds': parts['range_bounds']},
+        'pca': {'columns': parts['rotation_columns'], 'components': parts['components'],
+                'rotation': parts['rotation']}
+    }
+
+    return NativePreprocess(method, parameters, {'r_class': 'preProcess'})
+
+
+def caret_model_preprocess_export(model: RListVector) -> Union[None, NativePreprocess]:
+    """
+    Exports the preprocessing a caret train object was fitted with, or None when
+    it has none.
+    """
+    pp = r('function(model) if (is.null(model$preProcess)) list() else model$preProcess')(model)
+
+    if len(pp) == 0:
+        return None
+
+    return r_preprocess_export(pp)
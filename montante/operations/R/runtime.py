@@ -0,0 +1,164 @@
+"""
+Lazy access to the embedded R runtime.
+
+Importing rpy2.robjects starts R, and every importr call attaches an R package,
+which for caret alone takes seconds. The proxies in this module defer both to
+the first time an R object, package or class is actually used, so importing
+the train or predict packages costs nothing until a model is trained or run.
+
+Long running processes can pay the whole cost upfront with warm_up().
+
+See:
+    https://rpy2.github.io/doc/v2.9.x/html/robjects_rpackages.html#importing-r-packages
+"""
+
+import sys
+import threading
+import importlib
+from typing import Any, List, Union
+
+_lock = threading.RLock()
+
+"""
+Every LazyRPackage and LazySTAP created, in creation order, for warm_up().
+"""
+_lazy_resources = []
+
+
+def r_start():
+    """
+    Starts R by importing rpy2.robjects, if it isn't running yet.
+    """
+    if 'rpy2.robjects' not in sys.modules:
+        with _lock:
+            importlib.import_module('rpy2.robjects')
+
+
+def r_started() -> bool:
+    return 'rpy2.robjects' in sys.modules
+
+
+class LazyRObject:
+    """
+    Proxy for a module of rpy2, or an object of it, that is imported on first use.
+    Calls, attribute and item access go to the proxied object, and the proxy can
+    be used with isinstance() when it stands for a class.
+    """
+
+    def __init__(self, module: str, name: Union[None, str] = None):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def resolve(self) -> Any:
+        if self._target is None:
+            r_start()
+            target = importlib.import_module(self._module)
+
+            if self._name is not None:
+                target = getattr(target, self._name)
+
+            self._target = target
+
+        return self._target
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # typing probes annotations for private attributes (i.e. _subs_tree on
+        # Python 3.6), which must not start R
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return getattr(self.resolve(), name)
+
+    def __getitem__(self, item: Any) -> Any:
+        return self.resolve()[item]
+
+    def __instancecheck__(self, instance: Any) -> bool:
+        # nothing can be an R object before R is started
+        return r_started() and isinstance(instance, self.resolve())
+
+    def __subclasscheck__(self, subclass: type) -> bool:
+        return r_started() and issubclass(subclass, self.resolve())
+
+    def __repr__(self) -> str:
+        return ''.join(['<lazy ', '.'.join(filter(None, [self._module, self._name])), '>'])
+
+
+class LazyRPackage:
+    """
+    Proxy for an R package, attached with importr on first attribute access.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._package = None
+        _lazy_resources.append(self)
+
+    def load(self) -> Any:
+        if self._package is None:
+            with _lock:
+                if self._package is None:
+                    r_start()
+                    from rpy2.robjects.packages import importr
+                    self._package = importr(self._name)
+
+        return self._package
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        return ''.join(['<lazy R package ', self._name, '>'])
+
+
+class LazySTAP:
+    """
+    Proxy for an R source file wrapped as a package with STAP, which is read and
+    evaluated on first attribute access.
+    """
+
+    def __init__(self, path: str, name: str):
+        self._path = path
+        self._name = name
+        self._package = None
+        _lazy_resources.append(self)
+
+    def load(self) -> Any:
+        if self._package is None:
+            with _lock:
+                if self._package is None:
+                    r_start()
+                    from rpy2.robjects.packages import STAP
+
+                    with open(self._path, 'r') as f:
+                        self._package = STAP(f.read(), self._name)
+
+        return self._package
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        return ''.join(['<lazy R source ', self._name, '>'])
+
+
+def warm_up(packages: Union[None, List[str]] = None):
+    """
+    Starts R and loads every lazily declared R package and source file, or only
+    the packages named in 'packages'. Meant for servers and workers that would
+    rather pay the startup cost before their first request.
+    """
+    r_start()
+
+    for resource in list(_lazy_resources):
+        if packages is None or resource._name in packages:
+            resource.load()
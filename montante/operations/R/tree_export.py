@@ -0,0 +1,173 @@
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .functions import r, r_predict, r_convert_pandas_dataframe, RListVector
+from .caret_wrappers import caret_model_predictor_info
+from .preprocess_export import caret_model_preprocess_export
+from ..native.tree import NativeTree, native_tree_from_c50, native_tree_from_rpart
+
+"""
+caret methods whose final model is a C5.0 or rpart tree.
+"""
+CARET_TREE_METHODS = {
+    'C5.0': 'C5.0',
+    'C5.0Tree': 'C5.0',
+    'rpart': 'rpart',
+    'rpart1SE': 'rpart',
+    'rpart2': 'rpart'
+}
+
+
+def _r_c50_parts(model: RListVector) -> Dict:
+    parts = r('''function(fit) list(
+        tree = fit$tree, names = fit$names, levels = fit$levels,
+        trials = as.integer(fit$trials["Actual"]), rules = isTRUE(fit$rbm),
+        costs = !is.null(fit$costMatrix))''')(model)
+    return dict(zip(list(parts.names), [list(part) for part in parts]))
+
+
+def _r_rpart_parts(model: RListVector) -> Dict:
+    parts = r('''function(fit) {
+        frame <- fit$frame
+        k <- length(attr(fit, "ylevels"))
+        splits <- fit$splits
+        list(
+            method = fit$method,
+            node = as.integer(rownames(frame)), var = as.character(frame$var),
+            n = frame$n, wt = frame$wt, yval = frame$yval,
+            yprob = as.vector(t(frame$yval2[, (k + 2):(2 * k + 1), drop = FALSE])),
+            ncompete = frame$ncompete, nsurrogate = frame$nsurrogate,
+            split_var = if (is.null(splits)) character(0) else rownames(splits),
+            ncat = if (is.null(splits)) numeric(0) else splits[, "ncat"],
+            index = if (is.null(splits)) numeric(0) else splits[, "index"],
+            csplit = if (is.null(fit$csplit)) integer(0) else as.vector(t(fit$csplit)),
+            csplit_ncol = if (is.null(fit$csplit)) 0L else ncol(fit$csplit),
+            ylevels = attr(fit, "ylevels"))
+    }''')(model)
+    parts = dict(zip(list(parts.names), [list(part) for part in parts]))
+    xlevels = r('function(fit) attr(fit, "xlevels")')(model)
+
+    if len(xlevels) > 0:
+        parts['xlevels'] = dict((name, list(levels)) for name, levels in zip(list(xlevels.names), list(xlevels)))
+    else:
+        parts['xlevels'] = {}
+
+    return parts
+
+
+def r_c50_tree_export(model: RListVector, dummies: Union[None, Dict[str, Tuple[str, str]]] = None) -> NativeTree:
+    """
+    Exports a C5.0 decision tree model. Rule based, boosted and cost sensitive
+    models raise NotImplementedError.
+    """
+    parts = _r_c50_parts(model)
+
+    if parts['rules'][0]:
+        raise NotImplementedError('C5.0 rule based models can not be exported')
+
+    if parts['trials'][0] != 1:
+        raise NotImplementedError('Boosted C5.0 models can not be exported')
+
+    if parts['costs'][0]:
+        raise NotImplementedError('Cost sensitive C5.0 models can not be exported')
+
+    return native_tree_from_c50(parts['tree'][0], parts['names'][0], parts['levels'], dummies)
+
+
+def r_rpart_tree_export(model: RListVector, dummies: Union[None, Dict[str, Tuple[str, str]]] = None) -> NativeTree:
+    """
+    Exports an rpart classification tree.
+    """
+    parts = _r_rpart_parts(model)
+
+    if parts['method'][0] != 'class':
+        raise NotImplementedError('Only rpart classification trees can be exported')
+
+    k = len(parts['ylevels'])
+    frame = {
+        'node': parts['node'],
+        'var': parts['var'],
+        'n': parts['n'],
+        'wt': parts['wt'],
+        'yval': parts['yval'],
+        'yprob': np.asarray(parts['yprob']).reshape(-1, k).tolist(),
+        'ncompete': parts['ncompete'],
+        'nsurrogate': parts['nsurrogate']
+    }
+    splits = {'var': parts['split_var'], 'ncat': parts['ncat'], 'index': parts['index']}
+    csplit = None
+
+    if parts['csplit_ncol'][0] > 0:
+        csplit = np.asarray(parts['csplit'], dtype=np.int32).reshape(-1, parts['csplit_ncol'][0])
+
+    return native_tree_from_rpart(frame, splits, csplit, parts['ylevels'], parts['xlevels'], dummies)
+
+
+def caret_model_tree_export(model: RListVector) -> NativeTree:
+    """
+    Exports the final model of a caret train object trained with one of the
+    CARET_TREE_METHODS. Factor predictors become the dummy columns model.matrix
+    builds for them, named after the predictor and the level. Preprocessing the
+    model was trained with is exported along, see NativePreprocess.
+    """
+    method = model.rx2('method')[0]
+
+    if method not in CARET_TREE_METHODS:
+        raise NotImplementedError(' '.join(['caret method can not be exported:', method]))
+
+    _, factor_levels = caret_model_predictor_info(model)
+    dummies = {}
+
+    for name, levels in factor_levels.items():
+        for level in levels[1:]:
+            dummies[''.join([name, level])] = (name, level)
+
+    final_model = model.rx2('finalModel')
+
+    if CARET_TREE_METHODS[method] == 'C5.0':
+        tree = r_c50_tree_export(final_model, dummies)
+    else:
+        tree = r_rpart_tree_export(final_model, dummies)
+
+    tree.source['caret_method'] = method
+    tree.preprocess = caret_model_preprocess_export(model)
+    return tree
+
+
+def r_tree_export(model: RListVector) -> NativeTree:
+    """
+    Exports a caret train object, a C5.0 model or an rpart model to a NativeTree.
+    """
+    classes = list(model.rclass)
+
+    if 'train' in classes:
+        return caret_model_tree_export(model)
+    elif 'C5.0' in classes:
+        return r_c50_tree_export(model)
+    elif 'rpart' in classes:
+        return r_rpart_tree_export(model)
+
+    raise NotImplementedError(' '.join(['Model class can not be exported:'] + classes))
+
+
+def native_tree_parity(model: RListVector, tree: NativeTree, df: pd.DataFrame) -> Dict:
+    """
+    Compares the classes predicted by R and by the exported tree for the rows of
+    df, and returns the number of rows, the rows that differ, and the fraction
+    of rows that agree.
+
+    Rows with missing values should be left out for caret models, whose predict
+    method drops them.
+    """
+    prediction = r_predict(model, r_convert_pandas_dataframe(df), type='raw' if 'train' in model.rclass else 'class')
+    expected = np.asarray(list(prediction.levels))[np.asarray(prediction) - 1]
+    native = np.asarray(tree.predict(df).astype(object))
+    mismatches = np.flatnonzero(expected != native).tolist()
+
+    return {
+        'rows': len(df),
+        'mismatches': mismatches,
+        'parity': 1.0 - len(mismatches) / max(len(df), 1)
+    }
@@ -0,0 +1,252 @@
+"""
+Hyperparameter search for caret models that evaluates one tuning candidate at a
+time, so candidates can run in parallel on the processes of an RWorkerPool and
+their resampling results can be cached on disk.
+
+Candidates are the rows of the payload 'tune-grid', or the ones caret generates
+for 'tune-length' with the training control 'search' ("grid" or "random"). Every
+candidate is resampled with the R generator seeded to the training control
+'seed', so all of them are scored on the same resamples and their results stay
+comparable across runs. Results are cached under the dataset fingerprint, the
+method, the training control, the metric and the candidate, so a rerun of an
+overlapping grid only evaluates the new candidates.
+
+Evaluating candidates separately gives up caret's submodel trick, where models
+like C5.0 score several values of a parameter (i.e. trials) from one fit. The
+training data is still converted to R only once: in this process without a
+pool, and once per worker with one, where it is staged under its fingerprint
+for every candidate of the search (see caret_tuning_stage).
+
+See:
+    https://topepo.github.io/caret/model-training-and-tuning.html#alternate-tuning-grids
+    https://topepo.github.io/caret/random-hyperparameter-search.html
+"""
+
+import json
+import time
+import hashlib
+from concurrent.futures import wait
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from .functions import (r, r_convert_pandas_dataframe, r_formula, r_caret_train, r_dataframe_to_pandas,
+                        r_set_seed, caret, RDataFrame)
+from .caret_wrappers import caret_model_kwargs_from_payload
+from .workers import RWorkerPool
+from ..dataframe.functions import pd_dataframe_fingerprint
+from ..files.json_cache import JSONFileCache
+from ...util import use_validator, local_tmp_fullpath
+from ...schemas.registry import training_schema_validator
+
+"""
+Metrics for which lower is better, every other one is maximized.
+"""
+CARET_MINIMIZED_METRICS = ['RMSE']
+
+"""
+Training data staged in this process by caret_tuning_stage: the R dataframe and
+the number of searches using it, by dataset fingerprint.
+"""
+_STAGED_DATASETS = {}
+
+_R_CARET_TUNING_GRID = '''
+function(data, target, predictors, method, len, search) {
+    info <- caret::getModelInfo(method, regex = FALSE)[[1]]
+    unique(info$grid(x = data[, predictors, drop = FALSE], y = data[[target]], len = len, search = search))
+}
+'''
+
+
+class TuningCache(JSONFileCache):
+    """
+    Resampling results of tuning candidates, keyed by caret_tuning_key.
+    """
+
+    def __init__(self, directory: Union[None, str] = None):
+        super().__init__(directory or local_tmp_fullpath('montante-tuning'))
+
+
+def _tuning_value(value: Any) -> Any:
+    # R hands numeric parameters back as floats, 10.0 and 10 are the same candidate
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    return value
+
+
+def caret_tuning_key(fingerprint: str, payload: Dict, candidate: Dict) -> str:
+    """
+    Cache key of a candidate's resampling results: a digest of the dataset
+    fingerprint (see pd_dataframe_fingerprint), the target and predictors, the
+    method, metric and preprocessing, the training control without its R cluster
+    settings, which don't change the results, and the candidate itself.
+    """
+    parameters = payload['engine-parameters']
+    control = dict((name, value) for name, value in parameters['training-control'].items() if name != 'parallel')
+    key = json.dumps({
+        'dataset': fingerprint,
+        'target': payload['target'],
+        'predictors': payload['predictors'],
+        'method': parameters['method'],
+        'metric': parameters.get('metric'),
+        'preprocess': parameters.get('preprocess', []),
+        'training-control': control,
+        'candidate': dict((name, _tuning_value(value)) for name, value in candidate.items())
+    }, sort_keys=True)
+
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def caret_tuning_candidates(df: pd.DataFrame, payload: Dict) -> List[Dict]:
+    """
+    The candidates of the search, as dicts of method parameters. 'tune-length'
+    candidates come from the grid function of the caret model, seeded with the
+    training control 'seed' for random search.
+    """
+    parameters = payload['engine-parameters']
+
+    if 'tune-grid' in parameters:
+        return [dict(candidate) for candidate in parameters['tune-grid']]
+
+    control = parameters['training-control']
+    predictors = payload['predictors']
+    caret.load()
+    r_set_seed(control.get('seed', 0))
+    grid = r(_R_CARET_TUNING_GRID)(r_convert_pandas_dataframe(df), payload['target'], predictors,
+                                   parameters['method'], parameters.get('tune-length', 3),
+                                   control.get('search', 'grid'))
+
+    return r_dataframe_to_pandas(grid).to_dict('records')
+
+
+def caret_tuning_stage(fingerprint: str, df: pd.DataFrame):
+    """
+    Converts the training data of a search to R once, for every candidate that
+    references it by fingerprint (see caret_tuning_staged). Each stage must be
+    matched by a caret_tuning_release once the search is done.
+    """
+    staged = _STAGED_DATASETS.get(fingerprint)
+
+    if staged is None:
+        _STAGED_DATASETS[fingerprint] = [r_convert_pandas_dataframe(df), 1]
+    else:
+        staged[1] += 1
+
+
+def caret_tuning_staged(fingerprint: str) -> RDataFrame:
+    if fingerprint not in _STAGED_DATASETS:
+        raise KeyError(' '.join(['No training data staged for', fingerprint]))
+
+    return _STAGED_DATASETS[fingerprint][0]
+
+
+def caret_tuning_release(fingerprint: str):
+    """
+    Drops the staged training data once no search uses it anymore.
+    """
+    staged = _STAGED_DATASETS.get(fingerprint)
+
+    if staged is not None:
+        staged[1] -= 1
+
+        if staged[1] <= 0:
+            del _STAGED_DATASETS[fingerprint]
+
+
+def caret_tune_candidate(data: Union[pd.DataFrame, RDataFrame], payload: Dict, candidate: Dict) -> Dict:
+    """
+    Resamples a single candidate and returns its row of the caret results table
+    (the metrics and their standard deviations, i.e. Accuracy and AccuracySD)
+    plus the 'seconds' it took. The training data can be given already converted
+    to R, so that the candidates of a search share one conversion.
+    """
+    start = time.perf_counter()
+    rdf = r_convert_pandas_dataframe(data) if isinstance(data, pd.DataFrame) else data
+    formula = r_formula(rdf, payload['target'], payload['predictors'])
+    model_kwargs = caret_model_kwargs_from_payload(rdf, payload)
+    model_kwargs.pop('tuneLength', None)
+    model_kwargs['tuneGrid'] = r_convert_pandas_dataframe(pd.DataFrame([candidate], columns=sorted(candidate)))
+
+    r_set_seed(payload['engine-parameters']['training-control'].get('seed', 0))
+    results = r_dataframe_to_pandas(r_caret_train(formula, **model_kwargs).rx2('results'))
+    row = results.iloc[0]
+
+    # NumPy scalars are not JSON serializable, see TuningCache
+    result = dict((name, value.item() if isinstance(value, np.generic) else value)
+                  for name, value in row.items() if name not in candidate)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def caret_grid_search(df: pd.DataFrame, payload: Dict, pool: Union[None, RWorkerPool] = None,
+                      cache: Union[None, TuningCache] = None) -> Union[pd.DataFrame, List]:
+    """
+    Runs the hyperparameter search described by a caret training payload.
+
+    Candidates missing from the cache are evaluated on the workers of 'pool' in
+    parallel, or one after the other in this process without a pool, and their
+    results are added to the cache. The data is sent to each worker once, not
+    with every candidate.
+
+    Returns the results table, one row per candidate, best first: the candidate
+    parameters, the metrics and their standard deviations, the 'seconds' the
+    evaluation took and whether the row was 'cached'. On error returns the error
+    list produced by the validator.
+    """
+    parameters = payload['engine-parameters']
+    errors = use_validator(training_schema_validator('caret', parameters['method']), payload)
+
+    if len(errors) > 0:
+        return errors
+
+    df = df[[payload['target']] + [name for name in payload['predictors'] if name != payload['target']]]
+
+    # an explicit 'tune-grid' needs no R, only caret generated candidates go to a worker
+    if pool is None or 'tune-grid' in parameters:
+        candidates = caret_tuning_candidates(df, payload)
+    else:
+        candidates = pool.submit('tune_candidates', df, payload).result()
+
+    fingerprint = pd_dataframe_fingerprint(df)
+    keys = [caret_tuning_key(fingerprint, payload, candidate) for candidate in candidates]
+    results = [None if cache is None else cache.get(key) for key in keys]
+    cached = [result is not None for result in results]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    if pool is None and missing:
+        rdf = r_convert_pandas_dataframe(df)
+
+        for i in missing:
+            results[i] = caret_tune_candidate(rdf, payload, candidates[i])
+    elif missing:
+        staged = pool.broadcast('tune_stage', fingerprint, df)
+
+        try:
+            for future in staged:
+                future.result()
+
+            futures = [(i, pool.submit('tune', fingerprint, payload, candidates[i])) for i in missing]
+
+            for i, future in futures:
+                results[i] = future.result()
+        finally:
+            # queued after the candidates, workers run their tasks in order
+            wait(pool.broadcast('tune_release', fingerprint))
+
+    if cache is not None:
+        for i in missing:
+            cache.put(keys[i], results[i])
+
+    table = pd.DataFrame([dict(candidate, cached=hit, **result)
+                          for candidate, result, hit in zip(candidates, results, cached)])
+    names = sorted(set().union(*candidates))
+    metrics = [name for name in list(table) if name not in names and name not in ('seconds', 'cached')]
+    table = table[names + metrics + ['seconds', 'cached']]
+    metric = parameters.get('metric')
+
+    if metric in table:
+        table = table.sort_values(metric, ascending=metric in CARET_MINIMIZED_METRICS, kind='mergesort')
+
+    return table.reset_index(drop=True)
@@ -0,0 +1,348 @@
+"""
+Pool of worker processes, each running its own embedded R.
+
+R is single threaded and not thread-safe, so in one process a long training call
+blocks every prediction. Spreading the work over processes lets them run at the
+same time. Workers share a ModelStore directory: a model trained on one worker can
+be loaded by any other, but requests are routed to the workers that already hold
+the model in memory.
+
+See:
+    https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+"""
+
+import os
+import time
+import queue
+import pickle
+import threading
+import itertools
+import multiprocessing
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple, Union
+
+
+def _worker_train(store, source, payload) -> Union[str, List]:
+    from ..train import training_operation
+
+    model_or_errors = training_operation(source, payload)
+
+    if isinstance(model_or_errors, list):
+        return model_or_errors
+
+    return store.save(model_or_errors)
+
+
+def _worker_predict(store, model_uuid: str, payload: Dict) -> List[Tuple[int, str]]:
+    from ..predict import prediction_operation
+
+    return prediction_operation(store.get(model_uuid), payload)
+
+
+def _worker_load(store, model_uuid: str) -> bool:
+    store.get(model_uuid)
+    return True
+
+
+def _worker_tune_candidates(store, df, payload: Dict) -> List[Dict]:
+    from .tuning import caret_tuning_candidates
+
+    return caret_tuning_candidates(df, payload)
+
+
+def _worker_tune_stage(store, fingerprint: str, df) -> bool:
+    from .tuning import caret_tuning_stage
+
+    caret_tuning_stage(fingerprint, df)
+    return True
+
+
+def _worker_tune(store, fingerprint: str, payload: Dict, candidate: Dict) -> Dict:
+    from .tuning import caret_tune_candidate, caret_tuning_staged
+
+    return caret_tune_candidate(caret_tuning_staged(fingerprint), payload, candidate)
+
+
+def _worker_tune_release(store, fingerprint: str) -> bool:
+    from .tuning import caret_tuning_release
+
+    caret_tuning_release(fingerprint)
+    return True
+
+
+"""
+Tasks a worker can run. Every task receives the worker's ModelStore followed by
+the submitted arguments.
+"""
+WORKER_TASKS = {
+    'train': _worker_train,
+    'predict': _worker_predict,
+    'load': _worker_load,
+    'tune_candidates': _worker_tune_candidates,
+    'tune_stage': _worker_tune_stage,
+    'tune': _worker_tune,
+    'tune_release': _worker_tune_release
+}
+
+
+def _picklable_exception(e: Exception) -> Exception:
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(' '.join([type(e).__name__, str(e)]))
+
+
+def _worker_main(worker_id: int, tasks: multiprocessing.Queue, results: multiprocessing.Queue,
+                 store_directory: Union[None, str], max_models: int):
+    """
+    Worker process loop. R is started and every R package is attached (see
+    runtime.warm_up) before the worker reports itself ready.
+    """
+    from . import functions
+    from .runtime import warm_up
+    from .model_store import ModelStore
+
+    warm_up()
+    store = ModelStore(store_directory, max_models=max_models)
+    results.put((None, worker_id, True, 'ready', 0.0))
+
+    while True:
+        item = tasks.get()
+
+        if item is None:
+            return
+
+        task_id, name, args = item
+        start = time.perf_counter()
+
+        try:
+            result = WORKER_TASKS[name](store, *args)
+            ok = True
+        except Exception as e:
+            result = _picklable_exception(e)
+            ok = False
+
+        results.put((task_id, worker_id, ok, result, time.perf_counter() - start))
+
+
+class _WorkerState:
+
+    def __init__(self, worker_id: int, process: multiprocessing.Process, tasks: multiprocessing.Queue):
+        self.worker_id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.pending = set()
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self.started = time.perf_counter()
+
+
+class RWorkerPool:
+    """
+    Dispatches training and prediction work to 'workers' processes.
+
+    train() and predict() return Futures. Training resolves to the model_uuid of
+    the stored model (or to the validation error list), prediction to the list of
+    (index, label) pairs. Arguments are pickled, so datasources must be picklable.
+
+    Workers are started with the 'spawn' method: forking a process that already
+    runs an embedded R is not safe.
+    """
+
+    def __init__(self, workers: Union[None, int] = None, store_directory: Union[None, str] = None,
+                 max_models: int = 16, start_timeout: float = 120):
+        context = multiprocessing.get_context('spawn')
+        self._results = context.Queue()
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._model_workers = {}
+        self._task_ids = itertools.count()
+        self._closed = False
+        self._workers = []
+
+        for worker_id in range(workers or os.cpu_count() or 1):
+            tasks = context.Queue()
+            process = context.Process(target=_worker_main, name='montante-r-worker-%d' % worker_id,
+                                      args=(worker_id, tasks, self._results, store_directory, max_models),
+                                      daemon=True)
+            process.start()
+            self._workers.append(_WorkerState(worker_id, process, tasks))
+
+        try:
+            for _ in self._workers:
+                self._results.get(timeout=start_timeout)
+        except queue.Empty:
+            for worker in self._workers:
+                worker.process.terminate()
+                worker.process.join()
+
+            raise
+
+        self._collector = threading.Thread(target=self._collect, name='montante-r-pool-collector', daemon=True)
+        self._collector.start()
+
+    def submit(self, name: str, *args, model_uuid: Union[None, str] = None) -> Future:
+        """
+        Queues a task from WORKER_TASKS. When a model_uuid is given, the task goes to
+        the least busy worker that already holds that model, if any.
+        """
+        future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('RWorkerPool is closed')
+
+            worker = self._route(model_uuid)
+            task_id = next(self._task_ids)
+            self._futures[task_id] = (future, name, model_uuid)
+            worker.pending.add(task_id)
+
+        worker.tasks.put((task_id, name, args))
+        return future
+
+    def broadcast(self, name: str, *args) -> List[Future]:
+        """
+        Queues a task from WORKER_TASKS on every live worker, i.e. to stage data
+        once per worker for the tasks submitted after it. A worker runs its tasks
+        in the order they were queued.
+        """
+        queued = []
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('RWorkerPool is closed')
+
+            workers = [worker for worker in self._workers if worker.process.is_alive()]
+
+            if not workers:
+                raise RuntimeError('No live R workers')
+
+            for worker in workers:
+                task_id = next(self._task_ids)
+                future = Future()
+                self._futures[task_id] = (future, name, None)
+                worker.pending.add(task_id)
+                queued.append((worker, task_id, future))
+
+        for worker, task_id, future in queued:
+            worker.tasks.put((task_id, name, args))
+
+        return [future for _, _, future in queued]
+
+    def train(self, source: Any, payload: Dict) -> Future:
+        return self.submit('train', source, payload)
+
+    def predict(self, model_uuid: str, payload: Dict) -> Future:
+        return self.submit('predict', model_uuid, payload, model_uuid=model_uuid)
+
+    def preload(self, model_uuid: str) -> Future:
+        """
+        Loads a stored model into a worker's memory ahead of its first prediction.
+        """
+        return self.submit('load', model_uuid, model_uuid=model_uuid)
+
+    def metrics(self) -> Dict:
+        """
+        Queue depth and utilization (busy time over lifetime) of every worker.
+        """
+        now = time.perf_counter()
+
+        with self._lock:
+            workers = [{
+                'worker': worker.worker_id,
+                'alive': worker.process.is_alive(),
+                'queue_depth': len(worker.pending),
+                'completed': worker.completed,
+                'busy_seconds': worker.busy_seconds,
+                'utilization': worker.busy_seconds / max(now - worker.started, 1e-9),
+                'models': sorted(uuid for uuid, ids in self._model_workers.items() if worker.worker_id in ids)
+            } for worker in self._workers]
+
+        return {
+            'queue_depth': sum(worker['queue_depth'] for worker in workers),
+            'workers': workers
+        }
+
+    def close(self, timeout: Union[None, float] = None):
+        """
+        Stops the workers once their queued tasks are done.
+        """
+        with self._lock:
+            self._closed = True
+
+        for worker in self._workers:
+            worker.tasks.put(None)
+
+        for worker in self._workers:
+            worker.process.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _route(self, model_uuid: Union[None, str]) -> _WorkerState:
+        candidates = [worker for worker in self._workers if worker.process.is_alive()]
+
+        if not candidates:
+            raise RuntimeError('No live R workers')
+
+        holders = self._model_workers.get(model_uuid, set())
+        warm = [worker for worker in candidates if worker.worker_id in holders]
+
+        return min(warm or candidates, key=lambda worker: len(worker.pending))
+
+    def _collect(self):
+        while True:
+            # on every iteration, the results of busy workers may keep the queue from timing out
+            self._fail_dead_workers()
+
+            try:
+                task_id, worker_id, ok, result, seconds = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if self._closed and not self._futures:
+                    return
+
+                continue
+
+            with self._lock:
+                worker = self._workers[worker_id]
+                worker.pending.discard(task_id)
+                worker.completed += 1
+                worker.busy_seconds += seconds
+
+                # failed already, the worker died right after sending this result
+                if task_id not in self._futures:
+                    continue
+
+                future, name, model_uuid = self._futures.pop(task_id)
+
+                # a worker holds a model once a task with it succeeded there
+                if name == 'train' and ok and isinstance(result, str):
+                    self._model_workers.setdefault(result, set()).add(worker_id)
+                elif model_uuid is not None and ok:
+                    self._model_workers.setdefault(model_uuid, set()).add(worker_id)
+
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def _fail_dead_workers(self):
+        failed = []
+
+        with self._lock:
+            for worker in self._workers:
+                if worker.pending and not worker.process.is_alive():
+                    for task_id in worker.pending:
+                        failed.append(self._futures.pop(task_id)[0])
+
+                    worker.pending.clear()
+
+                    for ids in self._model_workers.values():
+                        ids.discard(worker.worker_id)
+
+        for future in failed:
+            future.set_exception(RuntimeError('R worker process died'))
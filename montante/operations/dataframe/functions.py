@@ -1,6 +1,30 @@
-from typing import Iterator, List, Tuple, Dict
+import hashlib
+import operator
+from typing import Any, Iterator, List, Tuple, Dict, Sequence, Union
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+"""
+Row filter operators, see pd_filter_mask. Filters are [column, operator, value]
+triples, and a list of them matches the rows that pass all of them.
+"""
+PD_FILTER_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda series, values: series.isin(values),
+    'not in': lambda series, values: ~series.isin(values)
+}
+
+"""
+Filter operators whose value is a list of values, the others take a single one.
+"""
+PD_FILTER_MEMBERSHIP_OPERATORS = ['in', 'not in']
 
 
 def pd_sanitize_column_names_for_r(df: pd.DataFrame):
@@ -13,6 +37,25 @@ def pd_sanitize_column_names_for_r(df: pd.DataFrame):
     df.rename(columns=lambda n: n.replace('(', ''), inplace=True)
 
 
+def pd_dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    SHA-256 hex digest of the column names, dtypes and values of the dataframe,
+    the index left out. Equal dataframes have equal fingerprints.
+
+    See:
+        https://pandas.pydata.org/pandas-docs/stable/generated/pandas.util.hash_pandas_object.html
+    """
+    digest = hashlib.sha256()
+
+    for name, dtype in zip(list(df), df.dtypes):
+        digest.update(repr((str(name), str(dtype))).encode('utf-8'))
+
+    if len(df.columns) > 0:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+
+    return digest.hexdigest()
+
+
 def pd_column_types(df: pd.DataFrame) -> List[str]:
     """
     Returns a list of the dataframe's column dtypes as strings.
@@ -61,3 +104,128 @@ def pd_column_info_dict(df: pd.DataFrame) -> Dict[str, str]:
         d[pair[0]] = pair[1]
 
     return d
+
+
+def pd_filter_columns(filters: Union[None, Sequence[Sequence[Any]]]) -> List[str]:
+    """
+    Returns the names of the columns the filters read, in order of appearance.
+    """
+    names = []
+
+    for column, _, _ in filters or []:
+        if column not in names:
+            names.append(column)
+
+    return names
+
+
+def pd_check_filter(op: str, value: Any):
+    """
+    Raises ValueError for a filter every datasource wouldn't read the same way:
+    an unknown operator, a membership operator without a list of values (a
+    string would be read as its characters by SQL sources), or a None value
+    (SQL sources would compare it with IS NULL, while missing values never pass
+    a filter).
+    """
+    if op not in PD_FILTER_OPERATORS:
+        raise ValueError(' '.join(['Unrecognized filter operator', str(op)]))
+
+    if op in PD_FILTER_MEMBERSHIP_OPERATORS and not isinstance(value, (list, tuple, set, frozenset)):
+        raise ValueError(' '.join(['Filter operator', op, 'takes a list of values']))
+
+    if any(item is None for item in (value if op in PD_FILTER_MEMBERSHIP_OPERATORS else [value])):
+        raise ValueError('Filter values can not be None')
+
+
+def pd_filter_mask(df: pd.DataFrame, filters: Sequence[Sequence[Any]]) -> np.ndarray:
+    """
+    Returns the boolean mask of the rows that pass every filter. As in SQL, rows
+    with a missing value in a filtered column never pass that filter.
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    for column, op, value in filters:
+        pd_check_filter(op, value)
+        series = df[column]
+        mask &= np.asarray(PD_FILTER_OPERATORS[op](series, value), dtype=bool) & np.asarray(series.notnull())
+
+    return mask
+
+
+def pd_select(df: pd.DataFrame, columns: Union[None, Sequence[str]] = None,
+              filters: Union[None, Sequence[Sequence[Any]]] = None, limit: Union[None, int] = None) -> pd.DataFrame:
+    """
+    Keeps the rows of the dataframe that pass the filters, up to 'limit' of them,
+    and the given columns, in that order.
+    """
+    if filters:
+        df = df[pd_filter_mask(df, filters)]
+
+    if limit is not None:
+        df = df.iloc[:limit]
+
+    if columns is not None:
+        df = df[list(columns)]
+
+    return df
+
+
+def pd_concat_batches(batches: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Joins batches read from the same source column by column, into a dataframe
+    with a fresh index. Categorical columns are joined with the union of the
+    categories found in each batch.
+    """
+    if len(batches) == 1:
+        return batches[0].reset_index(drop=True)
+
+    columns = {}
+
+    for name in list(batches[0]):
+        if str(batches[0][name].dtype) == 'category':
+            columns[name] = pd.Series(union_categoricals([batch[name] for batch in batches], sort_categories=True))
+        else:
+            columns[name] = pd.Series(np.concatenate([batch[name].values for batch in batches]))
+
+    return pd.DataFrame(columns, columns=list(batches[0]))
+
+
+def pd_iter_select_batches(batches: Iterator[pd.DataFrame], columns: Union[None, Sequence[str]] = None,
+                           filters: Union[None, Sequence[Sequence[Any]]] = None,
+                           limit: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lazy pd_select over a source read in batches, yielding one selected batch
+    per batch read. Batches stop being read once 'limit' rows pass the filters.
+    """
+    rows = 0
+
+    for batch in batches:
+        batch = pd_select(batch, columns, filters, None if limit is None else limit - rows)
+        rows += len(batch)
+        yield batch
+
+        if limit is not None and rows >= limit:
+            return
+
+
+def pd_select_batches(batches: Iterator[pd.DataFrame], columns: Union[None, Sequence[str]] = None,
+                      filters: Union[None, Sequence[Sequence[Any]]] = None,
+                      limit: Union[None, int] = None) -> Union[None, pd.DataFrame]:
+    """
+    pd_select over a source read in batches, see pd_iter_select_batches. Returns
+    None if there were no batches at all.
+    """
+    selected = []
+    first = None
+
+    for batch in pd_iter_select_batches(batches, columns, filters, limit):
+        if first is None:
+            first = batch
+
+        if len(batch) > 0:
+            selected.append(batch)
+
+    if not selected:
+        return None if first is None else first.iloc[:0]
+
+    return pd_concat_batches(selected)
@@ -0,0 +1,157 @@
+"""
+Row sampling of training data, so that exploratory models can be fitted on a
+representative sample of a large dataset instead of sending all of it to R.
+
+Every sampler takes a seed and either a sample size or a fraction of the rows,
+returns the sampled rows in their original order, and gives the same sample for
+the same seed and input.
+
+See:
+    https://en.wikipedia.org/wiki/Stratified_sampling#Proportionate_allocation
+    https://en.wikipedia.org/wiki/Reservoir_sampling#Simple_algorithm
+"""
+
+from typing import Dict, Iterator, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .functions import pd_concat_batches
+
+SAMPLING_METHODS = ['uniform', 'stratified', 'reservoir']
+
+
+def sample_size(rows: int, size: Union[None, int] = None, fraction: Union[None, float] = None) -> int:
+    """
+    Number of rows to sample out of 'rows', given either a size or a fraction.
+    """
+    if (size is None) == (fraction is None):
+        raise ValueError('Exactly one of size or fraction must be given')
+
+    if size is not None:
+        return min(size, rows)
+
+    return min(int(round(rows * fraction)), rows)
+
+
+def pd_sample_uniform(df: pd.DataFrame, size: Union[None, int] = None, fraction: Union[None, float] = None,
+                      seed: int = 0) -> pd.DataFrame:
+    """
+    Simple random sample of the rows, without replacement.
+    """
+    rng = np.random.RandomState(seed)
+    rows = rng.choice(len(df), sample_size(len(df), size, fraction), replace=False)
+    return df.iloc[np.sort(rows)]
+
+
+def stratified_allocation(counts: np.ndarray, n: int) -> np.ndarray:
+    """
+    Splits n sampled rows among strata proportionally to their row counts, by
+    the largest remainder method, so the allocations add up to exactly n.
+    """
+    exact = counts * (n / counts.sum())
+    allocation = np.floor(exact).astype(np.int64)
+    largest_remainders = np.argsort(allocation - exact, kind='mergesort')
+    allocation[largest_remainders[:n - allocation.sum()]] += 1
+    return allocation
+
+
+def pd_sample_stratified(df: pd.DataFrame, target: str, size: Union[None, int] = None,
+                         fraction: Union[None, float] = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Random sample that keeps the proportion of every class of the 'target'
+    column. Rows with a missing target are a stratum of their own.
+    """
+    rng = np.random.RandomState(seed)
+    n = sample_size(len(df), size, fraction)
+
+    if n == 0:
+        return df.iloc[:0]
+
+    codes, _ = pd.factorize(df[target])
+    _, strata, counts = np.unique(codes, return_inverse=True, return_counts=True)
+    allocation = stratified_allocation(counts, n)
+    # row positions grouped by stratum, each group starting at its offset
+    grouped = np.argsort(strata, kind='mergesort')
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rows = [grouped[offset + rng.choice(count, k, replace=False)]
+            for offset, count, k in zip(offsets, counts, allocation)]
+
+    return df.iloc[np.sort(np.concatenate(rows))]
+
+
+def reservoir_sample_batches(batches: Iterator[pd.DataFrame], size: int,
+                             seed: int = 0) -> Tuple[Union[None, pd.DataFrame], int]:
+    """
+    Uniform sample of 'size' rows out of a stream of dataframes of unknown total
+    length, like DatasourceWrapper.select_batches, holding about 'size' rows at
+    a time. Returns the sample, None if there were no batches at all, and the
+    number of rows in the stream.
+
+    Algorithm R, vectorized over each batch: the i-th row of the stream (from 0)
+    replaces the row in a random slot j <= i of the reservoir when j < size.
+    """
+    rng = np.random.RandomState(seed)
+    kept = []
+    kept_rows = 0
+    # position of the row in each reservoir slot, among the rows of 'kept'
+    slots = np.zeros(size, dtype=np.int64)
+    seen = 0
+    first = None
+
+    for batch in batches:
+        if first is None:
+            first = batch
+
+        positions = np.arange(seen, seen + len(batch))
+        targets = np.where(positions < size, positions,
+                           np.floor(rng.random_sample(len(batch)) * (positions + 1)).astype(np.int64))
+        accepted = np.flatnonzero(targets < size)
+        seen += len(batch)
+
+        if len(accepted) == 0:
+            continue
+
+        # when rows of the batch share a slot, the last one wins, as if taken one by one
+        _, last = np.unique(targets[accepted][::-1], return_index=True)
+        accepted = np.sort(accepted[::-1][last])
+        kept.append(batch.iloc[accepted])
+        slots[targets[accepted]] = kept_rows + np.arange(len(accepted))
+        kept_rows += len(accepted)
+
+        # drop the rows that were replaced
+        if kept_rows > 2 * size:
+            order = np.sort(slots)
+            kept = [pd_concat_batches(kept).iloc[order]]
+            slots[np.argsort(slots)] = np.arange(size)
+            kept_rows = size
+
+    if first is None:
+        return None, 0
+
+    if not kept:
+        return first.iloc[:0], seen
+
+    return pd_concat_batches(kept).iloc[np.sort(slots[:min(seen, size)])].reset_index(drop=True), seen
+
+
+def pd_sample(df: pd.DataFrame, sampling: Dict, target: Union[None, str] = None) -> pd.DataFrame:
+    """
+    Samples the dataframe as described by the 'sampling' section of a training
+    payload: a 'method' of SAMPLING_METHODS, a 'seed', and a 'size' or a
+    'fraction'. Stratified sampling is done over the 'target' column.
+    """
+    method = sampling['method']
+    seed = sampling.get('seed', 0)
+
+    if method == 'uniform':
+        return pd_sample_uniform(df, sampling.get('size'), sampling.get('fraction'), seed)
+    elif method == 'stratified':
+        return pd_sample_stratified(df, target, sampling.get('size'), sampling.get('fraction'), seed)
+    elif method == 'reservoir':
+        if 'size' not in sampling:
+            raise ValueError('Reservoir sampling needs a size')
+
+        return reservoir_sample_batches(iter([df]), sampling['size'], seed)[0]
+
+    raise ValueError(' '.join(['Unrecognized sampling method', method]))
@@ -0,0 +1,435 @@
+"""
+Column statistics computed with pandas and NumPy, one batch at a time, so that
+summaries of a datasource never need all of it in memory, nor in R.
+
+Every accumulator can be merged with another one of the same kind, so batches
+can be summarized separately (i.e. on different processes, the accumulators
+pickle) and combined afterwards:
+
+    numeric         count, missing values, min, max, and the mean and variance
+                    merged with Chan's parallel update. Quantiles come from a
+                    KLL-like sketch.
+    categorical     count, missing values, and the most frequent values from a
+                    Misra-Gries summary.
+
+See:
+    https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Parallel_algorithm
+    https://arxiv.org/abs/1603.05346
+    https://www.cs.utexas.edu/users/misra/scannedPdf.dir/FindRepeatedElements.pdf
+"""
+
+import json
+import hashlib
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ...DatasourceWrapper import DatasourceWrapper, DATASOURCE_BATCH_SIZE
+from ...util import local_tmp_fullpath
+from ..files.json_cache import JSONFileCache
+
+"""
+Quantiles reported by default, those of R summary().
+"""
+STATISTICS_QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+"""
+Sketch and summary sizes. The rank error of the quantile sketch shrinks as
+1 / STATISTICS_SKETCH_SIZE, and top value counts are off by at most
+rows / (STATISTICS_TOP_SIZE + 1).
+"""
+STATISTICS_SKETCH_SIZE = 200
+STATISTICS_TOP_SIZE = 64
+
+
+def _native(value: Any) -> Any:
+    # NumPy scalars, timestamps and timedeltas are not JSON serializable
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class QuantileSketch:
+    """
+    Quantile sketch in the style of KLL: values are kept in levels of compactors,
+    a value in level h standing for 2^h values of the input. When a level holds
+    more than its capacity, it is sorted and every other value, starting at a
+    random offset, moves up a level. Capacities shrink by 2/3 from the top level
+    down, to no less than 2.
+
+    Quantiles are values of the input, no interpolation is done. Until the first
+    compaction they are exact.
+    """
+
+    def __init__(self, k: int = STATISTICS_SKETCH_SIZE, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.RandomState(seed)
+
+    def capacity(self, level: int) -> int:
+        return max(2, int(np.ceil(self.k * (2 / 3.0) ** (len(self.levels) - 1 - level))))
+
+    def update(self, values: np.ndarray):
+        """
+        Adds the values, which must not be missing.
+        """
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+
+        for h, values in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], values])
+
+        self._compress()
+        return self
+
+    def count(self) -> int:
+        return int(sum(len(values) << h for h, values in enumerate(self.levels)))
+
+    def quantiles(self, qs: List[float]) -> List[Union[None, float]]:
+        if self.count() == 0:
+            return [None] * len(qs)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='mergesort')
+        values = values[order]
+        ranks = np.cumsum(weights[order])
+        # the first value whose rank reaches q of the total, i.e. q = 0 is the minimum
+        positions = np.searchsorted(ranks, np.maximum(np.asarray(qs) * ranks[-1], 1), side='left')
+        return [float(values[min(position, len(values) - 1)]) for position in positions]
+
+    def _compress(self):
+        h = 0
+
+        while h < len(self.levels):
+            if len(self.levels[h]) <= self.capacity(h):
+                h += 1
+                continue
+
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            values = np.sort(self.levels[h])
+            # an odd value out stays, so the total weight is kept exactly
+            kept = values[:len(values) % 2]
+            values = values[len(values) % 2:]
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], values[self._rng.randint(2)::2]])
+            self.levels[h] = kept
+            h = 0
+
+
+class FrequentItems:
+    """
+    Misra-Gries summary of the most frequent values, with at most 'k' counters.
+    Counts are lower bounds, short of the true count by at most 'error'.
+
+    Batches are counted exactly and merged into the summary: counters of both
+    are added, and when more than k are left the (k + 1)-th largest count is
+    subtracted from every counter, dropping the ones that reach zero.
+    """
+
+    def __init__(self, k: int = STATISTICS_TOP_SIZE):
+        self.k = k
+        self.counts = {}
+        self.error = 0
+
+    def update(self, values: pd.Series):
+        """
+        Counts the values, which must not be missing.
+        """
+        counts = values.value_counts()
+        # categoricals count their unused categories too
+        counts = counts[counts > 0]
+        error = 0
+
+        # reduce the batch to k counters before it reaches Python dicts
+        if len(counts) > self.k:
+            error = int(counts.iloc[self.k])
+            counts = counts[counts > error] - error
+
+        self._merge(dict(zip(counts.index.tolist(), counts.values.tolist())), error)
+
+    def merge(self, other: 'FrequentItems') -> 'FrequentItems':
+        self._merge(other.counts, other.error)
+        return self
+
+    def top(self, n: Union[None, int] = None) -> List[Tuple[Any, int]]:
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+    def _merge(self, counts: Dict[Any, int], error: int):
+        merged = dict(self.counts)
+
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+
+        self.error += error
+
+        if len(merged) > self.k:
+            threshold = sorted(merged.values(), reverse=True)[self.k]
+            merged = dict((value, count - threshold) for value, count in merged.items() if count > threshold)
+            self.error += threshold
+
+        self.counts = merged
+
+
+class NumericStatistics:
+    """
+    Statistics of a numeric, datetime or timedelta column. Datetimes are
+    summarized as nanoseconds since the epoch and timedeltas as nanoseconds, both
+    are reported as ISO 8601 strings.
+    """
+
+    kind = 'numeric'
+
+    def __init__(self, dtype: str, sketch_size: int = STATISTICS_SKETCH_SIZE, seed: int = 0):
+        self.dtype = dtype
+        self.datetime = dtype.startswith('datetime64')
+        self.timedelta = dtype.startswith('timedelta64')
+        self.count = 0
+        self.na_count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = QuantileSketch(sketch_size, seed)
+
+    def update(self, series: pd.Series):
+        if self.datetime:
+            values = pd.to_datetime(series, errors='coerce').values.astype('datetime64[ns]').astype(np.int64)
+            values = values[values != np.iinfo(np.int64).min].astype(np.float64)
+        elif self.timedelta:
+            values = pd.to_timedelta(series, errors='coerce').values.astype('timedelta64[ns]').astype(np.int64)
+            values = values[values != np.iinfo(np.int64).min].astype(np.float64)
+        else:
+            values = pd.to_numeric(series, errors='coerce').values.astype(np.float64)
+            values = values[~np.isnan(values)]
+
+        self.na_count += len(series) - len(values)
+
+        if len(values) == 0:
+            return
+
+        mean = values.mean()
+        self._combine(len(values), values.min(), values.max(), mean, ((values - mean) ** 2).sum())
+        self.sketch.update(values)
+
+    def merge(self, other: 'NumericStatistics') -> 'NumericStatistics':
+        self.na_count += other.na_count
+
+        if other.count > 0:
+            self._combine(other.count, other.min, other.max, other.mean, other.m2)
+            self.sketch.merge(other.sketch)
+
+        return self
+
+    def _combine(self, count: int, minimum: float, maximum: float, mean: float, m2: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def _value(self, value: Union[None, float]) -> Union[None, float, str]:
+        if value is None:
+            return None
+
+        if self.datetime:
+            return pd.Timestamp(int(round(value))).isoformat()
+
+        if self.timedelta:
+            return pd.Timedelta(int(round(value))).isoformat()
+
+        return float(value)
+
+    def to_dict(self, quantiles: List[float] = STATISTICS_QUANTILES) -> Dict:
+        empty = self.count == 0
+        variance = self.m2 / (self.count - 1) if self.count > 1 else None
+        # the sketch may have compacted the extremes away, they are known exactly
+        estimates = [None if value is None else min(max(value, self.min), self.max)
+                     for value in self.sketch.quantiles(quantiles)]
+        estimates = [self.min if q == 0 and not empty else self.max if q == 1 and not empty else value
+                     for q, value in zip(quantiles, estimates)]
+        d = {
+            'type': 'datetime' if self.datetime else 'timedelta' if self.timedelta else 'numeric',
+            'dtype': self.dtype,
+            'count': self.count,
+            'na_count': self.na_count,
+            'min': None if empty else self._value(self.min),
+            'max': None if empty else self._value(self.max),
+            'mean': None if empty else self._value(self.mean),
+            'quantiles': dict((str(q), self._value(value)) for q, value in zip(quantiles, estimates))
+        }
+
+        if not self.datetime and not self.timedelta:
+            d['variance'] = variance
+            d['std'] = None if variance is None else float(np.sqrt(variance))
+
+        return d
+
+
+class CategoricalStatistics:
+    """
+    Statistics of any column that is not numeric: strings, categories, booleans.
+    """
+
+    kind = 'categorical'
+
+    def __init__(self, dtype: str, top_size: int = STATISTICS_TOP_SIZE):
+        self.dtype = dtype
+        self.count = 0
+        self.na_count = 0
+        self.top = FrequentItems(top_size)
+
+    def update(self, series: pd.Series):
+        values = series.dropna()
+        self.count += len(values)
+        self.na_count += len(series) - len(values)
+
+        if len(values) > 0:
+            self.top.update(values)
+
+    def merge(self, other: 'CategoricalStatistics') -> 'CategoricalStatistics':
+        self.count += other.count
+        self.na_count += other.na_count
+        self.top.merge(other.top)
+        return self
+
+    def to_dict(self, top: Union[None, int] = None) -> Dict:
+        return {
+            'type': 'categorical',
+            'dtype': self.dtype,
+            'count': self.count,
+            'na_count': self.na_count,
+            'top': [{'value': _native(value), 'count': count} for value, count in self.top.top(top)],
+            'top_error': self.top.error
+        }
+
+
+def column_statistics(series: pd.Series, sketch_size: int = STATISTICS_SKETCH_SIZE,
+                      top_size: int = STATISTICS_TOP_SIZE) -> Union[NumericStatistics, CategoricalStatistics]:
+    """
+    Creates the accumulator for a column, by the kind of its dtype.
+    """
+    dtype = str(series.dtype)
+
+    if series.dtype.kind in ('i', 'u', 'f', 'M', 'm'):
+        return NumericStatistics(dtype, sketch_size)
+
+    return CategoricalStatistics(dtype, top_size)
+
+
+class DataFrameStatistics:
+    """
+    Statistics of every column of a dataframe read in batches. Accumulators are
+    created by column_statistics from the dtypes of the first batch a column is
+    seen in.
+    """
+
+    def __init__(self, sketch_size: int = STATISTICS_SKETCH_SIZE, top_size: int = STATISTICS_TOP_SIZE):
+        self.sketch_size = sketch_size
+        self.top_size = top_size
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, df: pd.DataFrame) -> 'DataFrameStatistics':
+        self.rows += len(df)
+
+        for name in list(df):
+            if name not in self.columns:
+                self.columns[name] = column_statistics(df[name], self.sketch_size, self.top_size)
+
+            self.columns[name].update(df[name])
+
+        return self
+
+    def merge(self, other: 'DataFrameStatistics') -> 'DataFrameStatistics':
+        """
+        Adds the statistics of other batches of the same source to these.
+        """
+        self.rows += other.rows
+
+        for name, statistics in other.columns.items():
+            if name not in self.columns:
+                self.columns[name] = statistics
+            elif self.columns[name].kind != statistics.kind:
+                raise ValueError(' '.join(['Column statistics of different kinds for', str(name)]))
+            else:
+                self.columns[name].merge(statistics)
+
+        return self
+
+    def to_dict(self, quantiles: List[float] = STATISTICS_QUANTILES, top: Union[None, int] = None) -> Dict:
+        """
+        The statistics as a JSON serializable dict: the number of 'rows', and the
+        statistics of each of the 'columns'.
+        """
+        return {
+            'rows': self.rows,
+            'columns': dict((str(name), statistics.to_dict(quantiles) if statistics.kind == 'numeric'
+                             else statistics.to_dict(top)) for name, statistics in self.columns.items())
+        }
+
+
+def pd_batches_statistics(batches: Iterator[pd.DataFrame], sketch_size: int = STATISTICS_SKETCH_SIZE,
+                          top_size: int = STATISTICS_TOP_SIZE) -> DataFrameStatistics:
+    statistics = DataFrameStatistics(sketch_size, top_size)
+
+    for batch in batches:
+        statistics.update(batch)
+
+    return statistics
+
+
+class StatisticsCache(JSONFileCache):
+    """
+    Statistics of datasources, keyed by statistics_cache_key.
+    """
+
+    def __init__(self, directory: Union[None, str] = None):
+        super().__init__(directory or local_tmp_fullpath('montante-statistics'))
+
+
+def statistics_cache_key(source_key: str, quantiles: List[float], top: Union[None, int],
+                         sketch_size: int, top_size: int) -> str:
+    key = json.dumps([source_key, quantiles, top, sketch_size, top_size])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def datasource_statistics(source: DatasourceWrapper, cache: Union[None, StatisticsCache] = None,
+                          key: Union[None, str] = None, quantiles: List[float] = STATISTICS_QUANTILES,
+                          top: Union[None, int] = None, sketch_size: int = STATISTICS_SKETCH_SIZE,
+                          top_size: int = STATISTICS_TOP_SIZE, batch_size: Union[None, int] = None) -> Dict:
+    """
+    Statistics of every column of the datasource, read through to_batches() in
+    batches of 'batch_size' rows (DATASOURCE_BATCH_SIZE by default), as returned
+    by DataFrameStatistics.to_dict.
+
+    Results are cached under the datasource's cache_key(), or the given 'key',
+    so a datasource whose contents didn't change is summarized once. Without
+    either of them nothing is cached.
+    """
+    source_key = key if key is not None else source.cache_key()
+    cache_key = None
+
+    if cache is not None and source_key is not None:
+        cache_key = statistics_cache_key(source_key, quantiles, top, sketch_size, top_size)
+        statistics = cache.get(cache_key)
+
+        if statistics is not None:
+            return statistics
+
+    batches = source.to_batches(batch_size or DATASOURCE_BATCH_SIZE)
+    statistics = pd_batches_statistics(batches, sketch_size, top_size).to_dict(quantiles, top)
+
+    if cache_key is not None:
+        cache.put(cache_key, statistics)
+
+    return statistics
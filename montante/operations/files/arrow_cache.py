@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import contextlib
+from typing import Any, Iterator, List, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from ...DatasourceWrapper import DatasourceWrapper
+from ...util import local_file_storage_fullpath, new_uuid
+from ..dataframe.functions import pd_filter_columns, pd_iter_select_batches, pd_select, pd_select_batches
+
+ARROW_CACHE_BATCH_SIZE = 100000
+DATASOURCE_UUID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+def _arrow_select_columns(data: Union[pa.Table, pa.RecordBatch],
+                          columns: Union[None, List[str]]) -> Union[pa.Table, pa.RecordBatch]:
+    """
+    Keeps only the given columns of a table or record batch, without copying them.
+    """
+    if columns is None:
+        return data
+
+    names = [field.name for field in data.schema]
+    missing = [name for name in columns if name not in names]
+
+    if missing:
+        raise KeyError(' '.join(['Columns not in cached dataset:'] + missing))
+
+    arrays = [data.column(names.index(name)) for name in columns]
+    return type(data).from_arrays(arrays, columns)
+
+
+def _arrow_head(table: pa.Table, limit: int) -> pa.Table:
+    """
+    The first 'limit' rows of a table, as zero-copy slices of its record batches
+    (older pyarrow versions have no Table.slice).
+    """
+    batches = []
+    remaining = limit
+
+    for batch in table.to_batches():
+        batches.append(batch.slice(0, min(remaining, batch.num_rows)))
+        remaining -= batches[-1].num_rows
+
+        if remaining <= 0:
+            break
+
+    return pa.Table.from_batches(batches) if batches else table
+
+
+class ArrowDatasetCache:
+    """
+    Datasets converted once to Arrow IPC files and memory-mapped on every read,
+    keyed by datasource UUID.
+
+    Reading a cached dataset does no parsing at all: the file is mapped and the
+    Arrow columns point into the mapping, so only the columns that are asked for
+    are ever paged in (see table). Categorical and datetime columns round-trip
+    with their pandas dtypes.
+
+    Files are written to a temporary name and renamed into place, so readers
+    never see a half written dataset.
+    """
+
+    def __init__(self, directory: Union[None, str] = None, batch_size: int = ARROW_CACHE_BATCH_SIZE):
+        self.directory = directory or local_file_storage_fullpath('datasets')
+        self.batch_size = batch_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, datasource_uuid: str) -> str:
+        """
+        Retrieves the file path that holds the given dataset.
+        """
+        if not DATASOURCE_UUID_PATTERN.match(datasource_uuid):
+            raise ValueError(' '.join(['Invalid datasource uuid', datasource_uuid]))
+
+        return os.path.join(self.directory, ''.join([datasource_uuid, '.arrow']))
+
+    def __contains__(self, datasource_uuid: str) -> bool:
+        return os.path.exists(self.path(datasource_uuid))
+
+    def put(self, datasource_uuid: str, source: Union[DatasourceWrapper, pd.DataFrame]) -> str:
+        """
+        Converts the source to an Arrow IPC file, replacing any previous version of
+        the dataset. Returns the file path.
+
+        The source is read whole with to_df(): record batches of a file share a
+        single dictionary per categorical column, so categories found in later
+        batches can't be added while streaming.
+        """
+        df = source if isinstance(source, pd.DataFrame) else source.to_df()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = self.path(datasource_uuid)
+        tmp_path = '.'.join([path, new_uuid(), 'tmp'])
+
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                writer = pa.ipc.RecordBatchFileWriter(sink, table.schema)
+
+                for batch in table.to_batches(self.batch_size):
+                    writer.write_batch(batch)
+
+                writer.close()
+
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return path
+
+    @contextlib.contextmanager
+    def table(self, datasource_uuid: str, columns: Union[None, List[str]] = None) -> Iterator[pa.Table]:
+        """
+        Memory-maps the cached dataset for the duration of a with block. The table
+        references the mapping directly, no column data is read until it is
+        accessed, so it must not be used once the block closes the mapping.
+        """
+        path = self.path(datasource_uuid)
+
+        if not os.path.exists(path):
+            raise KeyError(datasource_uuid)
+
+        source = pa.memory_map(path, 'r')
+
+        try:
+            yield _arrow_select_columns(pa.ipc.open_file(source).read_all(), columns)
+        finally:
+            source.close()
+
+    def get(self, datasource_uuid: str, columns: Union[None, List[str]] = None) -> pd.DataFrame:
+        with self.table(datasource_uuid, columns) as table:
+            return table.to_pandas()
+
+    def batches(self, datasource_uuid: str, columns: Union[None, List[str]] = None,
+                batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields the cached dataset as dataframes of at most batch_size rows. Batches
+        are slices of the mapped table, only the yielded dataframe is a copy. The
+        mapping is closed when the generator is exhausted or closed.
+        """
+        with self.table(datasource_uuid, columns) as table:
+            for batch in table.to_batches(batch_size or self.batch_size):
+                yield batch.to_pandas()
+
+    def delete(self, datasource_uuid: str):
+        if datasource_uuid in self:
+            os.remove(self.path(datasource_uuid))
+
+
+class ArrowCacheDatasourceWrapper(DatasourceWrapper):
+    """
+    Datasource read from an ArrowDatasetCache. If the dataset isn't cached yet it
+    is converted from 'source' on first use, so wrapping a CSV or SQL datasource
+    makes every later training run over it skip parsing and querying.
+
+    'columns' restricts reads to a subset of the cached columns, e.g. the target
+    and predictors of a training payload.
+    """
+
+    def __init__(self, cache: ArrowDatasetCache, datasource_uuid: str,
+                 source: Union[None, DatasourceWrapper] = None, columns: Union[None, List[str]] = None):
+        self.cache = cache
+        self.datasource_uuid = datasource_uuid
+        self.source = source
+        self.columns = columns
+
+    def ensure_cached(self):
+        if self.datasource_uuid not in self.cache:
+            if self.source is None:
+                raise KeyError(' '.join(['Dataset not cached and no source given:', self.datasource_uuid]))
+
+            self.cache.put(self.datasource_uuid, self.source)
+
+    def cache_key(self) -> Union[None, str]:
+        """
+        The cached file and its modification time, which changes when the dataset
+        is put again, and the read columns. None until the dataset is cached.
+        """
+        if self.datasource_uuid not in self.cache:
+            return None
+
+        path = self.cache.path(self.datasource_uuid)
+        return json.dumps([os.path.abspath(path), os.stat(path).st_mtime_ns, self.columns])
+
+    def to_df(self) -> pd.DataFrame:
+        self.ensure_cached()
+        return self.cache.get(self.datasource_uuid, self.columns)
+
+    def to_batches(self, batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        self.ensure_cached()
+        return self.cache.batches(self.datasource_uuid, self.columns, batch_size)
+
+    def select(self, columns: Union[None, Sequence[str]] = None, filters: Union[None, Sequence[Sequence[Any]]] = None,
+               limit: Union[None, int] = None) -> pd.DataFrame:
+        """
+        Maps only the selected and filtered columns of the cached dataset. Without
+        filters the limit is a zero-copy slice of the mapped table, with them the
+        table is filtered batch by batch until 'limit' rows pass.
+        """
+        self.ensure_cached()
+
+        if columns is None:
+            columns = self.columns
+
+        if not filters:
+            with self.cache.table(self.datasource_uuid, None if columns is None else list(columns)) as table:
+                return (table if limit is None else _arrow_head(table, limit)).to_pandas()
+
+        if columns is None:
+            needed = None
+        else:
+            needed = list(columns) + [name for name in pd_filter_columns(filters) if name not in columns]
+
+        df = pd_select_batches(self.cache.batches(self.datasource_uuid, needed), columns, filters, limit)
+
+        if df is None:
+            return pd_select(self.cache.get(self.datasource_uuid, needed), columns)
+
+        return df
+
+    def select_batches(self, columns: Union[None, Sequence[str]] = None,
+                       filters: Union[None, Sequence[Sequence[Any]]] = None, limit: Union[None, int] = None,
+                       batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        """
+        select() one record batch at a time, mapping only the selected and
+        filtered columns.
+        """
+        self.ensure_cached()
+
+        if columns is None:
+            columns = self.columns
+
+        if columns is None:
+            needed = None
+        else:
+            needed = list(columns) + [name for name in pd_filter_columns(filters) if name not in columns]
+
+        return pd_iter_select_batches(self.cache.batches(self.datasource_uuid, needed, batch_size),
+                                      columns, filters, limit)
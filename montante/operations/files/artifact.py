@@ -0,0 +1,157 @@
+"""
+Model artifact files:
+
+    magic (8 bytes) | version (uint16) | header length (uint32) | JSON header | body
+
+The header is a small JSON object describing the model (engine, method,
+predictors, column dtypes, factor levels, training metadata) and its body:
+'compression', 'body_length' (stored bytes) and 'body_sha256' (of the stored
+bytes). The body is the serialized model, compressed as a single stream.
+
+Headers can be read without deserializing, or even reading, the model body.
+"""
+
+import os
+import bz2
+import json
+import lzma
+import zlib
+import struct
+import hashlib
+from typing import Dict, Iterator, Tuple, Union
+
+ARTIFACT_MAGIC = b'MONTANTE'
+ARTIFACT_VERSION = 1
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+
+_ARTIFACT_PREAMBLE = struct.Struct('>8sHI')
+
+"""
+Compressors by name, and the saveRDS 'compress' values they stand for.
+"""
+_ARTIFACT_COMPRESSORS = {
+    'none': None,
+    'zlib': (lambda: zlib.compressobj(6), zlib.decompressobj),
+    'bz2': (bz2.BZ2Compressor, bz2.BZ2Decompressor),
+    'lzma': (lzma.LZMACompressor, lzma.LZMADecompressor)
+}
+
+ARTIFACT_COMPRESSION_ALIASES = {
+    False: 'none',
+    True: 'zlib',
+    'gzip': 'zlib',
+    'bzip2': 'bz2',
+    'xz': 'lzma'
+}
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def artifact_compression_name(compression: Union[bool, str]) -> str:
+    """
+    Resolves a compression name, accepting the values of saveRDS 'compress' too.
+    """
+    name = ARTIFACT_COMPRESSION_ALIASES.get(compression, compression)
+
+    if name not in _ARTIFACT_COMPRESSORS:
+        raise ValueError(' '.join(['Unrecognized artifact compression', str(compression)]))
+
+    return name
+
+
+def artifact_write(path: str, header: Dict, body: bytes, compression: Union[bool, str] = 'zlib') -> Dict:
+    """
+    Writes an artifact file atomically (to a temporary file, then renamed) and
+    returns the header as stored, with the body fields filled in.
+    """
+    compression = artifact_compression_name(compression)
+
+    if compression != 'none':
+        compressor = _ARTIFACT_COMPRESSORS[compression][0]()
+        body = b''.join([compressor.compress(body), compressor.flush()])
+
+    header = dict(header, compression=compression, body_length=len(body),
+                  body_sha256=hashlib.sha256(body).hexdigest())
+    encoded_header = json.dumps(header, sort_keys=True).encode('utf-8')
+    tmp_path = ''.join([path, '.tmp'])
+
+    with open(tmp_path, 'wb') as f:
+        f.write(_ARTIFACT_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(encoded_header)))
+        f.write(encoded_header)
+        f.write(body)
+
+    os.replace(tmp_path, path)
+    return header
+
+
+def _artifact_read_preamble(f) -> Dict:
+    preamble = f.read(_ARTIFACT_PREAMBLE.size)
+
+    if len(preamble) < _ARTIFACT_PREAMBLE.size:
+        raise ArtifactError('Truncated artifact preamble')
+
+    magic, version, header_length = _ARTIFACT_PREAMBLE.unpack(preamble)
+
+    if magic != ARTIFACT_MAGIC:
+        raise ArtifactError('Not a model artifact')
+
+    if version > ARTIFACT_VERSION:
+        raise ArtifactError(' '.join(['Unsupported artifact version', str(version)]))
+
+    header = json.loads(f.read(header_length).decode('utf-8'))
+    header['version'] = version
+    return header
+
+
+def artifact_read_header(path: str) -> Dict:
+    """
+    Reads only the header of an artifact, for routing and validation of
+    prediction requests without touching the model body.
+    """
+    with open(path, 'rb') as f:
+        return _artifact_read_preamble(f)
+
+
+def artifact_iter_body(path: str, chunk_size: int = ARTIFACT_CHUNK_SIZE,
+                       verify: bool = True) -> Iterator[Union[Dict, bytes]]:
+    """
+    Streams an artifact: yields the header first, then the decompressed body in
+    chunks, reading at most chunk_size stored bytes at a time. The checksum is
+    verified as the body is read, ArtifactError is raised at the end of a body
+    that doesn't match it.
+    """
+    with open(path, 'rb') as f:
+        header = _artifact_read_preamble(f)
+        yield header
+
+        compression = header['compression']
+        decompressor = None if compression == 'none' else _ARTIFACT_COMPRESSORS[compression][1]()
+        digest = hashlib.sha256()
+        remaining = header['body_length']
+
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+
+            if not chunk:
+                raise ArtifactError('Truncated artifact body')
+
+            remaining -= len(chunk)
+
+            if verify:
+                digest.update(chunk)
+
+            yield chunk if decompressor is None else decompressor.decompress(chunk)
+
+        if verify and digest.hexdigest() != header['body_sha256']:
+            raise ArtifactError('Artifact body checksum mismatch')
+
+
+def artifact_read(path: str, verify: bool = True) -> Tuple[Dict, bytes]:
+    """
+    Reads an artifact, returning its header and the decompressed body.
+    """
+    chunks = artifact_iter_body(path, verify=verify)
+    header = next(chunks)
+    return header, b''.join(chunks)
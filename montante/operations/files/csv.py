@@ -1,25 +1,45 @@
 import os
 import csv
-from typing import Union, List
+from typing import Union, List, Tuple, Type
 
+CSV_SNIFF_SIZE = 4096
+CSV_DELIMITERS = ',;\t|'
 
-def csv_headers_from_path(path: str) -> Union[None, List[str]]:
+
+def csv_sniff(path: str, sample_size: int = CSV_SNIFF_SIZE) -> Tuple[Type[csv.Dialect], bool]:
     """
-    Gets the list of CSV headers name from the file at the given path, or None if they
-    are not present.
+    Guesses the dialect of the CSV file at the given path, and whether its first
+    row is a header, from the first 'sample_size' characters. Only the delimiters in
+    CSV_DELIMITERS are considered, and the excel dialect (comma separated) is used
+    when none of them can be determined.
     """
     if not os.path.isfile(path):
         raise FileNotFoundError('CSV file not in media directory')
 
     with open(path, 'r') as file:
-        sniffer = csv.Sniffer()
-        # todo: check with different csv files
-        has_header = sniffer.has_header(str((file.read(4096))))
-        file.seek(0)
+        sample = file.read(sample_size)
 
-        if not has_header:
-            return None
+    sniffer = csv.Sniffer()
 
-        reader = csv.reader(file)
-        return next(reader)
+    try:
+        dialect = sniffer.sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        dialect = csv.excel
+
+    # todo: check with different csv files
+    return dialect, sniffer.has_header(sample)
+
+
+def csv_headers_from_path(path: str) -> Union[None, List[str]]:
+    """
+    Gets the list of CSV headers name from the file at the given path, or None if they
+    are not present.
+    """
+    dialect, has_header = csv_sniff(path)
+
+    if not has_header:
+        return None
 
+    with open(path, 'r') as file:
+        reader = csv.reader(file, dialect)
+        return next(reader)
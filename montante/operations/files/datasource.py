@@ -0,0 +1,218 @@
+import os
+import copy
+import json
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+import pandas as pd
+
+from ...DatasourceWrapper import DatasourceWrapper
+from ...util import date_parse_expressions
+from ..dataframe.functions import (pd_concat_batches, pd_filter_columns, pd_iter_select_batches, pd_select,
+                                  pd_select_batches)
+from .csv import csv_sniff, csv_headers_from_path
+
+CSV_CHUNK_SIZE = 100000
+CSV_SAMPLE_ROWS = 10000
+CSV_CATEGORY_MAX_LEVELS = 1000
+
+
+def _csv_parse_dates(column: pd.Series, name: str, date_format: str) -> pd.Series:
+    """
+    Parses a text column with the date format inferred from the sample. Values
+    further down the file that don't match the format raise instead of silently
+    becoming NaT.
+    """
+    dates = pd.to_datetime(column, format=date_format, errors='coerce')
+    unparsed = dates.isnull() & column.notnull()
+
+    if unparsed.any():
+        raise ValueError(' '.join(['Column', name, 'has values that do not match the inferred date format',
+                                   date_format, 'like', repr(column[unparsed].iloc[0]) + ',',
+                                   'pass its dtype to read it as text']))
+
+    return dates
+
+
+class CSVDatasourceWrapper(DatasourceWrapper):
+    """
+    Datasource for a CSV file, read in chunks with explicit dtypes.
+
+    The dialect and header come from csv_sniff and the column dtypes are inferred
+    once from the first 'sample_rows' rows (see infer_schema). Only the columns in
+    'usecols' are parsed, see from_training_payload.
+
+    Files without a header get R-like column names: V1, V2, ...
+    """
+
+    def __init__(self, path: str, usecols: Union[None, List[str]] = None, chunksize: int = CSV_CHUNK_SIZE,
+                 sample_rows: int = CSV_SAMPLE_ROWS, category_max_levels: int = CSV_CATEGORY_MAX_LEVELS,
+                 dtypes: Union[None, Dict[str, str]] = None):
+        self.path = path
+        self.usecols = usecols
+        self.chunksize = chunksize
+        self.sample_rows = sample_rows
+        self.category_max_levels = category_max_levels
+        self.dialect, has_header = csv_sniff(path)
+        self.names = csv_headers_from_path(path) if has_header else None
+        self._schema = dict(dtypes) if dtypes is not None else None
+
+        if self.names is None:
+            width = len(pd.read_csv(path, sep=self.dialect.delimiter, header=None, nrows=1).columns)
+            self.names = ['V%d' % (i + 1) for i in range(width)]
+            self._header = None
+        else:
+            self._header = 0
+
+        missing = [name for name in (usecols or []) if name not in self.names]
+
+        if missing:
+            raise ValueError(' '.join(['Columns not in CSV file:'] + missing))
+
+    @classmethod
+    def from_training_payload(cls, path: str, payload: Dict, **kwargs) -> 'CSVDatasourceWrapper':
+        """
+        Creates a wrapper that only parses the target and predictors of the given
+        training payload.
+        """
+        return cls(path, usecols=[payload['target']] + list(payload['predictors']), **kwargs)
+
+    def columns(self) -> List[str]:
+        return [name for name in self.names if self.usecols is None or name in self.usecols]
+
+    def schema(self) -> Dict[str, str]:
+        """
+        Column name to dtype mapping applied to every chunk, inferred on first use.
+        """
+        if self._schema is None:
+            self._schema = self.infer_schema()
+
+        return self._schema
+
+    def infer_schema(self) -> Dict[str, str]:
+        """
+        Infers dtypes from a sample of the file:
+
+        - numeric columns are float64, except integer columns without missing
+          values in the sample, which are left to pandas so that a missing value
+          later on does not break parsing
+        - text columns matching one of util.date_parse_expressions are datetimes,
+          stored as 'datetime64[ns]|<format>'
+        - text columns with at most 'category_max_levels' distinct values, and no
+          more distinct values than half the sample, are categorical
+        - every other column is object
+        """
+        sample = self._read(nrows=self.sample_rows, dtype=None)
+        schema = {}
+
+        for name in self.columns():
+            column = sample[name]
+
+            if column.dtype.kind in ('i', 'u'):
+                continue
+            elif column.dtype.kind in ('f', 'b'):
+                schema[name] = str(column.dtype)
+            elif column.dtype.kind == 'O':
+                schema[name] = self._infer_text_dtype(column.dropna())
+
+        return schema
+
+    def to_batches(self, batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        schema = self.schema()
+        read_dtypes = dict((name, dtype) for name, dtype in schema.items() if not dtype.startswith('datetime64'))
+
+        for chunk in self._read(chunksize=batch_size or self.chunksize, dtype=read_dtypes):
+            for name, dtype in schema.items():
+                if dtype.startswith('datetime64'):
+                    chunk[name] = _csv_parse_dates(chunk[name], name, dtype.split('|', 1)[1])
+
+            yield chunk
+
+    def cache_key(self) -> str:
+        """
+        The file, its size and modification time, and the parsed columns.
+        """
+        st = os.stat(self.path)
+        return json.dumps([os.path.abspath(self.path), st.st_size, st.st_mtime_ns, self.usecols])
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Reads every chunk and joins them column by column. Categorical columns are
+        joined with the union of the categories found in each chunk.
+        """
+        batches = list(self.to_batches())
+
+        if not batches:
+            return self._read(nrows=0, dtype=None)
+
+        if len(batches) == 1:
+            return batches[0]
+
+        return pd_concat_batches(batches)
+
+    def select(self, columns: Union[None, Sequence[str]] = None, filters: Union[None, Sequence[Sequence[Any]]] = None,
+               limit: Union[None, int] = None) -> pd.DataFrame:
+        """
+        Parses only the selected and filtered columns (see usecols), filters every
+        chunk as it is read, and stops reading once 'limit' rows pass.
+        """
+        if columns is None:
+            columns = self.columns()
+
+        needed = list(columns) + [name for name in pd_filter_columns(filters) if name not in columns]
+        source = self.projection(needed)
+        chunksize = self.chunksize if limit is None or filters else min(limit, self.chunksize)
+        df = pd_select_batches(source.to_batches(max(chunksize, 1)), columns, filters, limit)
+
+        if df is None:
+            return pd_select(source._read(nrows=0, dtype=None), columns)
+
+        return df
+
+    def select_batches(self, columns: Union[None, Sequence[str]] = None,
+                       filters: Union[None, Sequence[Sequence[Any]]] = None, limit: Union[None, int] = None,
+                       batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        """
+        select() one chunk at a time, parsing only the selected and filtered columns.
+        """
+        if columns is None:
+            columns = self.columns()
+
+        needed = list(columns) + [name for name in pd_filter_columns(filters) if name not in columns]
+        return pd_iter_select_batches(self.projection(needed).to_batches(batch_size), columns, filters, limit)
+
+    def projection(self, usecols: List[str]) -> 'CSVDatasourceWrapper':
+        """
+        Returns a copy of this wrapper that only parses the given columns, reusing
+        the dialect, header and inferred dtypes.
+        """
+        missing = [name for name in usecols if name not in self.columns()]
+
+        if missing:
+            raise ValueError(' '.join(['Columns not in CSV datasource:'] + missing))
+
+        source = copy.copy(self)
+        source.usecols = list(usecols)
+
+        if self._schema is not None:
+            source._schema = dict((name, dtype) for name, dtype in self._schema.items() if name in usecols)
+
+        return source
+
+    def _infer_text_dtype(self, column: pd.Series) -> str:
+        for expression in date_parse_expressions():
+            try:
+                pd.to_datetime(column, format=expression)
+                return '|'.join(['datetime64[ns]', expression])
+            except (ValueError, TypeError):
+                continue
+
+        levels = column.nunique()
+
+        if levels <= self.category_max_levels and levels <= max(1, len(column) // 2):
+            return 'category'
+
+        return 'object'
+
+    def _read(self, **kwargs) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        return pd.read_csv(self.path, sep=self.dialect.delimiter, quotechar=self.dialect.quotechar,
+                           header=self._header, names=self.names, usecols=self.columns(), **kwargs)
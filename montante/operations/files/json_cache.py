@@ -0,0 +1,59 @@
+import os
+import re
+import json
+from typing import Any, Union
+
+CACHE_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+class JSONFileCache:
+    """
+    JSON documents keyed by string, one file per key in 'directory'. Files are
+    written to a temporary name and renamed into place, so concurrent readers,
+    in this or other processes, never see a half written document.
+
+    Keys end up in file names, callers should use digests (i.e. sha256 hex).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        if not CACHE_KEY_PATTERN.match(key):
+            raise ValueError(' '.join(['Invalid cache key', key]))
+
+        return os.path.join(self.directory, ''.join([key, '.json']))
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the document stored under the key, or None.
+        """
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, document: Any):
+        path = self.path(key)
+        tmp_path = ''.join([path, '.', str(os.getpid()), '.tmp'])
+
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(document, f, sort_keys=True)
+
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
@@ -0,0 +1,199 @@
+"""
+Fitted caret preprocessing as NumPy parameter arrays, applied to whole batches
+in Python so that transforming predictors needs no R at all.
+
+Preprocessing is exported from caret preProcess objects by
+operations.R.preprocess_export, this module never imports rpy2.
+
+See:
+    https://topepo.github.io/caret/pre-processing.html
+    https://rdrr.io/cran/car/man/bcPower.html
+"""
+
+import json
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+NATIVE_PREPROCESS_FORMAT = 1
+
+"""
+Transforms that can be exported, in the order predict.preProcess applies them.
+"""
+PREPROCESS_METHODS = ['YeoJohnson', 'center', 'scale', 'range', 'pca']
+
+"""
+Parameter arrays of each transform, besides its 'columns'.
+"""
+_PREPROCESS_ARRAYS = {
+    'YeoJohnson': ['lambda'],
+    'center': ['mean'],
+    'scale': ['std'],
+    'range': ['min', 'max', 'bounds'],
+    'pca': ['rotation']
+}
+
+# car::bcPower treats exponents this close to 0 as the log transform
+_POWER_LOG_TOLERANCE = 1e-6
+
+
+def yeojohnson(X: np.ndarray, lam: np.ndarray) -> np.ndarray:
+    """
+    Yeo-Johnson transform of the columns of X, each with its own exponent, as
+    car::yjPower computes it. Missing values stay missing.
+    """
+    lam = np.broadcast_to(lam, X.shape)
+    out = np.full(X.shape, np.nan)
+
+    with np.errstate(all='ignore'):
+        positive = X >= 0
+        negative = X < 0
+        log_positive = np.abs(lam) <= _POWER_LOG_TOLERANCE
+        log_negative = np.abs(2 - lam) <= _POWER_LOG_TOLERANCE
+
+        out = np.where(positive & log_positive, np.log1p(X), out)
+        out = np.where(positive & ~log_positive, (np.power(X + 1, lam) - 1) / lam, out)
+        out = np.where(negative & log_negative, -np.log1p(-X), out)
+        out = np.where(negative & ~log_negative, -(np.power(1 - X, 2 - lam) - 1) / (2 - lam), out)
+
+    return out
+
+
+class NativePreprocess:
+    """
+    The transforms of a fitted caret preProcess object. 'parameters' holds, for
+    each transform of 'method', the 'columns' it applies to and its parameter
+    arrays, aligned with the columns:
+
+    - YeoJohnson: 'lambda', the estimated exponents
+    - center: 'mean'
+    - scale: 'std'
+    - range: 'min' and 'max' of the training data, and the 'bounds' the values
+      are mapped to
+    - pca: 'rotation', a matrix with a row per column and a column per
+      principal component, named in 'components'
+
+    Transforms run in PREPROCESS_METHODS order. Principal components replace the
+    columns they are computed from, and are appended after the other columns.
+    """
+
+    def __init__(self, method: List[str], parameters: Dict[str, Dict], source: Union[None, Dict] = None):
+        unknown = [name for name in method if name not in PREPROCESS_METHODS]
+
+        if unknown:
+            raise ValueError(' '.join(['Preprocessing methods can not be exported:'] + unknown))
+
+        self.method = [name for name in PREPROCESS_METHODS if name in method]
+        self.source = dict(source or {})
+        self.parameters = {}
+
+        for name in self.method:
+            transform = {'columns': list(parameters[name]['columns'])}
+
+            for array in _PREPROCESS_ARRAYS[name]:
+                transform[array] = np.asarray(parameters[name][array], dtype=np.float64)
+
+            if name == 'pca':
+                transform['components'] = list(parameters[name]['components'])
+                transform['rotation'] = transform['rotation'].reshape(len(transform['columns']),
+                                                                      len(transform['components']))
+
+            self.parameters[name] = transform
+
+    def input_columns(self, outputs: Union[None, List[str]] = None) -> List[str]:
+        """
+        Columns the transforms read, plus the columns in 'outputs' that are not
+        principal components and so come through untouched.
+        """
+        columns = []
+        components = self.parameters['pca']['components'] if 'pca' in self.parameters else []
+
+        for name in self.method:
+            columns.extend(column for column in self.parameters[name]['columns'] if column not in columns)
+
+        for column in outputs or []:
+            if column not in columns and column not in components:
+                columns.append(column)
+
+        return columns
+
+    def transform_matrix(self, X: np.ndarray, names: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Applies the transforms to a float matrix whose columns are 'names', which
+        must include the input_columns. Returns the transformed matrix and the
+        names of its columns.
+        """
+        X = np.array(X, dtype=np.float64)
+        names = list(names)
+
+        for name in self.method:
+            transform = self.parameters[name]
+            position = dict((column, i) for i, column in enumerate(names))
+            columns = [position[column] for column in transform['columns']]
+
+            with np.errstate(all='ignore'):
+                if name == 'YeoJohnson':
+                    X[:, columns] = yeojohnson(X[:, columns], transform['lambda'])
+                elif name == 'center':
+                    X[:, columns] -= transform['mean']
+                elif name == 'scale':
+                    X[:, columns] /= transform['std']
+                elif name == 'range':
+                    low, high = transform['bounds']
+                    X[:, columns] = ((X[:, columns] - transform['min']) / (transform['max'] - transform['min']) *
+                                     (high - low) + low)
+                elif name == 'pca':
+                    kept = [i for i in range(len(names)) if i not in set(columns)]
+                    X = np.hstack([X[:, kept], X[:, columns].dot(transform['rotation'])])
+                    names = [names[i] for i in kept] + transform['components']
+
+        return X, names
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transforms the numeric columns of a dataframe of predictors as caret
+        does before predicting. Other columns are kept as they are.
+
+        The dataframe must have the columns the preprocessing was fitted on,
+        which for models trained through the formula interface include the
+        dummy columns of factors, see NativeTree.feature_matrix.
+        """
+        inputs = self.input_columns()
+        X, names = self.transform_matrix(df[inputs].values.astype(np.float64), inputs)
+        df = df.drop(inputs, axis=1)
+
+        for i, name in enumerate(names):
+            df[name] = X[:, i]
+
+        return df
+
+    def to_dict(self) -> Dict:
+        parameters = {}
+
+        for name, transform in self.parameters.items():
+            parameters[name] = dict((key, value.ravel().tolist() if isinstance(value, np.ndarray) else value)
+                                    for key, value in transform.items())
+
+        return {
+            'format': NATIVE_PREPROCESS_FORMAT,
+            'method': self.method,
+            'parameters': parameters,
+            'source': self.source
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'NativePreprocess':
+        if d.get('format') != NATIVE_PREPROCESS_FORMAT:
+            raise ValueError(' '.join(['Unsupported native preprocess format', str(d.get('format'))]))
+
+        return cls(d['method'], d['parameters'], d['source'])
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'NativePreprocess':
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
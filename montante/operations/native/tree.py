@@ -0,0 +1,599 @@
+"""
+Array backed decision trees exported from C5.0 and rpart models, evaluated with
+NumPy over whole batches so that predicting needs no R at all.
+
+Trees are exported by operations.R.tree_export, this module never imports rpy2.
+
+See:
+    https://www.rulequest.com/see5-unix.html
+    https://cran.r-project.org/web/packages/rpart/vignettes/longintro.pdf
+"""
+
+import re
+import json
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .preprocess import NativePreprocess
+
+NATIVE_TREE_FORMAT = 1
+
+# node kinds
+NODE_LEAF = 0
+NODE_THRESHOLD = 1
+NODE_CATEGORICAL = 2
+
+# categorical branch table values that are not child indexes
+BRANCH_MISSING = -1
+BRANCH_STOP = -2
+
+_C50_TOKEN = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"(?:,"(?:[^"\\]|\\.)*")*)')
+_C50_VALUE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_C50_UNESCAPE = re.compile(r'\\(.)')
+
+
+class NativeTree:
+    """
+    A classification tree as flat node arrays:
+
+    - kind: NODE_LEAF, NODE_THRESHOLD or NODE_CATEGORICAL
+    - feature: column of the feature matrix tested by the node
+    - threshold, strict: threshold nodes send a row to true_child when
+      value <= threshold (value < threshold when strict), to false_child otherwise
+    - branch_start: categorical nodes send a row with level code c (1-based) to
+      branches[branch_start + c - 1], a child index, BRANCH_MISSING or BRANCH_STOP
+    - children_start, children_count: every child of a node in children
+    - cases: training cases that reached the node
+    - value: class distribution of the node
+    - node_class: class predicted at the node
+
+    Rows with a missing value follow the 'missing' strategy of the tree:
+
+    - 'distribute' (C5.0): the row goes down every child with training cases,
+      weighted by the fraction of cases each one got
+    - 'surrogate' (rpart): the surrogate splits of the node are tried in order,
+      each one sending rows with value < threshold to its pass child and other
+      rows to its fail child. Categorical surrogates (branch_start >= 0) look
+      the level code up in branches like categorical nodes do. If all of them
+      are missing the row goes to 'majority_child', or stops at the node when
+      that is -1
+
+    Rows stopping at a node take that node's distribution. Predicted classes are
+    the highest summed distribution (C5.0) or the class of the node the row
+    reached (rpart).
+
+    'features' name the columns of the feature matrix. A feature listed in
+    'dummies' is the 0/1 indicator of a level of a factor column, as built by
+    model.matrix when caret trains through the formula interface. A feature
+    listed in 'categorical' is coded with the position of its value in the
+    given levels.
+
+    Trees of caret models trained with preprocessing carry it as 'preprocess'
+    (see NativePreprocess), and features may then be principal components.
+    """
+
+    def __init__(self, features: List[str], classes: List[str], nodes: Dict[str, List], missing: str,
+                 categorical: Union[None, Dict[str, List[str]]] = None,
+                 dummies: Union[None, Dict[str, Tuple[str, str]]] = None,
+                 surrogates: Union[None, Dict[str, List]] = None, branches: Union[None, List[int]] = None,
+                 children: Union[None, List[int]] = None, source: Union[None, Dict] = None,
+                 preprocess: Union[None, NativePreprocess] = None):
+        if missing not in ('distribute', 'surrogate'):
+            raise ValueError(' '.join(['Unrecognized missing value strategy', missing]))
+
+        self.features = list(features)
+        self.classes = list(classes)
+        self.missing = missing
+        self.categorical = dict(categorical or {})
+        self.dummies = dict((name, tuple(pair)) for name, pair in (dummies or {}).items())
+        self.source = dict(source or {})
+        self.preprocess = preprocess
+        self.kind = np.asarray(nodes['kind'], dtype=np.int8)
+        self.feature = np.asarray(nodes['feature'], dtype=np.int32)
+        self.threshold = np.asarray(nodes['threshold'], dtype=np.float64)
+        self.strict = np.asarray(nodes['strict'], dtype=bool)
+        self.true_child = np.asarray(nodes['true_child'], dtype=np.int32)
+        self.false_child = np.asarray(nodes['false_child'], dtype=np.int32)
+        self.branch_start = np.asarray(nodes['branch_start'], dtype=np.int32)
+        self.children_start = np.asarray(nodes['children_start'], dtype=np.int32)
+        self.children_count = np.asarray(nodes['children_count'], dtype=np.int32)
+        self.cases = np.asarray(nodes['cases'], dtype=np.float64)
+        self.value = np.asarray(nodes['value'], dtype=np.float64).reshape(len(self.kind), len(self.classes))
+        self.node_class = np.asarray(nodes['node_class'], dtype=np.int32)
+        self.majority_child = np.asarray(nodes.get('majority_child', [-1] * len(self.kind)), dtype=np.int32)
+        self.branches = np.asarray(branches or [], dtype=np.int32)
+        self.children = np.asarray(children or [], dtype=np.int32)
+
+        surrogates = surrogates or {'start': [0] * len(self.kind), 'count': [0] * len(self.kind),
+                                    'feature': [], 'threshold': [], 'pass_child': [], 'fail_child': []}
+        self.surrogate_start = np.asarray(surrogates['start'], dtype=np.int32)
+        self.surrogate_count = np.asarray(surrogates['count'], dtype=np.int32)
+        self.surrogate_feature = np.asarray(surrogates['feature'], dtype=np.int32)
+        self.surrogate_threshold = np.asarray(surrogates['threshold'], dtype=np.float64)
+        self.surrogate_pass_child = np.asarray(surrogates['pass_child'], dtype=np.int32)
+        self.surrogate_fail_child = np.asarray(surrogates['fail_child'], dtype=np.int32)
+        self.surrogate_branch_start = np.asarray(surrogates.get('branch_start', [-1] * len(self.surrogate_feature)),
+                                                 dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def feature_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Builds the float feature matrix of the tree from a dataframe of predictor
+        columns. Missing values, and levels unknown to a categorical feature,
+        are NaN. Features are preprocessed when the tree has preprocessing.
+        """
+        if self.preprocess is None:
+            return self._column_matrix(df, self.features)
+
+        names = self.preprocess.input_columns(self.features)
+        X, names = self.preprocess.transform_matrix(self._column_matrix(df, names), names)
+        position = dict((name, i) for i, name in enumerate(names))
+        return X[:, [position[name] for name in self.features]]
+
+    def _column_matrix(self, df: pd.DataFrame, names: List[str]) -> np.ndarray:
+        X = np.empty((len(df), len(names)), dtype=np.float64)
+
+        for i, name in enumerate(names):
+            if name in self.dummies:
+                column, level = self.dummies[name]
+                values = df[column]
+                X[:, i] = (values.astype(object) == level).values
+                X[values.isnull().values, i] = np.nan
+            elif name in self.categorical:
+                codes = pd.Categorical(df[name], categories=self.categorical[name]).codes
+                X[:, i] = np.where(codes < 0, np.nan, codes + 1)
+            else:
+                X[:, i] = pd.to_numeric(df[name], errors='coerce').astype(np.float64).values
+
+        return X
+
+    def predict_scores(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs every row of the feature matrix down the tree. Returns the summed
+        class distributions of the nodes each row stopped at, and for trees that
+        route every row to a single node, that node (-1 otherwise).
+        """
+        n = X.shape[0]
+        scores = np.zeros((n, len(self.classes)), dtype=np.float64)
+        final = np.full(n, -1, dtype=np.int32)
+        rows = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int32)
+        weights = np.ones(n, dtype=np.float64)
+
+        while rows.size:
+            kind = self.kind[nodes]
+            stop = kind == NODE_LEAF
+            values = X[rows, np.maximum(self.feature[nodes], 0)] if X.shape[1] else np.full(rows.size, np.nan)
+            target = np.full(rows.size, BRANCH_MISSING, dtype=np.int32)
+            known = ~np.isnan(values)
+
+            threshold = (kind == NODE_THRESHOLD) & known
+            passes = np.where(self.strict[nodes], values < self.threshold[nodes], values <= self.threshold[nodes])
+            target[threshold] = np.where(passes, self.true_child[nodes], self.false_child[nodes])[threshold]
+
+            categorical = (kind == NODE_CATEGORICAL) & known
+
+            if categorical.any():
+                position = self.branch_start[nodes[categorical]] + values[categorical].astype(np.int64) - 1
+                target[categorical] = self.branches[position]
+
+            stop |= target == BRANCH_STOP
+            missing = ~stop & (target == BRANCH_MISSING)
+
+            if missing.any():
+                if self.missing == 'surrogate':
+                    target[missing] = self._surrogate_targets(X, rows[missing], nodes[missing])
+                    stop |= missing & (target < 0)
+                else:
+                    rows, nodes, weights, target, stop = self._distribute(rows, nodes, weights, target, stop, missing)
+
+            if stop.any():
+                np.add.at(scores, rows[stop], weights[stop, np.newaxis] * self.value[nodes[stop]])
+                final[rows[stop]] = nodes[stop]
+
+            moving = ~stop
+            rows, nodes, weights = rows[moving], target[moving], weights[moving]
+
+        if self.missing == 'distribute':
+            final[:] = -1
+
+        return scores, final
+
+    def predict_proba(self, df: pd.DataFrame) -> pd.DataFrame:
+        scores, _ = self.predict_scores(self.feature_matrix(df))
+        totals = scores.sum(axis=1, keepdims=True)
+        return pd.DataFrame(scores / np.where(totals > 0, totals, 1), columns=self.classes, index=df.index)
+
+    def predict_codes(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Predicted class positions in 'classes', 0-based.
+        """
+        scores, final = self.predict_scores(self.feature_matrix(df))
+        codes = scores.argmax(axis=1)
+
+        if self.missing == 'surrogate':
+            codes = self.node_class[final]
+
+        return codes
+
+    def predict(self, df: pd.DataFrame) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.predict_codes(df), self.classes)
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': NATIVE_TREE_FORMAT,
+            'features': self.features,
+            'classes': self.classes,
+            'missing': self.missing,
+            'categorical': self.categorical,
+            'dummies': dict((name, list(pair)) for name, pair in self.dummies.items()),
+            'source': self.source,
+            'nodes': {
+                'kind': self.kind.tolist(),
+                'feature': self.feature.tolist(),
+                'threshold': self.threshold.tolist(),
+                'strict': self.strict.tolist(),
+                'true_child': self.true_child.tolist(),
+                'false_child': self.false_child.tolist(),
+                'branch_start': self.branch_start.tolist(),
+                'children_start': self.children_start.tolist(),
+                'children_count': self.children_count.tolist(),
+                'cases': self.cases.tolist(),
+                'value': self.value.ravel().tolist(),
+                'node_class': self.node_class.tolist(),
+                'majority_child': self.majority_child.tolist()
+            },
+            'surrogates': {
+                'start': self.surrogate_start.tolist(),
+                'count': self.surrogate_count.tolist(),
+                'feature': self.surrogate_feature.tolist(),
+                'threshold': self.surrogate_threshold.tolist(),
+                'pass_child': self.surrogate_pass_child.tolist(),
+                'fail_child': self.surrogate_fail_child.tolist(),
+                'branch_start': self.surrogate_branch_start.tolist()
+            },
+            'branches': self.branches.tolist(),
+            'children': self.children.tolist(),
+            'preprocess': None if self.preprocess is None else self.preprocess.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'NativeTree':
+        if d.get('format') != NATIVE_TREE_FORMAT:
+            raise ValueError(' '.join(['Unsupported native tree format', str(d.get('format'))]))
+
+        preprocess = None if d.get('preprocess') is None else NativePreprocess.from_dict(d['preprocess'])
+        return cls(d['features'], d['classes'], d['nodes'], d['missing'], d['categorical'], d['dummies'],
+                   d['surrogates'], d['branches'], d['children'], d['source'], preprocess)
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'NativeTree':
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def _surrogate_targets(self, X: np.ndarray, rows: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        target = np.full(rows.size, -1, dtype=np.int32)
+        pending = np.ones(rows.size, dtype=bool)
+
+        counts = self.surrogate_count[nodes]
+
+        for k in range(int(counts.max()) if counts.size else 0):
+            has = pending & (counts > k)
+
+            if not has.any():
+                break
+
+            s = self.surrogate_start[nodes[has]] + k
+            values = X[rows[has], self.surrogate_feature[s]]
+            known = ~np.isnan(values)
+            chosen = np.where(values < self.surrogate_threshold[s], self.surrogate_pass_child[s],
+                              self.surrogate_fail_child[s])
+            categorical = known & (self.surrogate_branch_start[s] >= 0)
+
+            if categorical.any():
+                # levels not present at the node are missing for the surrogate too
+                position = self.surrogate_branch_start[s[categorical]] + values[categorical].astype(np.int64) - 1
+                chosen[categorical] = self.branches[position]
+                known &= chosen != BRANCH_MISSING
+
+            index = np.flatnonzero(has)[known]
+            target[index] = chosen[known]
+            pending[index] = False
+
+        target[pending] = self.majority_child[nodes[pending]]
+        return target
+
+    def _distribute(self, rows, nodes, weights, target, stop, missing):
+        """
+        Replaces every row with a missing value by one row per child of its node
+        that had training cases, weighted by that child's share of the cases.
+        """
+        index = np.flatnonzero(missing)
+        counts = self.children_count[nodes[index]]
+        repeated = np.repeat(index, counts)
+        offsets = np.arange(len(repeated)) - np.repeat(np.cumsum(counts) - counts, counts)
+        children = self.children[self.children_start[nodes[repeated]] + offsets]
+        share = self.cases[children] / self.cases[nodes[repeated]]
+        useful = self.cases[children] > 1e-6
+        repeated, children, share = repeated[useful], children[useful], share[useful]
+
+        keep = ~missing
+        return (np.concatenate([rows[keep], rows[repeated]]),
+                np.concatenate([nodes[keep], nodes[repeated]]),
+                np.concatenate([weights[keep], weights[repeated] * share]),
+                np.concatenate([target[keep], children]),
+                np.concatenate([stop[keep], np.zeros(len(children), dtype=bool)]))
+
+
+def _c50_values(token: str) -> List[str]:
+    return [_C50_UNESCAPE.sub(r'\1', value) for value in _C50_VALUE.findall(token)]
+
+
+def _c50_split_names_line(text: str) -> List[str]:
+    values = []
+    current = []
+    escaped = False
+
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ',':
+            values.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+
+    values.append(''.join(current).strip())
+    return values
+
+
+def c50_discrete_attributes(names: str) -> Dict[str, List[str]]:
+    """
+    Reads the values of the discrete attributes of a C5.0 names file, in the order
+    C5.0 numbers them.
+    """
+    attributes = {}
+
+    for line in names.splitlines()[1:]:
+        line = line.strip()
+
+        if ':' not in line or line.startswith('|'):
+            continue
+
+        name, values = line.split(':', 1)
+        values = values.strip().rstrip('.')
+
+        if values in ('continuous', 'date', 'time', 'timestamp', 'label', 'ignore') or values.startswith('discrete'):
+            continue
+
+        attributes[_C50_UNESCAPE.sub(r'\1', name.strip())] = _c50_split_names_line(values)
+
+    return attributes
+
+
+def c50_tree_records(tree: str) -> Tuple[Dict[str, List[str]], List[Dict[str, List[str]]]]:
+    """
+    Splits the text of a C5.0 model ('tree' element of a C5.0 R object) into its
+    header and its node records, in the depth first order C5.0 writes them.
+    """
+    header = {}
+    records = []
+
+    for key, token in _C50_TOKEN.findall(tree):
+        if key == 'type':
+            records.append({})
+
+        target = records[-1] if records else header
+
+        if key == 'elts':
+            # one subset of values per fork
+            target.setdefault(key, []).append(_c50_values(token))
+        else:
+            target.setdefault(key, []).extend(_c50_values(token))
+
+    return header, records
+
+
+def native_tree_from_c50(tree: str, names: str, classes: List[str],
+                         dummies: Union[None, Dict[str, Tuple[str, str]]] = None) -> NativeTree:
+    """
+    Builds a NativeTree from a single C5.0 decision tree. Rule based models,
+    boosted models (more than one trial) and softened thresholds are not
+    supported and raise NotImplementedError.
+    """
+    header, records = c50_tree_records(tree)
+
+    if 'rules' in header:
+        raise NotImplementedError('C5.0 rule based models can not be exported')
+
+    if int(header.get('entries', ['1'])[0]) != 1:
+        raise NotImplementedError('Boosted C5.0 models can not be exported')
+
+    discrete = c50_discrete_attributes(names)
+    features = []
+    nodes = dict((key, []) for key in ['kind', 'feature', 'threshold', 'strict', 'true_child', 'false_child',
+                                       'branch_start', 'children_start', 'children_count', 'cases', 'value',
+                                       'node_class'])
+    branches = []
+    children = []
+    position = [0]
+
+    def add_node(parent_value: Union[None, np.ndarray]) -> int:
+        record = records[position[0]]
+        position[0] += 1
+        node = len(nodes['kind'])
+        node_type = int(record['type'][0])
+        frequencies = np.zeros(len(classes))
+
+        if 'freq' in record:
+            frequencies = np.array([float(f) for f in record['freq'][0].split(',')])
+
+        cases = frequencies.sum()
+        value = frequencies / cases if cases > 1e-6 else parent_value
+
+        if 'low' in record or 'high' in record:
+            raise NotImplementedError('C5.0 softened thresholds can not be exported')
+
+        for key, item in [('kind', NODE_LEAF), ('feature', -1), ('threshold', 0.0), ('strict', False),
+                          ('true_child', -1), ('false_child', -1), ('branch_start', 0), ('children_start', 0),
+                          ('children_count', 0), ('cases', cases), ('value', value),
+                          ('node_class', classes.index(record['class'][0]))]:
+            nodes[key].append(item)
+
+        if node_type == 0:
+            return node
+
+        attribute = record['att'][0]
+
+        if attribute not in features:
+            features.append(attribute)
+
+        nodes['feature'][node] = features.index(attribute)
+        forks = [add_node(value) for _ in range(int(record['forks'][0]))]
+        nodes['children_start'][node] = len(children)
+        nodes['children_count'][node] = len(forks)
+        children.extend(forks)
+
+        if node_type == 2:
+            # forks: N/A, <= cut, > cut
+            nodes['kind'][node] = NODE_THRESHOLD
+            nodes['threshold'][node] = float(record['cut'][0])
+            nodes['true_child'][node] = forks[1]
+            nodes['false_child'][node] = forks[2]
+        elif node_type in (1, 3):
+            # forks: N/A, then each value (1) or each subset of values (3)
+            levels = discrete[attribute]
+            nodes['kind'][node] = NODE_CATEGORICAL
+            nodes['branch_start'][node] = len(branches)
+
+            if node_type == 1:
+                branches.extend(forks[i + 1] if i + 1 < len(forks) else BRANCH_STOP for i in range(len(levels)))
+            else:
+                table = [BRANCH_STOP] * len(levels)
+
+                for fork, subset in zip(forks, record['elts']):
+                    for level in subset:
+                        if level in levels:
+                            table[levels.index(level)] = fork
+
+                branches.extend(table)
+        else:
+            raise NotImplementedError(' '.join(['Unrecognized C5.0 node type', str(node_type)]))
+
+        return node
+
+    add_node(np.full(len(classes), 1.0 / len(classes)))
+
+    return NativeTree(features, classes, nodes, 'distribute',
+                      categorical=dict((name, discrete[name]) for name in features if name in discrete),
+                      dummies=dict((name, pair) for name, pair in (dummies or {}).items() if name in features),
+                      branches=branches, children=children, source={'model': 'C5.0'})
+
+
+def native_tree_from_rpart(frame: Dict[str, List], splits: Dict[str, List], csplit: Union[None, np.ndarray],
+                           classes: List[str], xlevels: Union[None, Dict[str, List[str]]] = None,
+                           dummies: Union[None, Dict[str, Tuple[str, str]]] = None) -> NativeTree:
+    """
+    Builds a NativeTree from the parts of an rpart classification tree:
+
+    - frame: 'node' (rpart node numbers, children of n are 2n and 2n+1), 'var'
+      ('<leaf>' for leaves), 'n', 'wt', 'yval' (1-based class), 'yprob' (class
+      probabilities, one list per node), 'ncompete' and 'nsurrogate'
+    - splits: 'var', 'ncat', 'index' for each row of the splits matrix
+    - csplit: the csplit matrix (rows of 1 left, 3 right, 2 level not present)
+    - xlevels: levels of the factor predictors
+    """
+    xlevels = xlevels or {}
+    numbers = [int(number) for number in frame['node']]
+    index_of = dict((number, i) for i, number in enumerate(numbers))
+    features = []
+    nodes = dict((key, []) for key in ['kind', 'feature', 'threshold', 'strict', 'true_child', 'false_child',
+                                       'branch_start', 'children_start', 'children_count', 'cases', 'value',
+                                       'node_class', 'majority_child'])
+    surrogates = dict((key, []) for key in ['start', 'count', 'feature', 'threshold', 'pass_child', 'fail_child',
+                                            'branch_start'])
+    branches = []
+    children = []
+    split_row = 0
+
+    def feature_index(name: str) -> int:
+        if name not in features:
+            features.append(name)
+
+        return features.index(name)
+
+    for i, number in enumerate(numbers):
+        var = frame['var'][i]
+        leaf = var == '<leaf>'
+        left, right = index_of.get(2 * number, -1), index_of.get(2 * number + 1, -1)
+
+        for key, item in [('kind', NODE_LEAF), ('feature', -1), ('threshold', 0.0), ('strict', True),
+                          ('true_child', left), ('false_child', right), ('branch_start', 0),
+                          ('children_start', len(children)), ('children_count', 0 if leaf else 2),
+                          ('cases', float(frame['wt'][i])), ('value', list(frame['yprob'][i])),
+                          ('node_class', int(frame['yval'][i]) - 1), ('majority_child', -1)]:
+            nodes[key].append(item)
+
+        surrogates['start'].append(len(surrogates['feature']))
+        surrogates['count'].append(0)
+
+        if leaf:
+            continue
+
+        children.extend([left, right])
+        left_wt, right_wt = float(frame['wt'][left]), float(frame['wt'][right])
+        nodes['majority_child'][i] = left if left_wt > right_wt else (right if right_wt > left_wt else -1)
+        ncompete, nsurrogate = int(frame['ncompete'][i]), int(frame['nsurrogate'][i])
+        rows = [split_row] + list(range(split_row + 1 + ncompete, split_row + 1 + ncompete + nsurrogate))
+        split_row += 1 + ncompete + nsurrogate
+
+        for k, row in enumerate(rows):
+            name, ncat, index = splits['var'][row], int(splits['ncat'][row]), float(splits['index'][row])
+
+            if k == 0 and ncat > 1:
+                # categorical primary split, levels missing at the node count as missing values
+                nodes['kind'][i] = NODE_CATEGORICAL
+                nodes['feature'][i] = feature_index(name)
+                nodes['branch_start'][i] = len(branches)
+                directions = csplit[int(index) - 1][:len(xlevels[name])]
+                branches.extend(left if d == 1 else (right if d == 3 else BRANCH_MISSING) for d in directions)
+            elif k == 0:
+                # ncat -1 sends x < index left, ncat 1 sends x >= index left
+                nodes['kind'][i] = NODE_THRESHOLD
+                nodes['feature'][i] = feature_index(name)
+                nodes['threshold'][i] = index
+                nodes['true_child'][i], nodes['false_child'][i] = (left, right) if ncat < 0 else (right, left)
+            elif ncat > 1:
+                # categorical surrogate, its levels are routed through branches like categorical nodes
+                surrogates['feature'].append(feature_index(name))
+                surrogates['threshold'].append(0.0)
+                surrogates['pass_child'].append(left)
+                surrogates['fail_child'].append(right)
+                surrogates['branch_start'].append(len(branches))
+                surrogates['count'][i] += 1
+                directions = csplit[int(index) - 1][:len(xlevels[name])]
+                branches.extend(left if d == 1 else (right if d == 3 else BRANCH_MISSING) for d in directions)
+            else:
+                # same direction convention as primary splits
+                surrogates['feature'].append(feature_index(name))
+                surrogates['threshold'].append(index)
+                surrogates['pass_child'].append(left if ncat < 0 else right)
+                surrogates['fail_child'].append(right if ncat < 0 else left)
+                surrogates['branch_start'].append(-1)
+                surrogates['count'][i] += 1
+
+    return NativeTree(features, classes, nodes, 'surrogate',
+                      categorical=dict((name, xlevels[name]) for name in features if name in xlevels),
+                      dummies=dict((name, pair) for name, pair in (dummies or {}).items() if name in features),
+                      surrogates=surrogates, branches=branches, children=children, source={'model': 'rpart'})
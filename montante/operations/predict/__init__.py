@@ -1,29 +1,146 @@
-from typing import Dict, Union, List, Tuple
+from concurrent.futures import Future
+from typing import Any, Dict, Union, List, Tuple
 
+import numpy as np
 import pandas as pd
-from rpy2.robjects.vectors import ListVector as RListVector
 
-from ...operations.R.functions import r_convert_pandas_dataframe, r_predict, r_extract_prediction_pairs
+from ...util import use_validator
+from ...util.instrumentation import span, count, instrumentation_enabled
+from ...schemas.columnar import validate_column_batch, filter_column_batch
+from ...schemas.registry import generic_prediction_schema_validator
+from .cache import PredictionCache, cached_rows_prediction
+from .output import PREDICTION_OUTPUTS, prediction_output
+from ...operations.R.model_store import ModelStore
+from ...operations.R.workers import RWorkerPool
+from ...operations.R.caret_wrappers import caret_model_predictor_info
+from ...operations.R.functions import r_convert_pandas_dataframe, r_predict, r_extract_prediction_columns, RListVector
 
 
-def prediction_operation(model: Union[RListVector], payload: Dict) -> List[Tuple[int, str]]:
+def prediction_operation(model: Union[RListVector], payload: Dict, output: str = 'pairs',
+                         type: str = 'raw') -> Union[List[Tuple[int, str]], Dict, Any]:
     """
+    Predicts the rows of the payload. 'output' is one of PREDICTION_OUTPUTS: a
+    list with one item per row ('pairs', the default), a dict of NumPy arrays
+    ('columns') or a pyarrow Table ('arrow'). type='prob' predicts the class
+    probabilities instead of the classes.
+
     TODO: More specific typing for 'fit'
     """
     if isinstance(model, RListVector):
-        return prediction_operation_for_r(model, payload)
+        return prediction_operation_for_r(model, payload, output, type)
     else:
         raise NotImplementedError('fit is not a recognized type')
 
 
-def prediction_operation_for_r(model: RListVector, payload: Dict) -> List[Tuple[int, str]]:
+def prediction_operation_with_checks(model: RListVector, payload: Dict, invalid: str = 'reject',
+                                     column_info: Union[None, Dict[str, str]] = None,
+                                     factor_levels: Union[None, Dict[str, List[str]]] = None) -> List:
     """
-    TODO: document return format!
+    Validates the payload columns in bulk (see schemas.columnar) before predicting,
+    so that bad values never reach R.
+
+    Column info and factor levels are read from the caret model unless given.
+
+    invalid='reject' returns the error list when any row is invalid. invalid='filter'
+    predicts the valid rows only, and the returned list holds None in place of the
+    invalid rows. Batch level errors (i.e. missing columns) are always returned.
     """
+    if invalid not in ('reject', 'filter'):
+        raise ValueError(' '.join(['Unrecognized invalid row policy', invalid]))
+
+    if column_info is None:
+        column_info, model_levels = caret_model_predictor_info(model)
+        factor_levels = model_levels if factor_levels is None else factor_levels
+
+    validation = validate_column_batch(payload, column_info, factor_levels)
+
+    if len(validation.errors) > 0 or (invalid == 'reject' and not validation.is_valid()):
+        return validation.error_list()
+
+    if validation.is_valid():
+        return prediction_operation(model, payload)
+
+    results = [None] * validation.rows
+
+    if validation.valid.any():
+        pairs = prediction_operation(model, filter_column_batch(payload, validation))
+
+        for row, pair in zip(np.flatnonzero(validation.valid), pairs):
+            results[row] = pair
+
+    return results
+
+
+def prediction_operation_from_store(store: ModelStore, payload: Dict,
+                                    cache: Union[None, PredictionCache] = None) -> Union[List[Tuple[int, str]], List]:
+    """
+    Predicts with a stored model. The payload follows generic_prediction_schema:
+    'model_uuid' names the model in the store and 'data' holds the columns.
+
+    With a cache, rows predicted before are answered from it and only the rest
+    reach R, in a single call. Attach the cache to the store (cache.attach) so
+    that replacing a model invalidates its entries.
+
+    Returns the error list produced by the validator if the payload is invalid.
+    Raises KeyError if the model is not in the store.
+    """
+    errors = use_validator(generic_prediction_schema_validator(), payload)
+
+    if len(errors) > 0:
+        return errors
+
+    model_uuid = payload['model_uuid']
+
+    if cache is None:
+        return prediction_operation(store.get(model_uuid), payload['data'])
+
+    return cached_rows_prediction(cache, model_uuid, pd.DataFrame(payload['data']),
+                                  lambda df: prediction_operation(store.get(model_uuid), df))
+
+
+def prediction_operation_async(pool: RWorkerPool, payload: Dict) -> Future:
+    """
+    Predicts on a worker of the given pool that holds the model, see
+    prediction_operation_from_store for the payload format.
+
+    The returned Future resolves to the prediction pairs, or to the error list
+    produced by the validator if the payload is invalid.
+    """
+    errors = use_validator(generic_prediction_schema_validator(), payload)
+
+    if len(errors) > 0:
+        future = Future()
+        future.set_result(errors)
+        return future
+
+    return pool.predict(payload['model_uuid'], payload['data'])
+
+
+def prediction_operation_for_r(model: RListVector, payload: Dict, output: str = 'pairs',
+                               type: str = 'raw') -> Union[List[Tuple[int, str]], Dict, Any]:
+    """
+    Predicts with an R model. The predictions are decoded into NumPy arrays in
+    bulk (see r_extract_prediction_columns) and returned in the 'output' format,
+    see prediction_operation.
+    """
+    if output not in PREDICTION_OUTPUTS:
+        raise ValueError(' '.join(['Unrecognized prediction output', output]))
+
     # TODO: different dict formats
-    pdf = pd.DataFrame(payload)
-    rdf = r_convert_pandas_dataframe(pdf)
-    prediction = r_predict(model, rdf, type='raw')  # todo: type config comes from...?
-    pairs = r_extract_prediction_pairs(prediction)
+    with span('predict.dataframe'):
+        pdf = pd.DataFrame(payload)
+
+    count('predict.rows', len(pdf))
+    count('predict.columns', len(pdf.columns))
+
+    if instrumentation_enabled():
+        count('predict.bytes_converted', int(pdf.memory_usage(index=False).sum()))
+
+    with span('predict.conversion'):
+        rdf = r_convert_pandas_dataframe(pdf)
+
+    with span('predict.r_predict'):
+        prediction = r_predict(model, rdf, type=type)
 
-    return pairs
+    with span('predict.extract'):
+        return prediction_output(r_extract_prediction_columns(prediction), output)
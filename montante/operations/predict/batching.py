@@ -0,0 +1,165 @@
+import time
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Tuple, Union
+
+import pandas as pd
+
+from . import prediction_operation
+from ...operations.R.model_store import ModelStore
+
+
+class _PendingPrediction:
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent prediction requests for the same model into one R call.
+
+    Requests are grouped by model_uuid and column names. A group is sent to R once
+    it holds 'max_batch_size' rows, or once its oldest request has waited
+    'max_wait' seconds. The concatenated frame goes through one predict call and
+    the resulting pairs are split back to each caller's Future.
+
+    All R work happens on the dispatcher thread, so the batcher should be the only
+    user of R in the process while it runs.
+    """
+
+    def __init__(self, store: ModelStore, max_batch_size: int = 1024, max_wait: float = 0.005):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, model_uuid: str, data: Union[Dict, pd.DataFrame]) -> Future:
+        """
+        Queues a prediction. The returned Future resolves to the same list of
+        (index, label) pairs that prediction_operation returns for 'data'.
+        """
+        df = pd.DataFrame(data)
+        pending = _PendingPrediction(df)
+        key = (model_uuid, tuple(str(name) for name in list(df)))
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('PredictionBatcher is closed')
+
+            self._pending.setdefault(key, []).append(pending)
+            self._condition.notify()
+
+        return pending.future
+
+    def predict(self, model_uuid: str, data: Union[Dict, pd.DataFrame],
+                timeout: Union[None, float] = None) -> List[Tuple[int, str]]:
+        return self.submit(model_uuid, data).result(timeout)
+
+    def close(self):
+        """
+        Stops the dispatcher after the queued requests are served.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'rows': self.rows,
+                'mean_requests_per_batch': self.requests / self.batches if self.batches else 0.0
+            }
+
+    def _next_batch(self) -> Union[None, Tuple[str, List[_PendingPrediction]]]:
+        """
+        Blocks until a group is due and takes up to max_batch_size rows out of it.
+        Returns None once the batcher is closed and drained.
+        """
+        with self._condition:
+            while True:
+                if not self._pending:
+                    if self._closed:
+                        return None
+
+                    self._condition.wait()
+                    continue
+
+                # full groups go first, so they never wait out another group's max_wait
+                full = [item for item in self._pending.items()
+                        if sum(len(pending.df) for pending in item[1]) >= self.max_batch_size]
+                key, queue = min(full or self._pending.items(), key=lambda item: item[1][0].enqueued)
+                remaining = self.max_wait - (time.perf_counter() - queue[0].enqueued)
+
+                if not full and remaining > 0 and not self._closed:
+                    self._condition.wait(remaining)
+                    continue
+
+                batch = [queue.pop(0)]
+                rows = len(batch[0].df)
+
+                while queue and rows + len(queue[0].df) <= self.max_batch_size:
+                    rows += len(queue[0].df)
+                    batch.append(queue.pop(0))
+
+                if not queue:
+                    del self._pending[key]
+
+                self.batches += 1
+                self.requests += len(batch)
+                self.rows += rows
+                return key[0], batch
+
+    def _run(self):
+        while True:
+            item = self._next_batch()
+
+            if item is None:
+                return
+
+            model_uuid, batch = item
+
+            try:
+                model = self.store.get(model_uuid)
+            except Exception as e:
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+
+            if len(batch) == 1:
+                self._predict_one(model, batch[0])
+                continue
+
+            try:
+                df = pd.concat([pending.df for pending in batch], ignore_index=True)
+                pairs = prediction_operation(model, df)
+            except Exception:
+                # isolate the failing request(s) instead of failing the whole batch
+                for pending in batch:
+                    self._predict_one(model, pending)
+                continue
+
+            offset = 0
+
+            for pending in batch:
+                pending.future.set_result(pairs[offset:offset + len(pending.df)])
+                offset += len(pending.df)
+
+    def _predict_one(self, model, pending: _PendingPrediction):
+        try:
+            pending.future.set_result(prediction_operation(model, pending.df))
+        except Exception as e:
+            pending.future.set_exception(e)
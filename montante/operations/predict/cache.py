@@ -0,0 +1,250 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ...operations.R.model_store import ModelStore
+
+PREDICTION_CACHE_MAX_ROWS = 100000
+PREDICTION_CACHE_REDIS_PREFIX = 'montante:prediction'
+
+"""
+Returned by lookup() for rows without a cached prediction, so that None can be
+cached as a prediction like any other value.
+"""
+PREDICTION_CACHE_MISS = object()
+
+
+def pd_row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hashes every row of the dataframe into an uint64, vectorized over columns.
+    Columns are hashed in name order, so the same values under a different
+    column order give the same hashes.
+
+    See:
+        https://pandas.pydata.org/pandas-docs/stable/generated/pandas.util.hash_pandas_object.html
+    """
+    columns = sorted(list(df), key=str)
+    return pd.util.hash_pandas_object(df[columns], index=False).values
+
+
+def prediction_cache_columns_key(df: pd.DataFrame) -> str:
+    """
+    Sorted column names of a request, part of every cache key so that rows with
+    equal values under different columns never share entries.
+    """
+    return '|'.join(sorted(str(name) for name in list(df)))
+
+
+class PredictionCache:
+    """
+    Base class for prediction caches: per row predictions keyed by model_uuid,
+    request columns and row hash.
+
+    Entries of a model are invalidated by bumping that model's generation, which
+    is part of every key, so old entries are never read again and are left to
+    age out of the cache. attach() does this whenever a ModelStore replaces or
+    deletes a model.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._metrics_lock = threading.Lock()
+
+    def attach(self, store: ModelStore):
+        store.add_listener(self.invalidate)
+
+    def lookup(self, model_uuid: str, columns: str, hashes: np.ndarray) -> Tuple[int, List[Any]]:
+        """
+        Returns the current generation of the model and the cached prediction of
+        each row hash, PREDICTION_CACHE_MISS for misses. The generation must be
+        passed to store(), so that predictions made while the model is replaced
+        are stored under the old generation and never read again.
+        """
+        key = '|'.join([model_uuid, columns])
+        generation = self._generation(model_uuid)
+        values = self._get_many(generation, key, hashes)
+        hits = sum(value is not PREDICTION_CACHE_MISS for value in values)
+
+        with self._metrics_lock:
+            self.hits += hits
+            self.misses += len(values) - hits
+
+        return generation, values
+
+    def store(self, model_uuid: str, columns: str, hashes: np.ndarray, values: List[Any], generation: int):
+        key = '|'.join([model_uuid, columns])
+        self._set_many(generation, key, hashes, values)
+
+    def invalidate(self, model_uuid: str):
+        self._bump_generation(model_uuid)
+
+        with self._metrics_lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._metrics_lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+    def _generation(self, model_uuid: str) -> int:
+        raise NotImplementedError
+
+    def _bump_generation(self, model_uuid: str):
+        raise NotImplementedError
+
+    def _get_many(self, generation: int, key: str, hashes: np.ndarray) -> List[Any]:
+        raise NotImplementedError
+
+    def _set_many(self, generation: int, key: str, hashes: np.ndarray, values: List[Any]):
+        raise NotImplementedError
+
+
+class LocalPredictionCache(PredictionCache):
+    """
+    In-process prediction cache holding at most 'max_rows' row predictions, the
+    least recently used ones are evicted first.
+    """
+
+    def __init__(self, max_rows: int = PREDICTION_CACHE_MAX_ROWS):
+        super().__init__()
+
+        if max_rows < 1:
+            raise ValueError('max_rows must be at least 1')
+
+        self.max_rows = max_rows
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+
+        with self._lock:
+            stats.update({'rows': len(self._entries), 'max_rows': self.max_rows, 'evictions': self.evictions})
+
+        return stats
+
+    def _generation(self, model_uuid: str) -> int:
+        with self._lock:
+            return self._generations.get(model_uuid, 0)
+
+    def _bump_generation(self, model_uuid: str):
+        with self._lock:
+            self._generations[model_uuid] = self._generations.get(model_uuid, 0) + 1
+
+    def _get_many(self, generation: int, key: str, hashes: np.ndarray) -> List[Any]:
+        values = []
+
+        with self._lock:
+            for row_hash in hashes.tolist():
+                entry = (generation, key, row_hash)
+                value = self._entries.get(entry, PREDICTION_CACHE_MISS)
+
+                if value is not PREDICTION_CACHE_MISS:
+                    self._entries.move_to_end(entry)
+
+                values.append(value)
+
+        return values
+
+    def _set_many(self, generation: int, key: str, hashes: np.ndarray, values: List[Any]):
+        with self._lock:
+            for row_hash, value in zip(hashes.tolist(), values):
+                entry = (generation, key, row_hash)
+                self._entries[entry] = value
+                self._entries.move_to_end(entry)
+
+            while len(self._entries) > self.max_rows:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+class RedisPredictionCache(PredictionCache):
+    """
+    Prediction cache shared between processes through Redis. Predictions are
+    stored as JSON strings expiring after 'ttl' seconds (never when None); size
+    bounded eviction is left to the Redis maxmemory policy, i.e. allkeys-lru.
+
+    See:
+        https://redis.io/topics/lru-cache
+    """
+
+    def __init__(self, client: Any, ttl: Union[None, int] = 3600, prefix: str = PREDICTION_CACHE_REDIS_PREFIX):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _generation_key(self, model_uuid: str) -> str:
+        return ':'.join([self.prefix, 'generation', model_uuid])
+
+    def _row_keys(self, generation: int, key: str, hashes: np.ndarray) -> List[str]:
+        base = ':'.join([self.prefix, str(generation), key])
+        return [':'.join([base, '%x' % row_hash]) for row_hash in hashes.tolist()]
+
+    def _generation(self, model_uuid: str) -> int:
+        return int(self.client.get(self._generation_key(model_uuid)) or 0)
+
+    def _bump_generation(self, model_uuid: str):
+        self.client.incr(self._generation_key(model_uuid))
+
+    def _get_many(self, generation: int, key: str, hashes: np.ndarray) -> List[Any]:
+        if len(hashes) == 0:
+            return []
+
+        return [PREDICTION_CACHE_MISS if value is None else _prediction_from_json(value)
+                for value in self.client.mget(self._row_keys(generation, key, hashes))]
+
+    def _set_many(self, generation: int, key: str, hashes: np.ndarray, values: List[Any]):
+        pipeline = self.client.pipeline(transaction=False)
+
+        for row_key, value in zip(self._row_keys(generation, key, hashes), values):
+            pipeline.set(row_key, json.dumps(value), ex=self.ttl)
+
+        pipeline.execute()
+
+
+def _prediction_from_json(value: Union[bytes, str]) -> Any:
+    value = json.loads(value.decode('utf-8') if isinstance(value, bytes) else value)
+    return tuple(value) if isinstance(value, list) else value
+
+
+def cached_rows_prediction(cache: PredictionCache, model_uuid: str, df: pd.DataFrame,
+                           predict: Callable[[pd.DataFrame], List[Any]]) -> List[Any]:
+    """
+    Answers the rows of df from the cache, and calls predict(sub_df) once with
+    the distinct rows that missed. The returned per row predictions keep the order
+    of df.
+    """
+    columns = prediction_cache_columns_key(df)
+    hashes = pd_row_hashes(df)
+    generation, results = cache.lookup(model_uuid, columns, hashes)
+    missing = [i for i, value in enumerate(results) if value is PREDICTION_CACHE_MISS]
+
+    if not missing:
+        return results
+
+    # predict each distinct missing row once
+    missing_hashes = hashes[missing]
+    unique_hashes, first, inverse = np.unique(missing_hashes, return_index=True, return_inverse=True)
+    rows = np.asarray(missing)[first]
+    predictions = list(predict(df.iloc[rows].reset_index(drop=True)))
+
+    for i, position in zip(missing, inverse.tolist()):
+        results[i] = predictions[position]
+
+    cache.store(model_uuid, columns, unique_hashes, predictions, generation)
+    return results
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+"""
+Formats prediction_operation can return:
+
+    'pairs'     one item per row: (R index, label) tuples for classes, tuples of
+                class probabilities, or floats for regressions
+    'columns'   the dict of NumPy arrays from r_extract_prediction_columns
+    'arrow'     a pyarrow Table, labels being a dictionary encoded column
+"""
+PREDICTION_OUTPUTS = ['pairs', 'columns', 'arrow']
+
+
+def prediction_columns_to_pairs(columns: Dict[str, Any]) -> List:
+    if 'index' in columns:
+        return list(zip(columns['index'].tolist(), columns['label'].tolist()))
+    elif 'probabilities' in columns:
+        return [tuple(row) for row in columns['probabilities'].tolist()]
+    else:
+        return columns['value'].tolist()
+
+
+def prediction_columns_to_arrow(columns: Dict[str, Any]) -> Any:
+    """
+    Builds a pyarrow Table out of the decoded prediction columns. Class labels
+    become a dictionary encoded column over the factor levels, so each label
+    string is stored once.
+
+    See:
+        https://arrow.apache.org/docs/python/data.html#dictionary-arrays
+    """
+    # imported here, so that pyarrow is only loaded by callers that want Arrow output
+    import pyarrow as pa
+
+    if 'index' in columns:
+        codes = columns['index']
+        missing = codes <= 0
+        indices = pa.array(np.where(missing, 0, codes - 1).astype(np.int32), mask=missing)
+        return pa.Table.from_arrays([
+            pa.array(codes, mask=missing),
+            pa.DictionaryArray.from_arrays(indices, pa.array(columns['levels'].tolist()))
+        ], ['index', 'label'])
+    elif 'probabilities' in columns:
+        matrix = columns['probabilities']
+        return pa.Table.from_arrays([pa.array(matrix[:, i]) for i in range(matrix.shape[1])], columns['classes'])
+    else:
+        return pa.Table.from_arrays([pa.array(columns['value'])], ['value'])
+
+
+def prediction_output(columns: Dict[str, Any], output: str) -> Any:
+    if output == 'pairs':
+        return prediction_columns_to_pairs(columns)
+    elif output == 'columns':
+        return columns
+    elif output == 'arrow':
+        return prediction_columns_to_arrow(columns)
+
+    raise ValueError(' '.join(['Unrecognized prediction output', output]))
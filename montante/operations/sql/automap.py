@@ -1,6 +1,10 @@
+import time
+import threading
+import concurrent.futures
 from typing import Dict, List
 
 import sqlalchemy
+import sqlalchemy.exc
 from sqlalchemy import orm
 from sqlalchemy.ext.automap import automap_base, AutomapBase
 import sqlalchemy.ext.declarative
@@ -54,3 +58,166 @@ def extract_sql_schema(e: sqlalchemy.engine.Engine) -> Dict:
                 structure['foreign_keys'].append('.'.join([name, key.target_fullname]))
 
     return structure
+
+
+SCHEMA_CACHE_TTL = 300.0
+
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+
+"""
+Catalog queries returning (table name, estimated rows) for the current schema.
+The estimates are as fresh as the last ANALYZE (or autovacuum on Postgres).
+
+See:
+    https://www.postgresql.org/docs/current/static/catalog-pg-class.html
+    https://dev.mysql.com/doc/refman/5.7/en/tables-table.html
+    https://www.sqlite.org/fileformat2.html#stat1tab
+"""
+_ESTIMATED_ROW_COUNT_QUERIES = {
+    'postgresql': "SELECT c.relname, c.reltuples FROM pg_class c "
+                  "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                  "WHERE c.relkind = 'r' AND n.nspname = current_schema()",
+    'mysql': "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+             "WHERE TABLE_SCHEMA = DATABASE()",
+    'sqlite': "SELECT tbl, stat FROM sqlite_stat1"
+}
+
+
+def sql_estimated_row_counts(e: sqlalchemy.engine.Engine) -> Dict[str, int]:
+    """
+    Reads the row count estimates kept in the database catalog, without scanning
+    any table. Tables without statistics are left out.
+    """
+    query = _ESTIMATED_ROW_COUNT_QUERIES.get(e.dialect.name)
+
+    if query is None:
+        return {}
+
+    try:
+        with e.connect() as connection:
+            rows = connection.execute(query).fetchall()
+    except sqlalchemy.exc.DBAPIError:
+        # i.e. sqlite_stat1 does not exist until ANALYZE has been run
+        return {}
+
+    counts = {}
+
+    for name, estimate in rows:
+        if e.dialect.name == 'sqlite':
+            # one row per index, stat starts with the table row count
+            estimate = int(str(estimate).split(' ')[0])
+            counts[name] = max(counts.get(name, 0), estimate)
+        elif estimate is not None and estimate >= 0:
+            counts[name] = int(estimate)
+
+    return counts
+
+
+def sql_exact_row_count(e: sqlalchemy.engine.Engine, table_name: str) -> int:
+    """
+    Counts the rows of the table with a COUNT(*), which scans the table on most
+    engines.
+    """
+    query = sqlalchemy.select([sqlalchemy.func.count()]).select_from(sqlalchemy.table(table_name))
+
+    with e.connect() as connection:
+        return connection.execute(query).scalar()
+
+
+def _inspect_table(e: sqlalchemy.engine.Engine, table_name: str, exact_rows: bool) -> Dict:
+    """
+    Reflects one table into the format of extract_sql_schema. Each call builds its
+    own inspector, so calls can run on different threads.
+    """
+    inspector = sqlalchemy.inspect(e)
+    primary_key = inspector.get_pk_constraint(table_name).get('constrained_columns') or []
+    unique = set()
+
+    for constraint in inspector.get_unique_constraints(table_name):
+        if len(constraint['column_names']) == 1:
+            unique.add(constraint['column_names'][0])
+
+    foreign_keys = {}
+
+    for key in inspector.get_foreign_keys(table_name):
+        for column, referred in zip(key['constrained_columns'], key['referred_columns']):
+            foreign_keys[column] = '.'.join([key['referred_table'], referred])
+
+    table = {'columns': {}, 'foreign_keys': []}
+
+    for column in inspector.get_columns(table_name):
+        name = '.'.join([table_name, column['name']])
+        table['columns'][name] = {
+            'type': str(column['type']),
+            'unique': True if column['name'] in unique else None,
+            'nullable': column['nullable'],
+            'primary_key': column['name'] in primary_key
+        }
+
+        if column['name'] in foreign_keys:
+            table['columns'][name]['foreign_keys'] = foreign_keys[column['name']]
+            table['foreign_keys'].append('.'.join([name, foreign_keys[column['name']]]))
+
+    if exact_rows:
+        table['total_rows'] = sql_exact_row_count(e, table_name)
+
+    return table
+
+
+def inspect_sql_schema(e: sqlalchemy.engine.Engine, row_counts: str = 'estimated', workers: int = 8,
+                       ttl: float = SCHEMA_CACHE_TTL) -> Dict:
+    """
+    Extracts the same JSONable structure as extract_sql_schema through the
+    SQLAlchemy inspector, which also covers tables without a primary key.
+
+    row_counts:
+        'estimated': read from the catalog statistics, None where there are none
+        'exact':     COUNT(*) on every table, like extract_sql_schema
+        'none':      no counts, every total_rows is None
+
+    Tables are reflected concurrently over the engine's connection pool by up to
+    'workers' threads. Results are cached per engine URL and row_counts mode for
+    'ttl' seconds, a ttl of 0 bypasses the cache.
+    """
+    if row_counts not in ('estimated', 'exact', 'none'):
+        raise ValueError(' '.join(['Unrecognized row_counts mode', row_counts]))
+
+    key = (str(e.url), row_counts)
+
+    if ttl > 0:
+        with _schema_cache_lock:
+            cached = _schema_cache.get(key)
+
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+    # older SQLAlchemy versions list SQLite's internal tables, i.e. the untyped
+    # sqlite_stat1 that ANALYZE creates
+    table_names = [name for name in sqlalchemy.inspect(e).get_table_names()
+                   if not (e.dialect.name == 'sqlite' and name.startswith('sqlite_'))]
+    exact = row_counts == 'exact'
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        tables = list(executor.map(lambda name: _inspect_table(e, name, exact), table_names))
+
+    estimates = sql_estimated_row_counts(e) if row_counts == 'estimated' else {}
+    structure = {'foreign_keys': [], 'tables': {}, 'row_counts': row_counts}
+
+    for name, table in zip(table_names, tables):
+        if not exact:
+            table['total_rows'] = estimates.get(name)
+
+        structure['foreign_keys'].extend(table['foreign_keys'])
+        structure['tables'][name] = table
+
+    if ttl > 0:
+        with _schema_cache_lock:
+            _schema_cache[key] = (time.monotonic(), structure)
+
+    return structure
+
+
+def clear_sql_schema_cache():
+    with _schema_cache_lock:
+        _schema_cache.clear()
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Iterator, Sequence, Union
+
+import pandas as pd
+import sqlalchemy
+
+from ...DatasourceWrapper import DatasourceWrapper
+from ..dataframe.functions import PD_FILTER_OPERATORS, pd_check_filter
+from .engine import (build_sqlalchemy_engine,
+                     raw_sqlalchemy_query_batches,
+                     raw_sqlalchemy_query_to_pandas_dataframe,
+                     FETCH_BATCH_SIZE)
+
+"""
+SQL expressions for the filter operators of pd_filter_mask. Comparisons build
+expressions on columns as they are, membership needs the column methods.
+"""
+_SQL_FILTER_OPERATORS = dict(PD_FILTER_OPERATORS, **{
+    'in': lambda column, values: column.in_(list(values)),
+    'not in': lambda column, values: column.notin_(list(values))
+})
+
+
+class SQLDatasourceWrapper(DatasourceWrapper):
+    """
+    Datasource for the result set of a SQL query.
+
+    The query runs on a server-side cursor, so to_batches() never holds more than
+    one batch of rows and to_df() fills each column array once instead of
+    concatenating many small dataframes.
+
+    'params' are the connection parameters taken by build_sqlalchemy_engine. An
+    already built engine can be passed instead to share its connection pool.
+
+    Datasources over a whole table should be created with from_table, so that
+    select() queries the table itself instead of wrapping a query around it.
+    """
+
+    def __init__(self, params: Union[None, Dict], sql: str, batch_size: int = FETCH_BATCH_SIZE,
+                 engine: Union[None, sqlalchemy.engine.Engine] = None, table: Union[None, str] = None):
+        if params is None and engine is None:
+            raise ValueError('Either params or engine must be given')
+
+        self.params = params
+        self.sql = sql
+        self.batch_size = batch_size
+        self.table = table
+        self._engine = engine
+
+    @classmethod
+    def from_table(cls, params: Union[None, Dict], table: str, **kwargs) -> 'SQLDatasourceWrapper':
+        """
+        Creates a datasource over every row of a table, i.e. one listed by
+        inspect_sql_schema.
+        """
+        return cls(params, ''.join(['SELECT * FROM ', table]), table=table, **kwargs)
+
+    @property
+    def engine(self) -> sqlalchemy.engine.Engine:
+        if self._engine is None:
+            self._engine = build_sqlalchemy_engine(self.params)
+
+        return self._engine
+
+    def __getstate__(self) -> Dict:
+        # engines hold live connections and can't be pickled, rebuild from params
+        state = self.__dict__.copy()
+
+        if self.params is not None:
+            state['_engine'] = None
+
+        return state
+
+    def query(self) -> str:
+        # table names are quoted by the dialect, not as written in self.sql
+        return self.sql if self.table is None else self.compile(self.selection())
+
+    def compile(self, query: sqlalchemy.sql.Select) -> str:
+        """
+        Renders a query as SQL for this datasource's dialect, with the filter values
+        inlined as escaped literals. Rows are fetched straight from the DBAPI
+        cursor (see sql_fetch_column_batches), which compiled statements executed
+        with stream_results would have partly buffered away.
+        """
+        return str(query.compile(dialect=self.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    def to_df(self) -> pd.DataFrame:
+        return raw_sqlalchemy_query_to_pandas_dataframe(self.engine, self.query(), self.batch_size, stream_results=True)
+
+    def to_batches(self, batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        return raw_sqlalchemy_query_batches(self.engine, self.query(), batch_size or self.batch_size,
+                                            stream_results=True)
+
+    def selection(self, columns: Union[None, Sequence[str]] = None, filters: Union[None, Sequence[Sequence[Any]]] = None,
+                  limit: Union[None, int] = None) -> sqlalchemy.sql.Select:
+        """
+        Builds the SELECT of the given columns, filters and limit. Its FROM is the
+        table of from_table datasources, or the query of the datasource as a
+        derived table, which databases flatten into the outer query.
+        """
+        if self.table is not None:
+            source = sqlalchemy.table(self.table)
+        else:
+            source = sqlalchemy.text(self.sql).columns().alias('source')
+
+        if columns is None:
+            fields = [sqlalchemy.literal_column('*')]
+        else:
+            fields = [sqlalchemy.column(name) for name in columns]
+
+        query = sqlalchemy.select(fields).select_from(source)
+
+        for column, op, value in filters or []:
+            pd_check_filter(op, value)
+            query = query.where(_SQL_FILTER_OPERATORS[op](sqlalchemy.column(column), value))
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    def select(self, columns: Union[None, Sequence[str]] = None, filters: Union[None, Sequence[Sequence[Any]]] = None,
+               limit: Union[None, int] = None) -> pd.DataFrame:
+        """
+        Runs the projection, filters and limit in the database, see selection.
+        """
+        return raw_sqlalchemy_query_to_pandas_dataframe(self.engine, self.compile(self.selection(columns, filters, limit)),
+                                                        self.batch_size, stream_results=True)
+
+    def select_batches(self, columns: Union[None, Sequence[str]] = None,
+                       filters: Union[None, Sequence[Sequence[Any]]] = None, limit: Union[None, int] = None,
+                       batch_size: Union[None, int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams the result set of the query built by selection.
+        """
+        return raw_sqlalchemy_query_batches(self.engine, self.compile(self.selection(columns, filters, limit)),
+                                            batch_size or self.batch_size, stream_results=True)
@@ -1,10 +1,16 @@
-from typing import Dict, Union, List
+from concurrent.futures import Future
+from typing import Dict, Union, List, Tuple
 
 import pandas as pd
-from rpy2.robjects.vectors import ListVector as RListVector
-
 from ...DatasourceWrapper import DatasourceWrapper
+from ...util import use_validator
+from ...util.instrumentation import span, count
+from ...schemas.registry import training_schema_validator
+from ...operations.dataframe.functions import pd_select
+from ...operations.dataframe.sampling import pd_sample, reservoir_sample_batches
+from ...operations.R.functions import RListVector
 from ...operations.R.caret_wrappers import caret_model_train
+from ...operations.R.workers import RWorkerPool
 
 
 def training_operation(source: Union[pd.DataFrame, DatasourceWrapper], payload: Dict) -> Union[RListVector, List]:
@@ -28,22 +34,85 @@ def training_operation(source: Union[pd.DataFrame, DatasourceWrapper], payload:
     """
     engine = payload['engine']
 
-    if isinstance(source, DatasourceWrapper):
-        df = source.to_df()
-    else:
-        df = source
+    if engine != 'caret':
+        raise NotImplementedError
+
+    # the payload decides which rows are read, so it is checked before reading any
+    errors = use_validator(training_schema_validator(engine, payload['engine-parameters']['method']), payload)
+
+    if len(errors) > 0:
+        return errors
+
+    with span('train.datasource'):
+        df, sampling = training_dataframe(source, payload)
+
+    count('train.rows', len(df))
+    count('train.columns', len(df.columns))
 
-    if engine == 'caret':
-        return training_operation_for_caret(df, payload)
+    with span('train.total'):
+        return training_operation_for_caret(df, payload, None if sampling is None else {'sampling': sampling})
+
+
+def training_dataframe(source: Union[pd.DataFrame, DatasourceWrapper],
+                       payload: Dict) -> Tuple[pd.DataFrame, Union[None, Dict]]:
+    """
+    Reads the target and predictor columns of the rows picked by the 'filters'
+    and 'limit' of a valid training payload, and samples them as its 'sampling'
+    section says, see operations.dataframe.sampling.
+
+    Returns the dataframe, and the sampling parameters plus the 'population' the
+    sample was drawn from and the 'rows' in it, or None when not sampling.
+
+    Reservoir sampling over a DatasourceWrapper goes through its select_batches,
+    so only about 'size' rows are held at a time. The other methods sample the
+    whole selection.
+    """
+    target = payload['target']
+    columns = [target] + [name for name in payload['predictors'] if name != target]
+    filters = payload.get('filters')
+    limit = payload.get('limit')
+    sampling = payload.get('sampling')
+
+    if sampling is not None and sampling['method'] == 'reservoir' and isinstance(source, DatasourceWrapper):
+        df, population = reservoir_sample_batches(source.select_batches(columns, filters, limit),
+                                                  sampling['size'], sampling.get('seed', 0))
+
+        if df is None:
+            df = source.select(columns, filters, limit)
     else:
-        raise NotImplementedError
+        if isinstance(source, DatasourceWrapper):
+            df = source.select(columns, filters, limit)
+        else:
+            df = pd_select(source, columns, filters, limit)
+
+        population = len(df)
+
+        if sampling is not None:
+            df = pd_sample(df, sampling, target)
+
+    if sampling is None:
+        return df, None
+
+    return df, dict(sampling, population=population, rows=len(df))
+
+
+def training_operation_async(pool: RWorkerPool, source: Union[pd.DataFrame, DatasourceWrapper],
+                             payload: Dict) -> Future:
+    """
+    Runs training_operation on a worker of the given pool.
+
+    The returned Future resolves to the model_uuid under which the worker stored the
+    model, or to the list of encountered errors.
+    """
+    return pool.train(source, payload)
 
 
-def training_operation_for_caret(df: pd.DataFrame, payload: Dict) -> Union[RListVector, List]:
+def training_operation_for_caret(df: pd.DataFrame, payload: Dict,
+                                 metadata: Union[None, Dict] = None) -> Union[RListVector, List]:
     """
     TODO: Documentation.
     """
-    model_or_error_list = caret_model_train(df, payload)
+    model_or_error_list = caret_model_train(df, payload, metadata)
 
     if isinstance(model_or_error_list, list):
         return model_or_error_list
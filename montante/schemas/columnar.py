@@ -0,0 +1,171 @@
+"""
+Vectorized validation of columnar prediction payloads.
+
+Prediction payloads carry one array per column, i.e. {'petal_width_cm': [1, 1, 1]}.
+Instead of validating each value through JSONSchema, every column is checked as a
+whole with NumPy and the result keeps one boolean mask of bad rows per column, so
+bad rows can be rejected or filtered out before the data reaches R.
+"""
+
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnBatchValidation:
+    """
+    Result of validate_column_batch.
+
+    'errors' are batch level problems (missing or unknown columns, unequal column
+    lengths) that make the whole batch unusable. 'row_errors' maps a column name to
+    a boolean mask of its invalid rows and 'valid' is the mask of fully valid rows.
+    """
+
+    def __init__(self, rows: int, errors: List[Tuple[List[str], str]], row_errors: Dict[str, np.ndarray],
+                 column_info: Dict[str, str]):
+        self.rows = rows
+        self.errors = errors
+        self.row_errors = row_errors
+        self.column_info = column_info
+        self.valid = np.ones(rows, dtype=bool)
+
+        for mask in row_errors.values():
+            self.valid &= ~mask
+
+    def is_valid(self) -> bool:
+        return len(self.errors) == 0 and bool(self.valid.all())
+
+    def invalid_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self.valid)
+
+    def error_list(self) -> List[Tuple[List[str], str]]:
+        """
+        Errors in the (path, message) format returned by util.use_validator.
+        """
+        errors = list(self.errors)
+
+        for name, mask in self.row_errors.items():
+            rows = np.flatnonzero(mask)
+
+            if len(rows) > 0:
+                errors.append((['data', name], ' '.join(['invalid values at rows', str(list(rows))])))
+
+        return errors
+
+
+def _column_series(values: Union[Sequence, np.ndarray]) -> pd.Series:
+    """
+    Wraps a payload column in a Series. pandas infers a numeric dtype for clean
+    numeric lists, so only mixed columns end up as objects.
+    """
+    if np.isscalar(values) or values is None:
+        values = [values]
+
+    return pd.Series(values)
+
+
+def _column_row_errors(series: pd.Series, dtype: str, levels: Union[None, Sequence[str]],
+                       allow_missing: bool) -> np.ndarray:
+    """
+    Returns the mask of values that can't be coerced to the given pandas dtype, or
+    that are not among the training levels for factor columns.
+    """
+    missing = series.isnull().values
+
+    if dtype.startswith('int') or dtype.startswith('uint') or dtype.startswith('float'):
+        if series.dtype.kind == 'b':
+            numeric = np.full(len(series), np.nan)
+        else:
+            numeric = pd.to_numeric(series, errors='coerce').values.astype(np.float64)
+
+        bad = np.isnan(numeric) & ~missing
+
+        if series.dtype.kind == 'O':
+            # booleans and strings of numbers are not numeric values in a JSON payload
+            bad |= series.map(type).isin([bool, str, bytes]).values
+
+        if not dtype.startswith('float'):
+            bad |= ~missing & ~bad & (np.mod(np.nan_to_num(numeric), 1) != 0)
+    elif dtype == 'bool':
+        bad = ~missing & ~series.isin([True, False]).values
+    elif dtype.startswith('datetime64'):
+        bad = pd.to_datetime(series, errors='coerce').isnull().values & ~missing
+    elif dtype in ('object', 'category'):
+        if levels is not None:
+            bad = ~missing & ~series.astype(str).isin(list(levels)).values
+        else:
+            bad = np.zeros(len(series), dtype=bool)
+    else:
+        raise TypeError(' '.join(['Given column_type is not recognized', dtype]))
+
+    if not allow_missing:
+        bad |= missing
+
+    return bad
+
+
+def validate_column_batch(data: Dict[str, Union[Sequence, np.ndarray]], column_info: Dict[str, str],
+                          factor_levels: Union[None, Dict[str, Sequence[str]]] = None,
+                          allow_missing: bool = False) -> ColumnBatchValidation:
+    """
+    Validates a dict of column arrays against the model's column info, a mapping of
+    column name to pandas dtype (see pd_column_info_dict), and the training levels
+    of its factor columns.
+
+    Checks column presence, unknown columns, equal lengths, dtype coercibility and,
+    for factor columns, membership in the training levels. Missing values are
+    invalid rows unless allow_missing is set.
+    """
+    factor_levels = factor_levels or {}
+    errors = []
+    columns = {}
+
+    for name in column_info:
+        if name not in data:
+            errors.append((['data', 'required'], ' '.join([repr(name), 'is a required property'])))
+        else:
+            columns[name] = _column_series(data[name])
+
+    for name in data:
+        if name not in column_info:
+            errors.append((['data', 'additionalProperties'], ' '.join([repr(name), 'is not a model column'])))
+
+    lengths = set(len(values) for values in columns.values())
+
+    if len(lengths) > 1:
+        errors.append((['data', 'length'], ' '.join(['columns have different lengths:', str(sorted(lengths))])))
+        return ColumnBatchValidation(0, errors, {}, column_info)
+
+    rows = lengths.pop() if lengths else 0
+    row_errors = {}
+
+    for name, series in columns.items():
+        row_errors[name] = _column_row_errors(series, column_info[name], factor_levels.get(name), allow_missing)
+
+    return ColumnBatchValidation(rows, errors, row_errors, column_info)
+
+
+def filter_column_batch(data: Dict[str, Union[Sequence, np.ndarray]],
+                        validation: ColumnBatchValidation) -> Dict[str, np.ndarray]:
+    """
+    Keeps the valid rows of the batch, coerced to the validated dtypes so that i.e.
+    a numeric column that held a stray string is numeric again. Only the columns
+    that were validated are kept.
+    """
+    columns = {}
+
+    for name in validation.row_errors:
+        series = _column_series(data[name])[validation.valid]
+        dtype = validation.column_info[name]
+
+        if dtype.startswith('int') or dtype.startswith('uint') or dtype.startswith('float'):
+            series = pd.to_numeric(series)
+        elif dtype.startswith('datetime64'):
+            series = pd.to_datetime(series)
+        elif dtype == 'bool' and not series.isnull().any():
+            series = series.astype(bool)
+
+        columns[name] = series.values
+
+    return columns
@@ -0,0 +1,78 @@
+"""
+Registry of ready-made JSONSchema validators.
+
+Building a schema and its Draft4Validator costs far more than validating a small
+payload, so validators are built once per (engine, method) for training, and once
+per column info fingerprint for prediction.
+"""
+
+import threading
+from typing import Dict, Iterable, Tuple, Union
+
+import jsonschema
+
+from .train import create_specific_training_schema
+from .predict import generic_prediction_schema, create_specific_prediction_schema_validator
+
+_lock = threading.Lock()
+_training_validators = {}
+_prediction_validators = {}
+_generic_prediction_validator = jsonschema.Draft4Validator(generic_prediction_schema)
+
+
+def generic_prediction_schema_validator() -> jsonschema.Draft4Validator:
+    return _generic_prediction_validator
+
+
+def training_schema_validator(engine: str, method: Union[None, str]) -> jsonschema.Draft4Validator:
+    """
+    Returns the validator for create_specific_training_schema(engine, method),
+    building it on first use. Errors raised while building are not cached.
+    """
+    key = (engine, method)
+    validator = _training_validators.get(key)
+
+    if validator is None:
+        validator = jsonschema.Draft4Validator(create_specific_training_schema(engine, method))
+
+        with _lock:
+            validator = _training_validators.setdefault(key, validator)
+
+    return validator
+
+
+def column_info_fingerprint(column_info: Union[Dict[str, str], Iterable[Tuple[str, str]]]) -> Tuple:
+    """
+    Reduces column info, either (name, dtype) pairs or a name to dtype dict, to a
+    hashable key that does not depend on column order.
+    """
+    if isinstance(column_info, dict):
+        column_info = column_info.items()
+
+    return tuple(sorted((str(name), str(dtype)) for name, dtype in column_info))
+
+
+def prediction_schema_validator(column_info: Union[Dict[str, str], Iterable[Tuple[str, str]]]) -> jsonschema.Draft4Validator:
+    """
+    Returns the validator built by create_specific_prediction_schema_validator for
+    the given column info, building it on first use.
+    """
+    key = column_info_fingerprint(column_info)
+    validator = _prediction_validators.get(key)
+
+    if validator is None:
+        validator = create_specific_prediction_schema_validator(key)
+
+        with _lock:
+            validator = _prediction_validators.setdefault(key, validator)
+
+    return validator
+
+
+def clear_schema_validators():
+    """
+    Drops every registered validator, i.e. after the schema functions change.
+    """
+    with _lock:
+        _training_validators.clear()
+        _prediction_validators.clear()
@@ -1,5 +1,7 @@
 from typing import Dict, Union
 from .train_caret import caret_train_engine_subschema
+from ..operations.dataframe.functions import PD_FILTER_OPERATORS, PD_FILTER_MEMBERSHIP_OPERATORS
+from ..operations.dataframe.sampling import SAMPLING_METHODS
 
 
 def create_base_training_schema() -> Dict:
@@ -17,6 +19,41 @@ def create_base_training_schema() -> Dict:
             "engine":       {"type": "string"},
             "target":       {"type": "string"},
             "predictors":   {"type": "array", "items": {"type": "string"}},
+            "filters":      {
+                "type": "array",
+                "items": {
+                    "type": "array",
+                    "items": [
+                        {"type": "string"},
+                        {"type": "string", "enum": list(PD_FILTER_OPERATORS)},
+                        {}
+                    ],
+                    "minItems": 3,
+                    "maxItems": 3,
+                    # membership operators take a list of values, the others a single one, and
+                    # values are never null since missing values never pass a filter
+                    "anyOf": [
+                        {"items": [{}, {"enum": PD_FILTER_MEMBERSHIP_OPERATORS},
+                                   {"type": "array", "items": {"not": {"type": "null"}}}]},
+                        {"items": [{}, {"not": {"enum": PD_FILTER_MEMBERSHIP_OPERATORS}},
+                                   {"not": {"type": ["array", "object", "null"]}}]}
+                    ]
+                }
+            },
+            "limit":        {"type": "integer", "minimum": 1},
+            "sampling":     {
+                "type": "object",
+                "required": ["method"],
+                "properties": {
+                    "method":   {"type": "string", "enum": list(SAMPLING_METHODS)},
+                    "seed":     {"type": "integer", "minimum": 0, "maximum": 4294967295},
+                    "size":     {"type": "integer", "minimum": 1},
+                    "fraction": {"type": "number", "minimum": 0, "exclusiveMinimum": True, "maximum": 1}
+                },
+                "oneOf": [{"required": ["size"]}, {"required": ["fraction"]}],
+                # the length of a stream is unknown, reservoirs have a size
+                "not": {"properties": {"method": {"enum": ["reservoir"]}}, "required": ["fraction"]}
+            },
             "engine-parameters": {}
         }
     }
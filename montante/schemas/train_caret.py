@@ -1,5 +1,7 @@
 from typing import List, Dict
 
+from ..operations.native.preprocess import PREPROCESS_METHODS
+
 
 def caret_train_engine_subschema(method: str) -> Dict:
     if method not in _caret_train_available_training_methods():
@@ -10,30 +12,63 @@ def caret_train_engine_subschema(method: str) -> Dict:
         "required": ["method", "training-control"],
         "properties": {
             "method": {"type": "string", "enum": _caret_train_available_training_methods()},
-            "preprocess": {"type": "array", "items": {"type": "string"}},
+            "preprocess": {"type": "array", "items": {"type": "string", "enum": _caret_train_preprocess_methods()}},
             "metric": {"type": "string", "enum": _caret_train_metrics()},
+            "tune-grid": {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "object",
+                    "minProperties": 1,
+                    "additionalProperties": {"type": ["number", "string", "boolean"]}
+                }
+            },
+            "tune-length": {"type": "integer", "minimum": 1},
             "training-control": {
                 "type": "object",
                 "required": ["method", "number", "repeats"],
                 "properties": {
                     "method": {"type": "string", "enum": _caret_train_control_methods()},
                     "number": {"type": "integer"},
-                    "repeats": {"type": "integer"}
+                    "repeats": {"type": "integer"},
+                    "search": {"type": "string", "enum": _caret_train_control_search()},
+                    "seed": {"type": "integer", "minimum": 0},
+                    "parallel": {
+                        "type": "object",
+                        "required": ["workers"],
+                        "properties": {
+                            "workers": {"type": "integer", "minimum": 1},
+                            "type": {"type": "string", "enum": _caret_train_parallel_cluster_types()}
+                        }
+                    }
                 }
             }
-        }
+        },
+        # either candidates are listed, or caret generates them
+        "not": {"required": ["tune-grid", "tune-length"]}
     }
 
 
 def _caret_train_available_training_methods() -> List[str]:
-    return ['C5.0']
+    # C5.0 and the tree methods of CARET_TREE_METHODS in operations.R.tree_export
+    return ['C5.0', 'C5.0Tree', 'rpart', 'rpart1SE', 'rpart2']
 
 
 def _caret_train_control_search() -> List[str]:
-    # TODO: not used for now...
+    # how caret generates 'tune-length' candidates: a regular grid or random points
     return ["grid", "random"]
 
 
+def _caret_train_preprocess_methods() -> List[str]:
+    # only the transforms that can be exported
+    return list(PREPROCESS_METHODS)
+
+
+def _caret_train_parallel_cluster_types() -> List[str]:
+    # FORK clusters are cheaper to start but only exist on unix-alikes
+    return ["FORK", "PSOCK"]
+
+
 def _caret_train_metrics() -> List[str]:
     # TODO: associate metrics with prediction problem type.
     # possible values are "RMSE" and "Rsquared" for regression and "Accuracy" and "Kappa" for classification
@@ -0,0 +1,49 @@
+class FakeRedisPipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, name, value, ex=None):
+        self.commands.append((name, value, ex))
+        return self
+
+    def execute(self):
+        return [self.client.set(name, value, ex=ex) for name, value, ex in self.commands]
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the part of the redis.StrictRedis client the
+    prediction cache uses. Values are kept as bytes, like Redis returns them;
+    expirations are recorded but never applied.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expirations = {}
+
+    def get(self, name):
+        return self.values.get(name)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, name, value, ex=None):
+        self.values[name] = value if isinstance(value, bytes) else str(value).encode('utf-8')
+
+        if ex is not None:
+            self.expirations[name] = ex
+
+        return True
+
+    def incr(self, name, amount=1):
+        value = int(self.values.get(name, b'0')) + amount
+        self.values[name] = str(value).encode('utf-8')
+        return value
+
+    def delete(self, *names):
+        return sum(self.values.pop(name, None) is not None for name in names)
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
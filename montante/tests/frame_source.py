@@ -0,0 +1,21 @@
+from montante.DatasourceWrapper import DatasourceWrapper
+
+
+class FrameSource(DatasourceWrapper):
+    """
+    Datasource over an in-memory dataframe, for the generic DatasourceWrapper
+    selection and sampling. Counts how many times it was read, and reports 'key'
+    as its cache key.
+    """
+
+    def __init__(self, df, key=None):
+        self.df = df
+        self.key = key
+        self.reads = 0
+
+    def to_df(self):
+        self.reads += 1
+        return self.df
+
+    def cache_key(self):
+        return self.key
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.files.arrow_cache import ArrowDatasetCache, ArrowCacheDatasourceWrapper
+
+
+class _CountingSource:
+
+    def __init__(self, df):
+        self.df = df
+        self.reads = 0
+
+    def to_df(self):
+        self.reads += 1
+        return self.df
+
+
+class TestArrowDatasetCache(BaseTest):
+
+    def setUp(self):
+        super()
+        self.iris_df = self._iris_dataset()
+        self.iris_df['target'] = self.iris_df['target'].astype('category')
+        self.iris_df['date'] = pd.date_range('2018-01-01', periods=len(self.iris_df))
+        self.directory = tempfile.mkdtemp()
+        self.cache = ArrowDatasetCache(self.directory, batch_size=40)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.cache.put('iris', self.iris_df)
+        df = self.cache.get('iris')
+        self.assertTrue(df.equals(self.iris_df))
+        self.assertEqual(str(df['target'].dtype), 'category')
+        self.assertEqual(list(self.cache.get('iris', ['target', 'date'])), ['target', 'date'])
+
+        with self.assertRaises(KeyError):
+            self.cache.get('iris', ['missing'])
+
+    def test_batches(self):
+        self.cache.put('iris', self.iris_df)
+        self.assertEqual([len(batch) for batch in self.cache.batches('iris')], [40, 40, 40, 30])
+
+    def test_mappings_closed(self):
+        self.cache.put('iris', self.iris_df)
+        opened = []
+        memory_map = pa.memory_map
+
+        def recording_memory_map(*args):
+            opened.append(memory_map(*args))
+            return opened[-1]
+
+        pa.memory_map = recording_memory_map
+
+        try:
+            self.cache.get('iris')
+            list(self.cache.batches('iris'))
+            ArrowCacheDatasourceWrapper(self.cache, 'iris').select(['target'], [['petal_width_cm', '>=', 1.0]])
+        finally:
+            pa.memory_map = memory_map
+
+        self.assertEqual(len(opened), 3)
+        self.assertTrue(all(source.closed for source in opened))
+
+    def test_wrapper_converts_source_once(self):
+        source = _CountingSource(self.iris_df)
+        wrapper = ArrowCacheDatasourceWrapper(self.cache, 'iris', source, columns=['target'])
+        wrapper.to_df()
+        df = wrapper.to_df()
+        self.assertEqual(source.reads, 1)
+        self.assertEqual(list(df['target']), list(self.iris_df['target']))
+
+    def test_select(self):
+        wrapper = ArrowCacheDatasourceWrapper(self.cache, 'iris', self.iris_df)
+        df = wrapper.select(['target'], [['petal_width_cm', '>=', 1.0]], limit=60)
+        expected = self.iris_df[self.iris_df['petal_width_cm'] >= 1.0][:60]
+        self.assertEqual(list(df['target']), list(expected['target']))
+        self.assertEqual(list(wrapper.select(['date'], limit=3)['date']), list(self.iris_df['date'][:3]))
+        # spans several record batches
+        self.assertEqual(list(wrapper.select(['target'], limit=100)['target']), list(self.iris_df['target'][:100]))
+
+    def test_missing_and_invalid_uuid(self):
+        self.assertFalse('iris' in self.cache)
+
+        with self.assertRaises(KeyError):
+            ArrowCacheDatasourceWrapper(self.cache, 'iris').to_df()
+
+        with self.assertRaises(ValueError):
+            self.cache.path('../iris')
+
+
+if __name__ == '__main__':
+    unittest.main()
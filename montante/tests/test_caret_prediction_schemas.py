@@ -54,3 +54,18 @@ class CaretTrainingSchemaTests(BaseTest):
         errors = use_validator(Draft4Validator(schema), payload)
         expected = ['properties', 'engine-parameters', 'properties', 'training-control', 'properties', 'method', 'enum']
         self.assertEqual(errors[0][0], expected)
+
+    def test_caret_training_parallel_control(self):
+        payload = self._create_payload()
+        payload['engine-parameters']['training-control']['parallel'] = {'workers': 4, 'type': 'PSOCK'}
+        schema = create_specific_training_schema('caret', 'C5.0')
+        self.assertEqual(use_validator(Draft4Validator(schema), payload), [])
+
+    def test_caret_training_error_parallel_workers_below_minimum(self):
+        payload = self._create_payload()
+        payload['engine-parameters']['training-control']['parallel'] = {'workers': 0}
+        schema = create_specific_training_schema('caret', 'C5.0')
+        errors = use_validator(Draft4Validator(schema), payload)
+        expected = ['properties', 'engine-parameters', 'properties', 'training-control', 'properties',
+                    'parallel', 'properties', 'workers', 'minimum']
+        self.assertEqual(errors[0][0], expected)
@@ -5,6 +5,8 @@ from rpy2.rinterface import RRuntimeError
 from montante.tests.BaseTest import BaseTest
 from montante.operations.train import training_operation
 from montante.operations.predict import prediction_operation
+from montante.operations.R.functions import r
+from montante.operations.R.caret_wrappers import caret_model_metadata
 
 
 class TestCaretTrainingAndPrediction(BaseTest):
@@ -14,6 +16,38 @@ class TestCaretTrainingAndPrediction(BaseTest):
         self.iris_df = self._iris_dataset()
         self.caret_c50 = training_operation(self.iris_df, self._iris_payload())
 
+    def test_training_filters_and_limit(self):
+        payload = self._iris_payload()
+        payload['filters'] = [['sepal_length_cm', '>', 4.5]]
+        payload['limit'] = 100
+        model = training_operation(self.iris_df, payload)
+        self.assertEqual(caret_model_metadata(model)['rows'], 100)
+
+    def test_training_sampling(self):
+        payload = self._iris_payload()
+        payload['sampling'] = {'method': 'stratified', 'seed': 1, 'size': 60}
+        metadata = caret_model_metadata(training_operation(self.iris_df, payload))
+        self.assertEqual(metadata['rows'], 60)
+        self.assertEqual(metadata['sampling'], {'method': 'stratified', 'seed': 1, 'size': 60,
+                                                'population': 150, 'rows': 60})
+
+    def test_training_parallel(self):
+        payload = self._iris_payload()
+        payload['engine-parameters']['training-control']['parallel'] = {'workers': 2, 'type': 'PSOCK'}
+        model = training_operation(self.iris_df, payload)
+        self.assertEqual(caret_model_metadata(model)['rows'], 150)
+
+        # the cluster is stopped and the sequential backend registered again
+        self.assertEqual(r('foreach::getDoParWorkers()')[0], 1)
+        p = prediction_operation(model, {
+            'petal_width_cm': [1, 1, 1],
+            'sepal_length_cm': [1, 1, 1],
+            'sepal_width_cm': [1, 1, 1],
+            'petal_length_cm': [1, 1, 1]
+        })
+
+        self.assertEqual(len(p), 3)
+
     def test_prediction_ok(self):
         p = prediction_operation(self.caret_c50, {
             'petal_width_cm': [1, 1, 1],
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.R.tuning import TuningCache, caret_tuning_key, caret_grid_search
+from montante.operations.dataframe.functions import pd_dataframe_fingerprint
+
+
+class TestCaretTuning(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.cache = TuningCache(self.directory)
+        self.iris_df = self._iris_dataset()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _payload(self, trials):
+        payload = self._iris_payload()
+        payload['engine-parameters']['tune-grid'] = [{'trials': n, 'model': 'tree', 'winnow': False} for n in trials]
+        payload['engine-parameters']['training-control']['seed'] = 1
+        return payload
+
+    def test_fingerprint(self):
+        fingerprint = pd_dataframe_fingerprint(self.iris_df)
+        self.assertEqual(fingerprint, pd_dataframe_fingerprint(self.iris_df.copy()))
+        self.assertNotEqual(fingerprint, pd_dataframe_fingerprint(self.iris_df.iloc[1:]))
+        self.assertNotEqual(fingerprint, pd_dataframe_fingerprint(self.iris_df.astype({'sepal_length_cm': 'float32'})))
+
+    def test_key(self):
+        payload = self._payload([5])
+        key = caret_tuning_key('abc', payload, {'trials': 5, 'model': 'tree'})
+        self.assertEqual(key, caret_tuning_key('abc', payload, {'model': 'tree', 'trials': 5.0}))
+        self.assertNotEqual(key, caret_tuning_key('abd', payload, {'trials': 5, 'model': 'tree'}))
+        self.assertNotEqual(key, caret_tuning_key('abc', payload, {'trials': 6, 'model': 'tree'}))
+
+        payload['engine-parameters']['training-control']['parallel'] = {'workers': 2}
+        self.assertEqual(key, caret_tuning_key('abc', payload, {'trials': 5, 'model': 'tree'}))
+
+    def test_cache(self):
+        self.assertIsNone(self.cache.get('abc'))
+        self.cache.put('abc', {'Accuracy': 0.9})
+        self.assertIn('abc', self.cache)
+        self.assertEqual(TuningCache(self.directory).get('abc'), {'Accuracy': 0.9})
+
+        with self.assertRaises(ValueError):
+            self.cache.get('../abc')
+
+    def test_invalid_payload(self):
+        payload = self._payload([5])
+        payload['engine-parameters']['tune-length'] = 3
+        self.assertNotEqual(caret_grid_search(self.iris_df, payload, cache=self.cache), [])
+
+    def test_overlapping_grid_is_cached(self):
+        results = caret_grid_search(self.iris_df, self._payload([1, 5]), cache=self.cache)
+        self.assertEqual(len(results), 2)
+        self.assertFalse(results['cached'].any())
+        self.assertTrue(results['Accuracy'].is_monotonic_decreasing)
+
+        results = caret_grid_search(self.iris_df, self._payload([5, 10]), cache=self.cache)
+        self.assertEqual(results.set_index('trials')['cached'].to_dict(), {5: True, 10: False})
+        self.assertEqual(list(results)[:3], ['model', 'trials', 'winnow'])
+
+    def test_tune_length(self):
+        payload = self._iris_payload()
+        payload['engine-parameters']['tune-length'] = 2
+        payload['engine-parameters']['training-control']['search'] = 'random'
+        results = caret_grid_search(self.iris_df, payload)
+        self.assertGreater(len(results), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.tests.frame_source import FrameSource
+from montante.operations.files.datasource import CSVDatasourceWrapper
+from montante.operations.dataframe.statistics import (DataFrameStatistics, FrequentItems, QuantileSketch,
+                                                      StatisticsCache, datasource_statistics,
+                                                      pd_batches_statistics)
+
+
+def _batches(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+class TestColumnStatistics(BaseTest):
+
+    def setUp(self):
+        super()
+        rng = np.random.RandomState(0)
+        x = rng.normal(10, 2, 5000)
+        x[::10] = np.nan
+        self.df = pd.DataFrame({
+            'x': x,
+            'n': rng.randint(0, 100, 5000),
+            'label': pd.Categorical(rng.choice(['a', 'b', 'c'], 5000, p=[0.6, 0.3, 0.1])),
+            'name': np.array(['v%d' % i for i in rng.randint(0, 1000, 5000)], dtype=object),
+            'date': pd.Timestamp('2018-01-01') + pd.to_timedelta(rng.randint(0, 365, 5000), unit='D')
+        }, columns=['x', 'n', 'label', 'name', 'date'])
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_numeric(self):
+        d = pd_batches_statistics(_batches(self.df, 700)).to_dict()
+        x = d['columns']['x']
+        self.assertEqual(d['rows'], 5000)
+        self.assertEqual(x['type'], 'numeric')
+        self.assertEqual(x['count'], 4500)
+        self.assertEqual(x['na_count'], 500)
+        self.assertAlmostEqual(x['mean'], self.df['x'].mean())
+        self.assertAlmostEqual(x['variance'], self.df['x'].var())
+        self.assertAlmostEqual(x['std'], self.df['x'].std())
+        self.assertEqual(x['min'], self.df['x'].min())
+        self.assertEqual(x['quantiles']['1.0'], self.df['x'].max())
+        self.assertEqual(d['columns']['n']['dtype'], 'int64')
+
+    def test_merge(self):
+        whole = DataFrameStatistics().update(self.df).to_dict()
+        first = DataFrameStatistics().update(self.df.iloc[:1234])
+        second = pickle.loads(pickle.dumps(DataFrameStatistics().update(self.df.iloc[1234:])))
+        merged = first.merge(second).to_dict()
+        self.assertEqual(merged['rows'], whole['rows'])
+
+        for name in ['x', 'n']:
+            for field in ['count', 'na_count', 'min', 'max']:
+                self.assertEqual(merged['columns'][name][field], whole['columns'][name][field])
+
+            self.assertAlmostEqual(merged['columns'][name]['mean'], whole['columns'][name]['mean'])
+            self.assertAlmostEqual(merged['columns'][name]['variance'], whole['columns'][name]['variance'])
+
+        self.assertEqual(merged['columns']['label'], whole['columns']['label'])
+
+    def test_sketch_quantiles(self):
+        values = np.random.RandomState(1).permutation(100000).astype(np.float64)
+        sketch = QuantileSketch()
+
+        for batch in np.array_split(values, 37):
+            sketch.update(batch)
+
+        self.assertEqual(sketch.count(), 100000)
+        self.assertLess(sum(len(level) for level in sketch.levels), 2000)
+
+        for q, estimate in zip([0.1, 0.5, 0.9], sketch.quantiles([0.1, 0.5, 0.9])):
+            self.assertLess(abs(estimate - q * 100000), 2000)
+
+    def test_sketch_exact_until_compacted(self):
+        sketch = QuantileSketch()
+        sketch.update(np.array([5.0, 1.0, 3.0, 2.0, 4.0]))
+        self.assertEqual(sketch.quantiles([0.0, 0.5, 1.0]), [1.0, 3.0, 5.0])
+        self.assertEqual(QuantileSketch().quantiles([0.5]), [None])
+
+    def test_frequent_items(self):
+        values = pd.Series(['a'] * 500 + ['b'] * 300 + ['c%d' % i for i in range(200)])
+        items = FrequentItems(k=4)
+
+        for batch in _batches(values, 90):
+            items.update(batch)
+
+        top = items.top(2)
+        self.assertEqual([value for value, _ in top], ['a', 'b'])
+        self.assertLessEqual(items.error, len(values) // 5)
+        self.assertGreaterEqual(top[0][1], 500 - items.error)
+        self.assertGreaterEqual(top[1][1], 300 - items.error)
+
+    def test_categorical_and_datetime(self):
+        d = pd_batches_statistics(_batches(self.df, 999)).to_dict(top=2)
+        label = d['columns']['label']
+        self.assertEqual(label['type'], 'categorical')
+        self.assertEqual(label['dtype'], 'category')
+        self.assertEqual([item['value'] for item in label['top']], ['a', 'b'])
+        self.assertEqual(label['top'][0]['count'], (self.df['label'] == 'a').sum())
+        self.assertEqual(label['top_error'], 0)
+
+        date = d['columns']['date']
+        self.assertEqual(date['type'], 'datetime')
+        self.assertEqual(date['min'], self.df['date'].min().isoformat())
+        self.assertEqual(date['max'], self.df['date'].max().isoformat())
+        self.assertNotIn('variance', date)
+        self.assertEqual(json.loads(json.dumps(d)), d)
+
+    def test_timedelta(self):
+        df = pd.DataFrame({'elapsed': pd.to_timedelta([90, None, 30, 60], unit='s')})
+        d = pd_batches_statistics(_batches(df, 3)).to_dict()
+        elapsed = d['columns']['elapsed']
+        self.assertEqual(elapsed['type'], 'timedelta')
+        self.assertEqual(elapsed['na_count'], 1)
+        self.assertEqual(elapsed['min'], pd.Timedelta(seconds=30).isoformat())
+        self.assertEqual(elapsed['mean'], pd.Timedelta(seconds=60).isoformat())
+        self.assertEqual(json.loads(json.dumps(d)), d)
+
+    def test_datasource_statistics_cache(self):
+        cache = StatisticsCache(self.directory)
+        source = FrameSource(self.df, key='frame-1')
+        statistics = datasource_statistics(source, cache, batch_size=1000)
+        self.assertEqual(datasource_statistics(source, cache, batch_size=1000), statistics)
+        self.assertEqual(source.reads, 1)
+
+        datasource_statistics(FrameSource(self.df), cache)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_csv_cache_key(self):
+        path = os.path.join(self.directory, 'data.csv')
+        self.df[['x', 'n']].to_csv(path, index=False)
+        source = CSVDatasourceWrapper(path)
+        key = source.cache_key()
+        self.assertEqual(CSVDatasourceWrapper(path).cache_key(), key)
+        self.assertNotEqual(CSVDatasourceWrapper(path, usecols=['x']).cache_key(), key)
+
+        self.df[['x', 'n']].iloc[:10].to_csv(path, index=False)
+        self.assertNotEqual(CSVDatasourceWrapper(path).cache_key(), key)
+
+        statistics = datasource_statistics(CSVDatasourceWrapper(path), StatisticsCache(self.directory))
+        self.assertEqual(statistics['rows'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
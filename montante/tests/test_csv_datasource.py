@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.files.datasource import CSVDatasourceWrapper
+
+
+class TestCSVDatasourceWrapper(BaseTest):
+
+    def setUp(self):
+        super()
+        self.iris_df = self._iris_dataset()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'iris.csv')
+        df = self.iris_df.copy()
+        df['date'] = ['01/%02d/2018 10:30' % (i % 28 + 1) for i in range(len(df))]
+        df.to_csv(self.path, index=False, sep=';')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_schema(self):
+        schema = CSVDatasourceWrapper(self.path).schema()
+        self.assertEqual(schema['sepal_length_cm'], 'float64')
+        self.assertEqual(schema['target'], 'category')
+        self.assertEqual(schema['date'], 'datetime64[ns]|%m/%d/%Y %H:%M')
+
+    def test_to_df(self):
+        df = CSVDatasourceWrapper(self.path, chunksize=40).to_df()
+        self.assertEqual(len(df), 150)
+        self.assertEqual(str(df['target'].dtype), 'category')
+        self.assertEqual(str(df['date'].dtype), 'datetime64[ns]')
+        self.assertEqual(list(df['target']), list(self.iris_df['target']))
+
+    def test_to_batches(self):
+        sizes = [len(batch) for batch in CSVDatasourceWrapper(self.path).to_batches(40)]
+        self.assertEqual(sizes, [40, 40, 40, 30])
+
+    def test_usecols(self):
+        source = CSVDatasourceWrapper(self.path, usecols=['target', 'petal_width_cm'])
+        self.assertEqual(list(source.to_df()), ['petal_width_cm', 'target'])
+
+        with self.assertRaises(ValueError):
+            CSVDatasourceWrapper(self.path, usecols=['missing'])
+
+    def test_select(self):
+        source = CSVDatasourceWrapper(self.path, chunksize=40)
+        df = source.select(['petal_width_cm', 'target'], [['sepal_length_cm', '>', 5.0]], limit=50)
+        expected = self.iris_df[self.iris_df['sepal_length_cm'] > 5.0][:50]
+        self.assertEqual(list(df), ['petal_width_cm', 'target'])
+        self.assertEqual(list(df['petal_width_cm']), list(expected['petal_width_cm']))
+        self.assertEqual(len(source.select(limit=5)), 5)
+        self.assertEqual(list(source.select(['target'], [['target', '==', 'none']])), ['target'])
+
+        with self.assertRaises(ValueError):
+            source.select(['missing'])
+
+    def test_dates_not_matching_the_sample(self):
+        path = os.path.join(self.directory, 'dates.csv')
+
+        with open(path, 'w') as f:
+            f.write('\n'.join(['x,date'] + ['%d,01/%02d/2018 10:30' % (i, i % 28 + 1) for i in range(30)] + ['30,soon']))
+
+        with self.assertRaises(ValueError):
+            CSVDatasourceWrapper(path, sample_rows=10).to_df()
+
+        df = CSVDatasourceWrapper(path, sample_rows=10, dtypes={'date': 'object'}).to_df()
+        self.assertEqual(df['date'].iloc[-1], 'soon')
+
+    def test_headerless(self):
+        path = os.path.join(self.directory, 'headerless.csv')
+        self.iris_df.to_csv(path, index=False, header=False)
+        df = CSVDatasourceWrapper(path).to_df()
+        self.assertEqual(list(df), ['V1', 'V2', 'V3', 'V4', 'V5'])
+        self.assertEqual(len(df), 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
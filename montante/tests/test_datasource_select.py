@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.tests.frame_source import FrameSource
+from montante.operations.train import training_operation
+from montante.operations.dataframe.functions import pd_select, pd_select_batches, pd_filter_columns
+
+
+class TestDatasourceSelect(BaseTest):
+
+    def setUp(self):
+        super()
+        self.df = pd.DataFrame({
+            'a': [1.0, np.nan, 3.0, 4.0, 5.0],
+            'b': ['x', 'y', None, 'x', 'z'],
+            'c': [10, 20, 30, 40, 50]
+        }, columns=['a', 'b', 'c'])
+
+    def test_missing_values_never_pass(self):
+        self.assertEqual(list(pd_select(self.df, filters=[['a', '!=', 3.0]])['c']), [10, 40, 50])
+        self.assertEqual(list(pd_select(self.df, filters=[['b', 'not in', ['x']]])['c']), [20, 50])
+
+    def test_projection_filters_and_limit(self):
+        df = pd_select(self.df, ['c', 'b'], [['a', '>=', 3.0], ['b', 'in', ['x', 'z']]], limit=1)
+        self.assertEqual(list(df), ['c', 'b'])
+        self.assertEqual(df.values.tolist(), [[40, 'x']])
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            pd_select(self.df, filters=[['a', 'like', 1]])
+
+    def test_null_values_are_rejected(self):
+        for filters in [[['b', '==', None]], [['b', 'in', ['x', None]]]]:
+            with self.assertRaises(ValueError):
+                pd_select(self.df, filters=filters)
+
+            payload = dict(self._iris_payload(), filters=filters)
+            self.assertGreater(len(training_operation(FrameSource(self._iris_dataset()), payload)), 0)
+
+    def test_membership_takes_a_list(self):
+        with self.assertRaises(ValueError):
+            pd_select(self.df, filters=[['b', 'in', 'x']])
+
+        payload = dict(self._iris_payload(), filters=[['target', 'in', 'setosa']])
+        self.assertGreater(len(training_operation(FrameSource(self._iris_dataset()), payload)), 0)
+        payload['filters'] = [['target', '==', ['setosa']]]
+        self.assertGreater(len(training_operation(FrameSource(self._iris_dataset()), payload)), 0)
+
+    def test_batches_stop_at_limit(self):
+        read = []
+
+        def batches():
+            for start in range(0, 5, 2):
+                read.append(start)
+                yield self.df.iloc[start:start + 2]
+
+        df = pd_select_batches(batches(), ['c'], [['c', '>', 10]], limit=2)
+        self.assertEqual(list(df['c']), [20, 30])
+        self.assertEqual(read, [0, 2])
+        self.assertEqual(list(pd_select_batches(batches(), ['c'], [['c', '>', 99]])), ['c'])
+        self.assertIsNone(pd_select_batches(iter([])))
+
+    def test_default_select(self):
+        df = FrameSource(self.df).select(['c'], [['a', '>', 1.0]], limit=2)
+        self.assertEqual(list(df['c']), [30, 40])
+
+    def test_invalid_filters_are_not_read(self):
+        payload = dict(self._iris_payload(), filters=[['sepal_length_cm', 'like', 1]])
+        source = FrameSource(self._iris_dataset())
+        source.to_df = None
+        errors = training_operation(source, payload)
+        self.assertIsInstance(errors, list)
+        self.assertGreater(len(errors), 0)
+
+    def test_filter_columns(self):
+        self.assertEqual(pd_filter_columns([['b', '==', 1], ['a', '<', 2], ['b', '!=', 3]]), ['b', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
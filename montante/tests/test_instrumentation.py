@@ -0,0 +1,84 @@
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.util.instrumentation import span, count, set_instrumentation_sink, instrumentation_enabled, \
+    HistogramSink, LoggingSink, PrometheusSink
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation
+
+
+class TestInstrumentation(BaseTest):
+
+    def setUp(self):
+        super()
+        self.previous = set_instrumentation_sink(None)
+
+    def tearDown(self):
+        set_instrumentation_sink(self.previous)
+
+    def test_disabled_is_a_no_op(self):
+        self.assertFalse(instrumentation_enabled())
+
+        with span('stage'):
+            count('rows', 10)
+
+    def test_histogram(self):
+        sink = HistogramSink(buckets=(0.5, 1.0))
+        set_instrumentation_sink(sink)
+
+        with span('stage'):
+            count('rows', 10)
+
+        sink.observe('stage', 0.75)
+        count('rows', 5)
+        snapshot = sink.snapshot()
+
+        self.assertEqual(snapshot['counters'], {'rows': 15})
+        self.assertEqual(snapshot['spans']['stage']['count'], 2)
+        self.assertEqual(snapshot['spans']['stage']['buckets'], [(0.5, 1), (1.0, 2), (float('inf'), 2)])
+
+    def test_span_timed_on_error(self):
+        sink = HistogramSink()
+        set_instrumentation_sink(sink)
+
+        with self.assertRaises(ValueError):
+            with span('stage'):
+                raise ValueError
+
+        self.assertEqual(sink.snapshot()['spans']['stage']['count'], 1)
+
+    def test_logging(self):
+        set_instrumentation_sink(LoggingSink())
+
+        with self.assertLogs('montante.instrumentation', level='DEBUG') as logs:
+            count('predict.rows', 3)
+
+        self.assertEqual(logs.output, ['DEBUG:montante.instrumentation:count predict.rows 3'])
+
+    def test_prometheus_exposition(self):
+        sink = PrometheusSink(buckets=(1.0,))
+        sink.observe('predict.r_predict', 0.25)
+        sink.count('predict.rows', 3)
+        text = sink.exposition()
+
+        self.assertIn('montante_span_seconds_bucket{span="predict.r_predict",le="1.0"} 1\n', text)
+        self.assertIn('montante_span_seconds_bucket{span="predict.r_predict",le="+Inf"} 1\n', text)
+        self.assertIn('montante_span_seconds_count{span="predict.r_predict"} 1\n', text)
+        self.assertIn('montante_predict_rows_total 3.0\n', text)
+
+    def test_pipeline_stages(self):
+        sink = HistogramSink()
+        set_instrumentation_sink(sink)
+        model = training_operation(self._iris_dataset(), self._iris_payload())
+        prediction_operation(model, self._iris_dataset().drop('target', axis=1).iloc[:5].to_dict('list'))
+        snapshot = sink.snapshot()
+
+        for stage in ['train.total', 'train.validation', 'train.conversion', 'train.formula', 'train.r_caret_train',
+                      'predict.conversion', 'predict.r_predict', 'predict.extract']:
+            self.assertIn(stage, snapshot['spans'])
+
+        self.assertEqual(snapshot['counters']['predict.rows'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation
+from montante.operations.R.caret_wrappers import caret_model_save_artifact, caret_model_load_artifact
+from montante.operations.R.model_store import ModelStore
+from montante.operations.files.artifact import (artifact_write, artifact_read, artifact_read_header,
+                                                artifact_iter_body, ArtifactError)
+
+
+class TestArtifactFormat(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'model')
+        self.body = os.urandom(1000) * 50
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        for compression in ['none', 'zlib', 'bz2', 'lzma', 'xz', False]:
+            artifact_write(self.path, {'engine': 'caret'}, self.body, compression)
+            header, body = artifact_read(self.path)
+            self.assertEqual(body, self.body)
+            self.assertEqual(header['engine'], 'caret')
+            self.assertEqual(header, artifact_read_header(self.path))
+
+    def test_compression(self):
+        header = artifact_write(self.path, {}, self.body, 'zlib')
+        self.assertLess(header['body_length'], len(self.body))
+
+    def test_streaming(self):
+        artifact_write(self.path, {}, self.body, 'lzma')
+        chunks = artifact_iter_body(self.path, chunk_size=4096)
+        self.assertEqual(next(chunks)['compression'], 'lzma')
+        self.assertEqual(b''.join(chunks), self.body)
+
+    def test_corrupt_body(self):
+        artifact_write(self.path, {}, self.body, 'none')
+
+        with open(self.path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'\0' if self.body[-1:] != b'\0' else b'\1')
+
+        with self.assertRaises(ArtifactError):
+            artifact_read(self.path)
+
+    def test_not_an_artifact(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'RDS3' * 10)
+
+        with self.assertRaises(ArtifactError):
+            artifact_read_header(self.path)
+
+
+class TestCaretModelArtifact(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.caret_c50 = training_operation(self._iris_dataset(), self._iris_payload())
+        self.data = {
+            'petal_width_cm': [1, 1, 1],
+            'sepal_length_cm': [1, 1, 1],
+            'sepal_width_cm': [1, 1, 1],
+            'petal_length_cm': [1, 1, 1]
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.directory, 'c50.model')
+        header = caret_model_save_artifact(self.caret_c50, path)
+        self.assertEqual(header['method'], 'C5.0')
+        self.assertEqual(header['metadata']['target'], 'target')
+        self.assertEqual(header['column_info']['petal_width_cm'], 'float64')
+        self.assertEqual(prediction_operation(caret_model_load_artifact(path), self.data),
+                         prediction_operation(self.caret_c50, self.data))
+
+    def test_store_header(self):
+        store = ModelStore(self.directory)
+        model_uuid = store.save(self.caret_c50)
+        self.assertEqual(sorted(store.header(model_uuid)['predictors']), sorted(self.data))
+        self.assertIsNone(store.header(model_uuid)['preprocess'])
+
+    def test_preprocess_in_header(self):
+        payload = self._iris_payload()
+        payload['engine-parameters']['preprocess'] = ['center', 'scale']
+        header = caret_model_save_artifact(training_operation(self._iris_dataset(), payload),
+                                           os.path.join(self.directory, 'scaled.model'))
+        center = header['preprocess']['parameters']['center']
+        means = self._iris_dataset()[center['columns']].mean()
+        self.assertTrue(np.allclose(center['mean'], means.values))
+
+
+if __name__ == '__main__':
+    unittest.main()
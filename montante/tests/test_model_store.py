@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation_from_store
+from montante.operations.R.model_store import ModelStore
+
+
+class TestModelStore(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.caret_c50 = training_operation(self._iris_dataset(), self._iris_payload())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _prediction_payload(self, model_uuid):
+        return {
+            'model_uuid': model_uuid,
+            'data': {
+                'petal_width_cm': [1, 1, 1],
+                'sepal_length_cm': [1, 1, 1],
+                'sepal_width_cm': [1, 1, 1],
+                'petal_length_cm': [1, 1, 1]
+            }
+        }
+
+    def test_hit_after_save(self):
+        store = ModelStore(self.directory)
+        model_uuid = store.save(self.caret_c50)
+        p = prediction_operation_from_store(store, self._prediction_payload(model_uuid))
+        self.assertEqual(len(p), 3)
+        self.assertEqual(store.stats()['hits'], 1)
+        self.assertEqual(store.stats()['misses'], 0)
+
+    def test_miss_loads_from_disk(self):
+        model_uuid = ModelStore(self.directory, compress='xz').save(self.caret_c50)
+        store = ModelStore(self.directory)
+        p = prediction_operation_from_store(store, self._prediction_payload(model_uuid))
+        self.assertEqual(len(p), 3)
+        self.assertEqual(store.stats()['misses'], 1)
+
+    def test_eviction(self):
+        store = ModelStore(self.directory, max_models=1)
+        first = store.save(self.caret_c50)
+        store.save(self.caret_c50)
+        self.assertEqual(store.stats()['evictions'], 1)
+        self.assertEqual(store.stats()['cached'], 1)
+        self.assertIn(first, store)
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            ModelStore(self.directory).get('unknown')
+
+    def test_invalid_payload(self):
+        errors = prediction_operation_from_store(ModelStore(self.directory), {'data': {}})
+        self.assertEqual(errors[0], (['required'], "'model_uuid' is a required property"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.native.preprocess import NativePreprocess, yeojohnson
+
+
+class TestNativePreprocess(BaseTest):
+
+    def setUp(self):
+        super()
+        self.df = pd.DataFrame({
+            'a': [1.0, 2.0, 3.0, np.nan],
+            'b': [10.0, 20.0, 30.0, 40.0],
+            'c': ['x', 'y', 'x', 'y']
+        }, columns=['a', 'b', 'c'])
+        self.parameters = {
+            'center': {'columns': ['a', 'b'], 'mean': [2.0, 25.0]},
+            'scale': {'columns': ['a', 'b'], 'std': [1.0, 10.0]},
+            'range': {'columns': ['a'], 'min': [-1.0], 'max': [1.0], 'bounds': [0.0, 1.0]},
+            'pca': {'columns': ['a', 'b'], 'components': ['PC1'], 'rotation': [0.5, 0.5]}
+        }
+
+    def test_yeojohnson(self):
+        X = np.array([[-2.0, 0.0, 3.0, np.nan]]).T
+        self.assertTrue(np.allclose(yeojohnson(X, np.array([1.0]))[:3, 0], [-2.0, 0.0, 3.0]))
+        self.assertTrue(np.allclose(yeojohnson(X, np.array([0.0]))[:3, 0], [-(9 - 1) / 2.0, 0.0, np.log(4)]))
+        self.assertTrue(np.allclose(yeojohnson(X, np.array([2.0]))[:3, 0], [-np.log(3), 0.0, (16 - 1) / 2.0]))
+        self.assertTrue(np.isnan(yeojohnson(X, np.array([0.5]))[3, 0]))
+
+    def test_transforms_in_caret_order(self):
+        pp = NativePreprocess(['pca', 'scale', 'center'], self.parameters)
+        self.assertEqual(pp.method, ['center', 'scale', 'pca'])
+
+        df = NativePreprocess(['center', 'scale', 'range'], self.parameters).transform(self.df)
+        self.assertEqual(list(df), ['c', 'a', 'b'])
+        self.assertTrue(np.allclose(df['a'].values[:3], [0.0, 0.5, 1.0]))
+        self.assertTrue(np.isnan(df['a'].values[3]))
+        self.assertTrue(np.allclose(df['b'].values, [-1.5, -0.5, 0.5, 1.5]))
+
+        df = pp.transform(self.df)
+        self.assertEqual(list(df), ['c', 'PC1'])
+        self.assertTrue(np.allclose(df['PC1'].values[:3], [-1.25, -0.25, 0.75]))
+
+    def test_input_columns(self):
+        pp = NativePreprocess(['center', 'pca'], self.parameters)
+        self.assertEqual(pp.input_columns(['PC1', 'd']), ['a', 'b', 'd'])
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            NativePreprocess(['knnImpute'], self.parameters)
+
+    def test_round_trip(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, 'preprocess.json')
+            pp = NativePreprocess(['center', 'scale', 'pca'], self.parameters)
+            pp.save(path)
+            self.assertTrue(NativePreprocess.load(path).transform(self.df).equals(pp.transform(self.df)))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
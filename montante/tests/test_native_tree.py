@@ -0,0 +1,165 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.train import training_operation
+from montante.operations.R.functions import r_convert_pandas_dataframe, r_rpart, r_formula
+from montante.operations.R.tree_export import r_tree_export, native_tree_parity
+from montante.operations.native.tree import NativeTree, native_tree_from_c50, native_tree_from_rpart
+from montante.operations.native.preprocess import NativePreprocess
+
+C50_TREE = '''id="See5/C5.0 2.07 GPL Edition 2018-02-09"
+entries="1"
+type="2" class="setosa" freq="50,50,50" att="petal_length_cm" forks="3" cut="1.9"
+type="0" class="setosa"
+type="0" class="setosa" freq="50,0,0"
+type="2" class="versicolor" freq="0,50,50" att="petal_width_cm" forks="3"
+\t cut="1.7"
+type="0" class="versicolor"
+type="0" class="versicolor" freq="0,49,5"
+type="0" class="virginica" freq="0,1,45"
+'''
+
+C50_NAMES = '''outcome.
+outcome: setosa,versicolor,virginica.
+petal_length_cm: continuous.
+petal_width_cm: continuous.
+'''
+
+CLASSES = ['setosa', 'versicolor', 'virginica']
+
+
+class TestNativeTree(BaseTest):
+
+    def setUp(self):
+        super()
+        self.df = pd.DataFrame({
+            'petal_length_cm': [1.0, 3.0, 5.0, np.nan],
+            'petal_width_cm': [0.2, 1.0, 2.0, 1.0],
+            'sepal_length_cm': [5.0, 5.0, 6.0, 5.0]
+        })
+
+    def test_c50(self):
+        tree = native_tree_from_c50(C50_TREE, C50_NAMES, CLASSES)
+        self.assertEqual(list(tree.predict(self.df)), ['setosa', 'versicolor', 'virginica', 'versicolor'])
+        proba = tree.predict_proba(self.df)
+        self.assertTrue(np.allclose(proba.sum(axis=1), 1))
+        # a missing value goes down every branch, weighted by its training cases
+        self.assertAlmostEqual(proba['setosa'][3], 50 / 150.0)
+
+    def test_c50_boosted(self):
+        with self.assertRaises(NotImplementedError):
+            native_tree_from_c50(C50_TREE.replace('entries="1"', 'entries="10"'), C50_NAMES, CLASSES)
+
+    def test_rpart_surrogates(self):
+        frame = {
+            'node': [1, 2, 3],
+            'var': ['petal_length_cm', '<leaf>', '<leaf>'],
+            'n': [100, 50, 50],
+            'wt': [100, 50, 50],
+            'yval': [1, 1, 2],
+            'yprob': [[0.5, 0.5, 0], [1, 0, 0], [0, 1, 0]],
+            'ncompete': [0, 0, 0],
+            'nsurrogate': [1, 0, 0]
+        }
+        splits = {'var': ['petal_length_cm', 'sepal_length_cm'], 'ncat': [-1, 1], 'index': [2.45, 5.5]}
+        tree = native_tree_from_rpart(frame, splits, None, CLASSES)
+        self.assertEqual(list(tree.predict(self.df)), ['setosa', 'versicolor', 'versicolor', 'versicolor'])
+
+    def test_rpart_categorical_surrogates(self):
+        frame = {
+            'node': [1, 2, 3],
+            'var': ['petal_length_cm', '<leaf>', '<leaf>'],
+            'n': [100, 50, 50],
+            'wt': [100, 60, 40],
+            'yval': [1, 1, 2],
+            'yprob': [[0.5, 0.5, 0], [1, 0, 0], [0, 1, 0]],
+            'ncompete': [0, 0, 0],
+            'nsurrogate': [2, 0, 0]
+        }
+        splits = {'var': ['petal_length_cm', 'size', 'sepal_length_cm'], 'ncat': [-1, 3, 1],
+                  'index': [2.45, 1, 5.5]}
+        # small goes left, large right, medium was not present at the node and falls through to sepal_length_cm
+        csplit = np.array([[1, 2, 3]])
+        df = pd.DataFrame({
+            'petal_length_cm': [np.nan] * 4,
+            'size': ['small', 'large', 'medium', None],
+            'sepal_length_cm': [5.0, 6.0, 5.0, 6.0]
+        })
+        tree = native_tree_from_rpart(frame, splits, csplit, CLASSES, {'size': ['small', 'medium', 'large']})
+        expected = ['setosa', 'versicolor', 'versicolor', 'setosa']
+        self.assertEqual(list(tree.predict(df)), expected)
+        self.assertEqual(list(NativeTree.from_dict(tree.to_dict()).predict(df)), expected)
+
+    def test_round_trip(self):
+        tree = native_tree_from_c50(C50_TREE, C50_NAMES, CLASSES)
+        copy = NativeTree.from_dict(tree.to_dict())
+        self.assertEqual(list(copy.predict(self.df)), list(tree.predict(self.df)))
+
+    def test_preprocessed_features(self):
+        # thresholds of a tree fitted on centered and scaled data
+        tree = native_tree_from_c50(C50_TREE.replace('cut="1.9"', 'cut="-1"').replace('cut="1.7"', 'cut="0.5"'),
+                                    C50_NAMES, CLASSES)
+        tree.preprocess = NativePreprocess(['center', 'scale'], {
+            'center': {'columns': ['petal_length_cm', 'petal_width_cm'], 'mean': [3.9, 1.2]},
+            'scale': {'columns': ['petal_length_cm', 'petal_width_cm'], 'std': [1.9, 1.0]}
+        })
+        expected = ['setosa', 'versicolor', 'virginica', 'versicolor']
+        self.assertEqual(list(tree.predict(self.df)), expected)
+        self.assertEqual(list(NativeTree.from_dict(tree.to_dict()).predict(self.df)), expected)
+
+
+class TestTreeExportParity(BaseTest):
+
+    def setUp(self):
+        super()
+        self.iris_df = self._iris_dataset()
+        self.predictors = self._iris_payload()['predictors']
+
+    def _payload(self, method):
+        payload = self._iris_payload()
+        payload['engine-parameters']['method'] = method
+        return payload
+
+    def test_caret_c50_tree(self):
+        model = training_operation(self.iris_df, self._payload('C5.0Tree'))
+        tree = r_tree_export(model)
+        self.assertEqual(native_tree_parity(model, tree, self.iris_df[self.predictors])['parity'], 1.0)
+
+    def test_caret_rpart(self):
+        model = training_operation(self.iris_df, self._payload('rpart'))
+        tree = r_tree_export(model)
+        self.assertEqual(native_tree_parity(model, tree, self.iris_df[self.predictors])['parity'], 1.0)
+
+    def test_caret_c50_tree_with_preprocessing(self):
+        payload = self._payload('C5.0Tree')
+        payload['engine-parameters']['preprocess'] = ['center', 'scale', 'pca']
+        model = training_operation(self.iris_df, payload)
+        tree = r_tree_export(model)
+        self.assertEqual(tree.preprocess.method, ['center', 'scale', 'pca'])
+        self.assertEqual(native_tree_parity(model, tree, self.iris_df[self.predictors])['parity'], 1.0)
+
+    def test_rpart_with_missing_values(self):
+        rdf = r_convert_pandas_dataframe(self.iris_df)
+        model = r_rpart(r_formula(rdf, 'target', self.predictors), rdf)
+        df = self.iris_df[self.predictors].copy()
+        df.iloc[::7, 2] = np.nan
+        self.assertEqual(native_tree_parity(model, r_tree_export(model), df)['parity'], 1.0)
+
+    def test_rpart_with_factor_surrogate(self):
+        iris_df = self.iris_df.copy()
+        iris_df['petal_size'] = pd.cut(iris_df['petal_length_cm'], [0, 2.5, 5, 10], labels=['small', 'medium', 'large'])
+        predictors = self.predictors + ['petal_size']
+        rdf = r_convert_pandas_dataframe(iris_df)
+        model = r_rpart(r_formula(rdf, 'target', predictors), rdf)
+        tree = r_tree_export(model)
+        self.assertTrue((tree.surrogate_branch_start >= 0).any())
+        df = iris_df[predictors].copy()
+        df.iloc[::3, [2, 3]] = np.nan
+        self.assertEqual(native_tree_parity(model, tree, df)['parity'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
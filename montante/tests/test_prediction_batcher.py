@@ -0,0 +1,59 @@
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation
+from montante.operations.predict.batching import PredictionBatcher
+
+
+class _MissingModelStore:
+
+    def get(self, model_uuid):
+        raise KeyError(model_uuid)
+
+
+class _DictModelStore:
+
+    def __init__(self, models):
+        self.models = models
+
+    def get(self, model_uuid):
+        return self.models[model_uuid]
+
+
+class TestPredictionBatcher(BaseTest):
+
+    def test_full_group_is_not_held_back(self):
+        batcher = PredictionBatcher(_MissingModelStore(), max_batch_size=2, max_wait=30.0)
+        waiting = batcher.submit('a', {'x': [1.0]})
+        full = batcher.submit('b', {'x': [1.0, 2.0]})
+
+        self.assertIsInstance(full.exception(timeout=5), KeyError)
+        self.assertFalse(waiting.done())
+
+        batcher.close()
+        self.assertIsInstance(waiting.exception(timeout=5), KeyError)
+        self.assertEqual(batcher.stats()['batches'], 2)
+
+
+    def test_coalesced_predictions_are_split_back(self):
+        iris_df = self._iris_dataset()
+        model = training_operation(iris_df, self._iris_payload())
+        predictors = self._iris_payload()['predictors']
+        requests = [iris_df.iloc[rows][predictors].reset_index(drop=True)
+                    for rows in [[0, 1], [50, 51, 52], [100, 101]]]
+
+        # the first two requests fill a batch, the last one waits for close
+        batcher = PredictionBatcher(_DictModelStore({'m': model}), max_batch_size=5, max_wait=30.0)
+        futures = [batcher.submit('m', df) for df in requests]
+        batcher.close()
+
+        for df, future in zip(requests, futures):
+            self.assertEqual(future.result(timeout=5), prediction_operation(model, df))
+
+        self.assertEqual(batcher.stats()['batches'], 2)
+        self.assertEqual(batcher.stats()['requests'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.tests.fake_redis import FakeRedis
+from montante.operations.predict.cache import pd_row_hashes, cached_rows_prediction, \
+    LocalPredictionCache, RedisPredictionCache
+from montante.operations.R.model_store import ModelStore
+
+
+class CountingPredictor:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, df):
+        self.calls.append(len(df))
+        return [(int(a), 'class%d' % b) for a, b in zip(df['a'], df['b'])]
+
+
+class TestPredictionCache(BaseTest):
+
+    def setUp(self):
+        super()
+        self.df = pd.DataFrame({'a': [1, 2, 1, 3], 'b': [4, 5, 4, 6]})
+
+    def test_row_hashes_ignore_column_order(self):
+        hashes = pd_row_hashes(self.df)
+        self.assertEqual(hashes.tolist(), pd_row_hashes(self.df[['b', 'a']]).tolist())
+        self.assertEqual(hashes[0], hashes[2])
+        self.assertNotEqual(hashes[0], hashes[1])
+
+    def test_distinct_misses_predicted_once(self):
+        cache = LocalPredictionCache()
+        predict = CountingPredictor()
+        expected = [(1, 'class4'), (2, 'class5'), (1, 'class4'), (3, 'class6')]
+
+        self.assertEqual(cached_rows_prediction(cache, 'm', self.df, predict), expected)
+        self.assertEqual(predict.calls, [3])
+
+        self.assertEqual(cached_rows_prediction(cache, 'm', self.df, predict), expected)
+        self.assertEqual(predict.calls, [3])
+        self.assertEqual(cache.stats()['hits'], 4)
+        self.assertEqual(cache.stats()['misses'], 4)
+        self.assertEqual(cache.stats()['hit_ratio'], 0.5)
+
+    def test_models_do_not_share_entries(self):
+        cache = LocalPredictionCache()
+        predict = CountingPredictor()
+        cached_rows_prediction(cache, 'm1', self.df, predict)
+        cached_rows_prediction(cache, 'm2', self.df, predict)
+        self.assertEqual(predict.calls, [3, 3])
+
+    def test_lru_eviction(self):
+        cache = LocalPredictionCache(max_rows=2)
+        predict = CountingPredictor()
+
+        # rows stored in separate calls, so that the least recently used one is known
+        cached_rows_prediction(cache, 'm', self.df.iloc[[0]], predict)
+        cached_rows_prediction(cache, 'm', self.df.iloc[[1]], predict)
+        cached_rows_prediction(cache, 'm', self.df.iloc[[0]], predict)
+        cached_rows_prediction(cache, 'm', self.df.iloc[[3]], predict)
+        self.assertEqual(predict.calls, [1, 1, 1])
+        self.assertEqual(cache.stats()['rows'], 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        # the second row was the least recently used one
+        cached_rows_prediction(cache, 'm', self.df.iloc[[0, 3]], predict)
+        self.assertEqual(predict.calls, [1, 1, 1])
+        cached_rows_prediction(cache, 'm', self.df.iloc[[1]], predict)
+        self.assertEqual(predict.calls, [1, 1, 1, 1])
+
+    def test_invalidation_on_model_replacement(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            store = ModelStore(directory)
+            cache = LocalPredictionCache()
+            cache.attach(store)
+            predict = CountingPredictor()
+
+            cached_rows_prediction(cache, 'm', self.df, predict)
+            store.delete('m')
+            cached_rows_prediction(cache, 'm', self.df, predict)
+
+            self.assertEqual(predict.calls, [3, 3])
+            self.assertEqual(cache.stats()['invalidations'], 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_replacement_during_prediction(self):
+        cache = LocalPredictionCache()
+        predict = CountingPredictor()
+
+        def replacing_predict(df):
+            # the model is replaced after lookup, these predictions come from the old one
+            cache.invalidate('m')
+            return predict(df)
+
+        cached_rows_prediction(cache, 'm', self.df, replacing_predict)
+        cached_rows_prediction(cache, 'm', self.df, predict)
+        self.assertEqual(predict.calls, [3, 3])
+
+    def test_none_predictions_are_cached(self):
+        for cache in [LocalPredictionCache(), RedisPredictionCache(FakeRedis())]:
+            calls = []
+
+            def predict(df):
+                calls.append(len(df))
+                return [None] * len(df)
+
+            self.assertEqual(cached_rows_prediction(cache, 'm', self.df, predict), [None] * 4)
+            self.assertEqual(cached_rows_prediction(cache, 'm', self.df, predict), [None] * 4)
+            self.assertEqual(calls, [3])
+
+    def test_redis_backend(self):
+        client = FakeRedis()
+        cache = RedisPredictionCache(client, ttl=60)
+        predict = CountingPredictor()
+        expected = cached_rows_prediction(cache, 'm', self.df, predict)
+
+        self.assertEqual(cached_rows_prediction(RedisPredictionCache(client), 'm', self.df, predict), expected)
+        self.assertEqual(predict.calls, [3])
+        self.assertEqual(set(client.expirations.values()), {60})
+
+        cache.invalidate('m')
+        cached_rows_prediction(cache, 'm', self.df, predict)
+        self.assertEqual(predict.calls, [3, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from montante.tests.BaseTest import BaseTest
+from montante.schemas.columnar import validate_column_batch, filter_column_batch
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation_with_checks
+
+
+class TestColumnBatchValidation(BaseTest):
+
+    def _column_info(self):
+        return {'width': 'float64', 'count': 'int64', 'color': 'object'}
+
+    def test_valid_batch(self):
+        validation = validate_column_batch({
+            'width': [1.5, 2, 3],
+            'count': [1, 2, 3],
+            'color': ['red', 'blue', 'red']
+        }, self._column_info(), {'color': ['blue', 'red']})
+        self.assertTrue(validation.is_valid())
+        self.assertEqual(validation.error_list(), [])
+
+    def test_row_masks(self):
+        validation = validate_column_batch({
+            'width': [1.5, 'a', 3],
+            'count': [1, 2.5, None],
+            'color': ['red', 'blue', 'green']
+        }, self._column_info(), {'color': ['blue', 'red']})
+        self.assertEqual(list(validation.row_errors['width']), [False, True, False])
+        self.assertEqual(list(validation.row_errors['count']), [False, True, True])
+        self.assertEqual(list(validation.row_errors['color']), [False, False, True])
+        self.assertEqual(list(validation.invalid_rows()), [1, 2])
+
+    def test_missing_and_unknown_columns(self):
+        validation = validate_column_batch({'width': [1], 'count': [1], 'size': [1]}, self._column_info())
+        self.assertEqual(validation.error_list()[0], (['data', 'required'], "'color' is a required property"))
+        self.assertEqual(validation.error_list()[1], (['data', 'additionalProperties'], "'size' is not a model column"))
+
+    def test_unequal_lengths(self):
+        validation = validate_column_batch({'width': [1, 2], 'count': [1], 'color': ['red']}, self._column_info())
+        self.assertFalse(validation.is_valid())
+        self.assertEqual(validation.errors[0][0], ['data', 'length'])
+
+    def test_filter_restores_dtypes(self):
+        data = {'width': [1.5, 'a', 3.0], 'count': [1, 2, 3], 'color': ['red', 'blue', 'red']}
+        columns = filter_column_batch(data, validate_column_batch(data, self._column_info()))
+        self.assertEqual(columns['width'].dtype, np.float64)
+        self.assertEqual(list(columns['count']), [1, 3])
+
+
+class TestPredictionWithChecks(BaseTest):
+
+    def setUp(self):
+        super()
+        self.caret_c50 = training_operation(self._iris_dataset(), self._iris_payload())
+
+    def test_bad_type_rejected_before_r(self):
+        errors = prediction_operation_with_checks(self.caret_c50, {
+            'petal_width_cm': ["a", "b", "c"],
+            'sepal_length_cm': [1, 1, 1],
+            'sepal_width_cm': [1, 1, 1],
+            'petal_length_cm': [1, 1, 1]
+        })
+        self.assertEqual(errors, [(['data', 'petal_width_cm'], 'invalid values at rows [0, 1, 2]')])
+
+    def test_bad_rows_filtered(self):
+        p = prediction_operation_with_checks(self.caret_c50, {
+            'petal_width_cm': [1, "b", 1],
+            'sepal_length_cm': [1, 1, 1],
+            'sepal_width_cm': [1, 1, 1],
+            'petal_length_cm': [1, 1, 1]
+        }, invalid='filter')
+        self.assertEqual(len(p), 3)
+        self.assertIsNone(p[1])
+        self.assertIsNotNone(p[0])
+
+    def test_column_missing(self):
+        errors = prediction_operation_with_checks(self.caret_c50, {
+            'sepal_length_cm': [1, 1, 1],
+            'sepal_width_cm': [1, 1, 1],
+            'petal_length_cm': [1, 1, 1]
+        }, invalid='filter')
+        self.assertEqual(errors[0], (['data', 'required'], "'petal_width_cm' is a required property"))
+
+
+if __name__ == '__main__':
+    unittest.main()
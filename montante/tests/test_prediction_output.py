@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.train import training_operation
+from montante.operations.predict import prediction_operation
+from montante.operations.predict.output import prediction_output
+from montante.operations.R.functions import (r,
+                                             r_codes_to_labels,
+                                             r_factor_vector_from_codes,
+                                             r_extract_prediction_pairs,
+                                             r_extract_prediction_columns)
+
+
+class TestPredictionOutput(BaseTest):
+
+    def setUp(self):
+        super()
+        self.data = {
+            'petal_width_cm': [0.2, 1.3, 2.1],
+            'sepal_length_cm': [5.1, 6.0, 6.9],
+            'sepal_width_cm': [3.5, 2.8, 3.1],
+            'petal_length_cm': [1.4, 4.3, 5.8]
+        }
+
+    def test_codes_to_labels(self):
+        levels = np.array(['a', 'b', 'c'], dtype=object)
+        self.assertEqual(r_codes_to_labels(np.array([3, 1, 1], dtype=np.int32), levels).tolist(), ['c', 'a', 'a'])
+        self.assertEqual(r_codes_to_labels(np.array([2, np.iinfo(np.int32).min], dtype=np.int32), levels).tolist(),
+                         ['b', None])
+
+    def test_factor_columns(self):
+        p = r_factor_vector_from_codes(np.array([1, 0, -1, 1]), ['x', 'y'])
+        columns = r_extract_prediction_columns(p)
+        self.assertEqual(columns['index'].tolist()[:2], [2, 1])
+        self.assertEqual(columns['label'].tolist(), ['y', 'x', None, 'y'])
+        self.assertEqual(r_extract_prediction_pairs(r_factor_vector_from_codes(np.array([1, 0]), ['x', 'y'])),
+                         [(2, 'y'), (1, 'x')])
+
+    def test_regression_columns(self):
+        columns = r_extract_prediction_columns(r('c(1.5, NA, 3)'))
+        self.assertEqual(columns['value'][0], 1.5)
+        self.assertTrue(np.isnan(columns['value'][1]))
+
+    def test_arrow_output(self):
+        columns = {
+            'index': np.array([2, np.iinfo(np.int32).min, 1], dtype=np.int32),
+            'label': np.array(['y', None, 'x'], dtype=object),
+            'levels': np.array(['x', 'y'], dtype=object)
+        }
+        df = prediction_output(columns, 'arrow').to_pandas()
+        self.assertEqual(list(df), ['index', 'label'])
+        self.assertEqual(df['label'].isnull().tolist(), [False, True, False])
+        self.assertEqual(df['label'].astype(object)[[0, 2]].tolist(), ['y', 'x'])
+
+    def test_unknown_output(self):
+        with self.assertRaises(ValueError):
+            prediction_output({'value': np.zeros(1)}, 'xml')
+
+    def test_prediction_formats_agree(self):
+        model = training_operation(self._iris_dataset(), self._iris_payload())
+        pairs = prediction_operation(model, self.data)
+        columns = prediction_operation(model, self.data, output='columns')
+        table = prediction_operation(model, self.data, output='arrow')
+
+        self.assertEqual(pairs, list(zip(columns['index'].tolist(), columns['label'].tolist())))
+        self.assertEqual(table.num_rows, 3)
+
+    def test_probabilities(self):
+        model = training_operation(self._iris_dataset(), self._iris_payload())
+        columns = prediction_operation(model, self.data, output='columns', type='prob')
+
+        self.assertEqual(columns['probabilities'].shape, (3, 3))
+        self.assertEqual(columns['classes'], ['setosa', 'versicolor', 'virginica'])
+        np.testing.assert_allclose(columns['probabilities'].sum(axis=1), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
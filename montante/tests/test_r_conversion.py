@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.R.functions import (r,
+                                             r_convert_pandas_dataframe,
+                                             r_dataframe_column_types,
+                                             r_dataframe_column_names)
+
+
+class TestRConversion(BaseTest):
+
+    def _is_na(self, rdf, name):
+        return list(r('function(df, name) is.na(df[[name]])')(rdf, name))
+
+    def test_iris_column_types(self):
+        rdf = r_convert_pandas_dataframe(self._iris_dataset())
+        types = dict(zip(r_dataframe_column_names(rdf), r_dataframe_column_types(rdf)))
+        self.assertEqual(types['sepal_length_cm'], 'numeric')
+        self.assertEqual(types['target'], 'factor')
+        self.assertEqual(list(rdf.rx2('target').levels), ['setosa', 'versicolor', 'virginica'])
+
+    def test_numeric_na(self):
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': [1.5, np.nan, 3.0]}))
+        self.assertEqual(self._is_na(rdf, 'x'), [False, True, False])
+        self.assertEqual(list(rdf.rx2('x'))[0], 1.5)
+
+    def test_object_na(self):
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': ['b', None, 'a']}))
+        self.assertEqual(r_dataframe_column_types(rdf), ['factor'])
+        self.assertEqual(list(rdf.rx2('x').levels), ['a', 'b'])
+        self.assertEqual(self._is_na(rdf, 'x'), [False, True, False])
+
+    def test_object_levels_follow_r_collation(self):
+        # the order of mixed-case levels depends on the locale, R's factor() is the reference
+        values = ['b', 'B', 'a', 'A', 'b']
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': values}))
+        self.assertEqual(list(rdf.rx2('x').levels), list(r('levels(factor(c("b", "B", "a", "A", "b")))')))
+        self.assertEqual(list(r('as.character')(rdf.rx2('x'))), values)
+
+    def test_bool(self):
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': [True, False, True]}))
+        self.assertEqual(r_dataframe_column_types(rdf), ['logical'])
+        self.assertEqual(list(rdf.rx2('x')), [True, False, True])
+
+    def test_category(self):
+        series = pd.Series(['low', 'high', None, 'low'], dtype='category')
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': series}))
+        self.assertEqual(r_dataframe_column_types(rdf), ['factor'])
+        self.assertEqual(list(rdf.rx2('x').levels), ['high', 'low'])
+        self.assertEqual(self._is_na(rdf, 'x'), [False, False, True, False])
+
+    def test_datetime(self):
+        dates = pd.to_datetime(['2018-01-01 00:00:00', None])
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': dates}))
+        self.assertEqual(r_dataframe_column_types(rdf), ['POSIXct'])
+        self.assertEqual(list(rdf.rx2('x'))[0], 1514764800.0)
+        self.assertEqual(self._is_na(rdf, 'x'), [False, True])
+
+    def test_large_integers_become_numeric(self):
+        rdf = r_convert_pandas_dataframe(pd.DataFrame({'x': np.array([1, 2 ** 40], dtype=np.int64)}))
+        self.assertEqual(r_dataframe_column_types(rdf), ['numeric'])
+
+
+if __name__ == '__main__':
+    unittest.main()
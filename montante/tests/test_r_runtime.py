@@ -0,0 +1,33 @@
+import sys
+import unittest
+import subprocess
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.R.runtime import LazyRPackage, warm_up, r_started
+
+
+class TestRRuntime(BaseTest):
+
+    def _run(self, statement):
+        return subprocess.check_output([sys.executable, '-c', statement]).decode().strip()
+
+    def test_import_does_not_start_r(self):
+        out = self._run('import sys; import montante.operations.train, montante.operations.predict; '
+                        'print("rpy2.robjects" in sys.modules)')
+        self.assertEqual(out, 'False')
+
+    def test_isinstance_before_start(self):
+        out = self._run('from montante.operations.R.functions import RListVector; '
+                        'print(isinstance([], RListVector))')
+        self.assertEqual(out, 'False')
+
+    def test_warm_up(self):
+        package = LazyRPackage('stats')
+        warm_up(['stats'])
+        self.assertTrue(r_started())
+        self.assertIsNotNone(package._package)
+        self.assertEqual(list(package.median([1, 2, 3])), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import queue
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.R.workers import RWorkerPool
+from montante.operations.R.tuning import caret_grid_search
+from montante.operations.train import training_operation_async
+from montante.operations.predict import prediction_operation_async
+
+
+class TestRWorkerPool(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.pool = RWorkerPool(workers=2, store_directory=self.directory)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def test_train_then_predict_on_holder(self):
+        model_uuid = training_operation_async(self.pool, self._iris_dataset(), self._iris_payload()).result()
+        self.assertIsInstance(model_uuid, str)
+
+        p = prediction_operation_async(self.pool, {
+            'model_uuid': model_uuid,
+            'data': {
+                'petal_width_cm': [1, 1, 1],
+                'sepal_length_cm': [1, 1, 1],
+                'sepal_width_cm': [1, 1, 1],
+                'petal_length_cm': [1, 1, 1]
+            }
+        }).result()
+        self.assertEqual(len(p), 3)
+
+        metrics = self.pool.metrics()
+        holders = [worker['worker'] for worker in metrics['workers'] if model_uuid in worker['models']]
+        self.assertEqual(len(holders), 1)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_training_errors(self):
+        payload = self._iris_payload()
+        del(payload['predictors'])
+        errors = training_operation_async(self.pool, self._iris_dataset(), payload).result()
+        self.assertEqual(errors[0], (['required'], "'predictors' is a required property"))
+
+    def test_unknown_model(self):
+        future = prediction_operation_async(self.pool, {'model_uuid': 'unknown', 'data': {}})
+
+        with self.assertRaises(KeyError):
+            future.result()
+
+        self.assertEqual([worker['models'] for worker in self.pool.metrics()['workers']], [[], []])
+
+    def test_dead_worker_under_load(self):
+        # both workers idle, the training goes to the first one
+        future = training_operation_async(self.pool, self._iris_dataset(), self._iris_payload())
+        self.pool._workers[0].process.terminate()
+
+        # the other worker keeps sending results meanwhile
+        for _ in range(20):
+            with self.assertRaises(KeyError):
+                prediction_operation_async(self.pool, {'model_uuid': 'unknown', 'data': {}}).result()
+
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+
+    def test_start_timeout(self):
+        children = len(multiprocessing.active_children())
+
+        with self.assertRaises(queue.Empty):
+            RWorkerPool(workers=2, store_directory=self.directory, start_timeout=0.01)
+
+        self.assertEqual(len(multiprocessing.active_children()), children)
+
+    def test_grid_search_on_workers(self):
+        payload = self._iris_payload()
+        payload['engine-parameters']['tune-grid'] = [{'trials': n, 'model': 'tree', 'winnow': False} for n in [1, 5, 10]]
+        results = caret_grid_search(self._iris_dataset(), payload, pool=self.pool)
+        self.assertEqual(sorted(results['trials']), [1, 5, 10])
+        # one stage and one release per worker and the three fits, the tune-grid candidates are not sent
+        self.assertEqual(sum(worker['completed'] for worker in self.pool.metrics()['workers']), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from montante.tests.BaseTest import BaseTest
+from montante.tests.frame_source import FrameSource
+from montante.util import use_validator
+from montante.schemas.registry import training_schema_validator
+from montante.operations.dataframe.sampling import (pd_sample, pd_sample_uniform, pd_sample_stratified,
+                                                    reservoir_sample_batches, stratified_allocation)
+
+
+class TestSampling(BaseTest):
+
+    def setUp(self):
+        super()
+        self.df = pd.DataFrame({
+            'n': np.arange(1000),
+            'target': np.array(['a'] * 700 + ['b'] * 200 + ['c'] * 100, dtype=object)
+        }, columns=['n', 'target'])
+
+    def test_uniform(self):
+        df = pd_sample_uniform(self.df, size=100, seed=1)
+        self.assertEqual(len(df), 100)
+        self.assertTrue((np.diff(df['n'].values) > 0).all())
+        self.assertTrue(df.equals(pd_sample_uniform(self.df, size=100, seed=1)))
+        self.assertFalse(df.equals(pd_sample_uniform(self.df, size=100, seed=2)))
+        self.assertEqual(len(pd_sample_uniform(self.df, fraction=0.25)), 250)
+        self.assertEqual(len(pd_sample_uniform(self.df, size=5000)), 1000)
+
+    def test_stratified_keeps_proportions(self):
+        df = pd_sample_stratified(self.df, 'target', fraction=0.1, seed=3)
+        self.assertEqual(df['target'].value_counts().to_dict(), {'a': 70, 'b': 20, 'c': 10})
+        self.assertTrue((np.diff(df['n'].values) > 0).all())
+        self.assertEqual(list(stratified_allocation(np.array([5, 3, 2]), 3)), [1, 1, 1])
+        self.assertEqual(stratified_allocation(np.array([7, 1, 1, 1]), 7).sum(), 7)
+
+    def test_reservoir(self):
+        batches = [self.df.iloc[start:start + 64] for start in range(0, len(self.df), 64)]
+        df, population = reservoir_sample_batches(iter(batches), 50, seed=4)
+        self.assertEqual(population, 1000)
+        self.assertEqual(len(df), 50)
+        self.assertEqual(len(set(df['n'])), 50)
+        self.assertTrue((np.diff(df['n'].values) > 0).all())
+        self.assertTrue(df.equals(reservoir_sample_batches(iter(batches), 50, seed=4)[0]))
+
+        df, population = reservoir_sample_batches(iter(batches[:1]), 100)
+        self.assertEqual(list(df['n']), list(range(64)))
+        self.assertEqual(reservoir_sample_batches(iter([]), 10), (None, 0))
+
+    def test_reservoir_is_uniform(self):
+        hits = np.zeros(100)
+
+        for seed in range(400):
+            df, _ = reservoir_sample_batches((self.df.iloc[start:min(start + 7, 100)] for start in range(0, 100, 7)),
+                                             10, seed=seed)
+            hits[df['n'].values] += 1
+
+        # every row is expected in 400 * 10 / 100 = 40 samples
+        self.assertLess(np.abs(hits - 40).max(), 25)
+
+    def test_select_batches(self):
+        source = FrameSource(self.df)
+        batches = list(source.select_batches(['n'], [['target', '==', 'b']], limit=150, batch_size=300))
+        self.assertEqual([len(batch) for batch in batches], [0, 0, 150])
+        self.assertEqual(list(batches[2]), ['n'])
+
+    def test_pd_sample(self):
+        self.assertEqual(len(pd_sample(self.df, {'method': 'reservoir', 'size': 10})), 10)
+        self.assertEqual(len(pd_sample(self.df, {'method': 'stratified', 'size': 10}, 'target')), 10)
+
+        with self.assertRaises(ValueError):
+            pd_sample(self.df, {'method': 'reservoir', 'fraction': 0.5})
+
+    def test_sampling_schema(self):
+        validator = training_schema_validator('caret', 'C5.0')
+        payload = self._iris_payload()
+        payload['sampling'] = {'method': 'stratified', 'seed': 7, 'fraction': 0.5}
+        self.assertEqual(use_validator(validator, payload), [])
+
+        for sampling in [{'method': 'reservoir', 'fraction': 0.5}, {'method': 'uniform', 'size': 10, 'fraction': 0.5},
+                         {'method': 'uniform'}, {'method': 'cluster', 'size': 10}, {'method': 'uniform', 'size': 0}]:
+            payload['sampling'] = sampling
+            self.assertNotEqual(use_validator(validator, payload), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
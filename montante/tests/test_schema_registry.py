@@ -0,0 +1,39 @@
+import unittest
+
+from montante.tests.BaseTest import BaseTest
+from montante.util import use_validator
+from montante.schemas.registry import (training_schema_validator,
+                                       prediction_schema_validator,
+                                       column_info_fingerprint,
+                                       clear_schema_validators)
+
+
+class TestSchemaRegistry(BaseTest):
+
+    def setUp(self):
+        super()
+        clear_schema_validators()
+
+    def test_training_validator_is_reused(self):
+        self.assertIs(training_schema_validator('caret', 'C5.0'), training_schema_validator('caret', 'C5.0'))
+
+    def test_training_validator_unexisting_method(self):
+        with self.assertRaises(NotImplementedError):
+            training_schema_validator('caret', 'UNEXISTENT')
+
+    def test_fingerprint_ignores_column_order(self):
+        pairs = [('a', 'float64'), ('b', 'object')]
+        self.assertEqual(column_info_fingerprint(pairs), column_info_fingerprint(list(reversed(pairs))))
+        self.assertEqual(column_info_fingerprint(pairs), column_info_fingerprint(dict(pairs)))
+        self.assertIs(prediction_schema_validator(pairs), prediction_schema_validator(dict(pairs)))
+
+    def test_errors_after_fast_path(self):
+        payload = self._iris_payload()
+        self.assertEqual(use_validator(training_schema_validator('caret', 'C5.0'), payload), [])
+        del(payload['target'])
+        errors = use_validator(training_schema_validator('caret', 'C5.0'), payload)
+        self.assertEqual(errors[0], (['required'], "'target' is a required property"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import sqlalchemy
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.sql.engine import concatenate_column_batches
+from montante.operations.sql.sqlite import sqlite_from_dataframe
+from montante.operations.sql.datasource import SQLDatasourceWrapper
+
+
+class TestSQLDatasourceWrapper(BaseTest):
+
+    def setUp(self):
+        super()
+        self.iris_df = self._iris_dataset()
+        self.directory = tempfile.mkdtemp()
+        self.params = {'engine': 'sqlite', 'database': os.path.join(self.directory, 'iris.sqlite')}
+        e = sqlalchemy.create_engine('sqlite:///' + self.params['database'])
+        sqlite_from_dataframe(self.iris_df, e, 'iris')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _source(self, sql='SELECT * FROM dataset'):
+        return SQLDatasourceWrapper(self.params, sql, batch_size=40)
+
+    def test_to_df(self):
+        df = self._source().to_df()
+        self.assertEqual(len(df), 150)
+        self.assertEqual(str(df['sepal_length_cm'].dtype), 'float64')
+        self.assertEqual(list(df['target']), list(self.iris_df['target']))
+
+    def test_to_batches(self):
+        sizes = [len(batch) for batch in self._source().to_batches(40)]
+        self.assertEqual(sizes, [40, 40, 40, 30])
+
+    def test_empty_result(self):
+        df = self._source('SELECT * FROM dataset WHERE target = \'none\'').to_df()
+        self.assertEqual(len(df), 0)
+        self.assertIn('target', list(df))
+
+    def test_select(self):
+        df = self._source().select(['petal_width_cm', 'target'],
+                                   [['target', '==', 'setosa'], ['sepal_length_cm', '>', 5.0]], limit=10)
+        expected = self.iris_df[(self.iris_df['target'] == 'setosa') & (self.iris_df['sepal_length_cm'] > 5.0)]
+        self.assertEqual(list(df), ['petal_width_cm', 'target'])
+        self.assertEqual(list(df['petal_width_cm']), list(expected['petal_width_cm'][:10]))
+
+    def test_select_from_table(self):
+        source = SQLDatasourceWrapper.from_table(self.params, 'dataset')
+        self.assertEqual(len(source.to_df()), 150)
+        self.assertEqual(len(source.select(['target'], [['target', 'in', ['setosa', 'virginica']]])), 100)
+        self.assertEqual(len(source.select(['target'], [['target', 'not in', ['setosa']]], limit=3)), 3)
+
+        # a string would be compared as its characters
+        with self.assertRaises(ValueError):
+            source.select(['target'], [['target', 'in', 'setosa']])
+
+        # IS NULL would match the rows that no other source lets through
+        with self.assertRaises(ValueError):
+            source.select(['target'], [['target', '==', None]])
+
+    def test_null_datetime_batch(self):
+        dates = np.array(['2018-01-01', '2018-01-02'], dtype='datetime64[ns]')
+        column = concatenate_column_batches([[np.array([None, None], dtype=object)], [dates]], 1)[0]
+        self.assertEqual(str(column.dtype), 'datetime64[ns]')
+        self.assertTrue(np.isnat(column[:2]).all())
+        self.assertEqual(list(column[2:]), list(dates))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import sqlalchemy
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.sql.automap import inspect_sql_schema, clear_sql_schema_cache
+
+
+class TestInspectSQLSchema(BaseTest):
+
+    def setUp(self):
+        super()
+        clear_sql_schema_cache()
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'retail.sqlite')
+        connection = sqlite3.connect(path)
+        connection.executescript("""
+            CREATE TABLE country (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE invoice (id INTEGER PRIMARY KEY, country_id INTEGER REFERENCES country(id), amount REAL);
+            CREATE TABLE log (message TEXT);
+            INSERT INTO country VALUES (1, 'United Kingdom'), (2, 'France');
+            INSERT INTO invoice VALUES (1, 1, 2.5), (2, 2, 3.0), (3, 1, 1.0);
+        """)
+        connection.commit()
+        connection.close()
+        self.e = sqlalchemy.create_engine('sqlite:///' + path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_tables_without_primary_key(self):
+        structure = inspect_sql_schema(self.e, row_counts='none')
+        self.assertEqual(sorted(structure['tables']), ['country', 'invoice', 'log'])
+        self.assertEqual(structure['tables']['log']['columns']['log.message']['type'], 'TEXT')
+
+    def test_keys(self):
+        structure = inspect_sql_schema(self.e, row_counts='none')
+        columns = structure['tables']['invoice']['columns']
+        self.assertTrue(columns['invoice.id']['primary_key'])
+        self.assertEqual(columns['invoice.country_id']['foreign_keys'], 'country.id')
+        self.assertEqual(structure['foreign_keys'], ['invoice.country_id.country.id'])
+        self.assertTrue(structure['tables']['country']['columns']['country.name']['unique'])
+
+    def test_exact_row_counts(self):
+        structure = inspect_sql_schema(self.e, row_counts='exact')
+        self.assertEqual(structure['tables']['invoice']['total_rows'], 3)
+        self.assertEqual(structure['tables']['log']['total_rows'], 0)
+
+    def test_estimated_row_counts(self):
+        self.assertIsNone(inspect_sql_schema(self.e, ttl=0)['tables']['invoice']['total_rows'])
+
+        with self.e.connect() as connection:
+            connection.execute('ANALYZE')
+
+        self.assertEqual(inspect_sql_schema(self.e, ttl=0)['tables']['invoice']['total_rows'], 3)
+
+    def test_cache(self):
+        self.assertIs(inspect_sql_schema(self.e), inspect_sql_schema(self.e))
+        self.assertIsNot(inspect_sql_schema(self.e), inspect_sql_schema(self.e, ttl=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
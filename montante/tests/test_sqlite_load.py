@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+from montante.tests.BaseTest import BaseTest
+from montante.operations.sql.sqlite import sqlite_bulk_load, sqlite_from_dataframe, sqlite_column_types
+from montante.operations.sql.engine import raw_sqlalchemy_query_to_pandas_dataframe
+
+
+class TestSQLiteLoad(BaseTest):
+
+    def setUp(self):
+        super()
+        self.directory = tempfile.mkdtemp()
+        self.e = sqlalchemy.create_engine('sqlite:///' + os.path.join(self.directory, 'load.sqlite'))
+        self.df = pd.DataFrame({
+            'integer': np.arange(5, dtype=np.int64),
+            'numeric': [1.5, np.nan, 2.5, 3.5, 4.5],
+            'text': ['a', None, 'b', 'c', 'd'],
+            'flag': [True, False, True, True, False],
+            'when': pd.to_datetime(['2018-01-01', None, '2018-01-03', '2018-01-04', '2018-01-05'])
+        }, columns=['integer', 'numeric', 'text', 'flag', 'when'])
+
+    def tearDown(self):
+        self.e.dispose()
+        shutil.rmtree(self.directory)
+
+    def _query(self, sql):
+        return [tuple(row) for row in self.e.execute(sql).fetchall()]
+
+    def test_column_types(self):
+        self.assertEqual(sqlite_column_types(self.df), [('integer', 'INTEGER'), ('numeric', 'REAL'), ('text', 'TEXT'),
+                                                        ('flag', 'INTEGER'), ('when', 'TIMESTAMP')])
+
+    def test_load_in_chunks(self):
+        stats = sqlite_bulk_load(self.df, self.e, chunk_size=2, indexes=['text'])
+        self.assertTrue(stats['ok'])
+        self.assertEqual(stats['rows'], 5)
+        self.assertEqual(stats['errors'], [])
+        self.assertGreater(stats['bytes'], 0)
+
+        df = raw_sqlalchemy_query_to_pandas_dataframe(self.e, 'SELECT * FROM dataset')
+        self.assertEqual(list(df), ['index', 'integer', 'numeric', 'text', 'flag', 'when'])
+        self.assertEqual(list(df['integer']), list(range(5)))
+        self.assertTrue(np.isnan(df['numeric'][1]))
+        self.assertEqual(list(df['text']), ['a', None, 'b', 'c', 'd'])
+        self.assertEqual(list(df['flag']), [1, 0, 1, 1, 0])
+        self.assertEqual(df['when'][0][:10], '2018-01-01')
+        self.assertIsNone(df['when'][1])
+
+        indexes = sorted(row[0] for row in self._query("SELECT name FROM sqlite_master WHERE type = 'index'"))
+        self.assertEqual(indexes, ['ix_dataset_index', 'ix_dataset_text'])
+
+    def test_settings_restored(self):
+        sqlite_bulk_load(self.df, self.e)
+        self.assertEqual(self._query('PRAGMA journal_mode'), [('delete',)])
+
+    def test_append(self):
+        sqlite_bulk_load(self.df, self.e)
+        sqlite_bulk_load(self.df, self.e)
+        self.assertEqual(self._query('SELECT COUNT(*) FROM dataset'), [(10,)])
+
+    def test_errors_roll_back(self):
+        sqlite_bulk_load(self.df, self.e)
+        stats = sqlite_bulk_load(pd.DataFrame({'unknown': [1]}), self.e)
+        self.assertFalse(stats['ok'])
+        self.assertEqual(stats['rows'], 0)
+        self.assertIn('unknown', stats['errors'][0])
+        self.assertEqual(self._query('SELECT COUNT(*) FROM dataset'), [(5,)])
+
+    def test_sqlite_from_dataframe(self):
+        self.assertTrue(sqlite_from_dataframe(self.df, self.e, 'uuid'))
+        self.assertFalse(sqlite_from_dataframe(pd.DataFrame({'unknown': [1]}), self.e, 'uuid'))
+
+
+if __name__ == '__main__':
+    unittest.main()
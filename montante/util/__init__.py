@@ -38,6 +38,16 @@ def date_parse_expressions() -> List[str]:
 
 
 def use_validator(validator: jsonschema.Draft4Validator, payload: Dict) -> List:
+    """
+    Returns the validation errors of the payload as (schema path, message) pairs,
+    or an empty list if it is valid.
+
+    Valid payloads take the fast path: is_valid stops at the first error and skips
+    building and sorting the error list, which is only done on failure.
+    """
+    if validator.is_valid(payload):
+        return []
+
     errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
 
     if len(errors) > 0:
@@ -0,0 +1,229 @@
+"""
+Timing spans and counters for the train and predict pipelines.
+
+Stages are timed with span() and sized with count(), i.e.:
+
+    with span('predict.r_predict'):
+        prediction = r_predict(model, rdf)
+
+    count('predict.rows', len(df))
+
+Both go to the sink installed with set_instrumentation_sink(). No sink is
+installed by default: span() then returns a shared no-op context manager and
+count() returns right away, so instrumented code pays a global lookup per
+call. Values that cost something to compute (i.e. bytes of a dataframe) should
+be guarded with instrumentation_enabled().
+
+Sinks implement observe(name, seconds) and count(name, value). Bundled sinks
+keep histograms in memory (HistogramSink), log every event (LoggingSink), or
+render histograms in the Prometheus text exposition format (PrometheusSink).
+
+See:
+    https://prometheus.io/docs/instrumenting/exposition_formats/
+"""
+
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Tuple, Union
+
+"""
+Upper bounds in seconds of the default histogram buckets, from 1ms to 5 minutes.
+"""
+INSTRUMENTATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_sink = None
+
+
+def set_instrumentation_sink(sink: Any) -> Any:
+    """
+    Installs the sink receiving every span and counter, or disables
+    instrumentation with None. Returns the previously installed sink.
+    """
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+
+def instrumentation_sink() -> Any:
+    return _sink
+
+
+def instrumentation_enabled() -> bool:
+    return _sink is not None
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    __slots__ = ('sink', 'name', 'start')
+
+    def __init__(self, sink: Any, name: str):
+        self.sink = sink
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.sink.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name: str):
+    """
+    Context manager timing the enclosed block under 'name'. Blocks that raise
+    are timed as well.
+    """
+    sink = _sink
+
+    if sink is None:
+        return _NULL_SPAN
+
+    return _Span(sink, name)
+
+
+def count(name: str, value: Union[int, float] = 1):
+    """
+    Adds 'value' to the counter 'name'.
+    """
+    sink = _sink
+
+    if sink is not None:
+        sink.count(name, value)
+
+
+class HistogramSink:
+    """
+    Keeps a cumulative histogram of the durations of every span name, along with
+    their count and sum, and the total of every counter.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = INSTRUMENTATION_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+
+            if histogram is None:
+                # one slot per bucket plus one for +Inf
+                histogram = self._histograms[name] = {'count': 0, 'sum': 0.0, 'buckets': [0] * (len(self.buckets) + 1)}
+
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['buckets'][bisect_left(self.buckets, seconds)] += 1
+
+    def count(self, name: str, value: Union[int, float]):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        """
+        Returns the spans and counters recorded so far. Span buckets are
+        cumulative, as (upper bound, observations) pairs ending with +Inf.
+        """
+        with self._lock:
+            spans = {}
+
+            for name, histogram in self._histograms.items():
+                bounds = list(self.buckets) + [float('inf')]
+                cumulative = []
+                total = 0
+
+                for bound, observations in zip(bounds, histogram['buckets']):
+                    total += observations
+                    cumulative.append((bound, total))
+
+                spans[name] = {
+                    'count': histogram['count'],
+                    'sum': histogram['sum'],
+                    'mean': histogram['sum'] / histogram['count'],
+                    'buckets': cumulative
+                }
+
+            return {'spans': spans, 'counters': dict(self._counters)}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+
+class LoggingSink:
+    """
+    Logs every span and counter, at DEBUG level by default.
+    """
+
+    def __init__(self, logger: Union[None, logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger('montante.instrumentation')
+        self.level = level
+
+    def observe(self, name: str, seconds: float):
+        self.logger.log(self.level, 'span %s %.6fs', name, seconds)
+
+    def count(self, name: str, value: Union[int, float]):
+        self.logger.log(self.level, 'count %s %s', name, value)
+
+
+def _prometheus_name(name: str) -> str:
+    return re.sub('[^a-zA-Z0-9_]', '_', name)
+
+
+def _prometheus_value(value: float) -> str:
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+class PrometheusSink(HistogramSink):
+    """
+    HistogramSink that renders its contents in the Prometheus text exposition
+    format: one histogram '<namespace>_span_seconds' labeled by span name, and
+    one '<namespace>_<counter>_total' counter per counter name.
+    """
+
+    def __init__(self, namespace: str = 'montante', buckets: Tuple[float, ...] = INSTRUMENTATION_BUCKETS):
+        super().__init__(buckets)
+        self.namespace = _prometheus_name(namespace)
+
+    def exposition(self) -> str:
+        snapshot = self.snapshot()
+        histogram = '_'.join([self.namespace, 'span_seconds'])
+        lines = []
+
+        if snapshot['spans']:
+            lines.append(' '.join(['# HELP', histogram, 'Duration of montante pipeline stages.']))
+            lines.append(' '.join(['# TYPE', histogram, 'histogram']))
+
+        for name in sorted(snapshot['spans']):
+            values = snapshot['spans'][name]
+
+            for bound, total in values['buckets']:
+                lines.append('%s_bucket{span="%s",le="%s"} %d' % (histogram, name, _prometheus_value(bound), total))
+
+            lines.append('%s_sum{span="%s"} %r' % (histogram, name, values['sum']))
+            lines.append('%s_count{span="%s"} %d' % (histogram, name, values['count']))
+
+        for name in sorted(snapshot['counters']):
+            counter = '_'.join([self.namespace, _prometheus_name(name), 'total'])
+            lines.append(' '.join(['# TYPE', counter, 'counter']))
+            lines.append(' '.join([counter, _prometheus_value(snapshot['counters'][name])]))
+
+        return ''.join(line + '\n' for line in lines)